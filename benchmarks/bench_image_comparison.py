@@ -0,0 +1,265 @@
+"""Offline benchmark for the image comparison pipeline.
+
+Generates synthetic screenshot pairs (element crop, 1080p viewport, tall full
+page) with controlled perturbations, times each pipeline stage and reports wall
+time, peak RSS and throughput. Every (size, perturbation, stage) case runs in a
+fresh child process so its peak RSS is its own.
+
+    python benchmarks/bench_image_comparison.py --save bench_baseline.json
+    python benchmarks/bench_image_comparison.py --baseline bench_baseline.json --threshold 0.15
+
+With ``--baseline`` the run exits with status 1 when any case got slower than
+the baseline by more than ``--threshold`` (a fraction).
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT / 'custom_libs'))
+
+import ImageComparision as ic  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# name -> (height, width)
+SIZES = {
+    'element': (180, 640),
+    'viewport': (1080, 1920),
+    'fullpage': (6000, 1280),
+}
+PERTURBATIONS = ('identical', 'shift', 'text', 'color')
+STAGES = ('load', 'align', 'absdiff_mask', 'ssim_mask', 'compare_images', 'compare_images_ocr')
+DEFAULT_STAGES = ('load', 'align', 'absdiff_mask', 'ssim_mask', 'compare_images')
+
+
+def synthetic_page(height, width, seed=0):
+    """Draw a deterministic page-like image: header bar, card grid and text lines."""
+    rng = np.random.default_rng(seed)
+    img = np.full((height, width, 3), 246, np.uint8)
+    header = min(64, height // 4)
+    cv2.rectangle(img, (0, 0), (width, header), (60, 40, 30), -1)
+    cv2.putText(img, 'Playground Shop', (16, header * 2 // 3), cv2.FONT_HERSHEY_SIMPLEX,
+                header / 80.0, (255, 255, 255), 2, cv2.LINE_AA)
+
+    card_w, card_h, gap = 280, 150, 24
+    for y in range(header + gap, height - card_h, card_h + gap):
+        for x in range(gap, width - card_w, card_w + gap):
+            fill = tuple(int(c) for c in rng.integers(180, 240, 3))
+            cv2.rectangle(img, (x, y), (x + card_w, y + card_h), fill, -1)
+            cv2.rectangle(img, (x, y), (x + card_w, y + card_h), (120, 120, 120), 1)
+            label = f"Item {int(rng.integers(100, 999))}  ${int(rng.integers(5, 500))}.99"
+            cv2.putText(img, label, (x + 12, y + card_h - 20), cv2.FONT_HERSHEY_SIMPLEX,
+                        0.55, (20, 20, 20), 1, cv2.LINE_AA)
+    return img
+
+
+def perturb(img, kind, seed=1):
+    """Return a copy of img with one controlled change applied."""
+    out = img.copy()
+    height, width = img.shape[:2]
+    if kind == 'shift':
+        M = np.float32([[1, 0, 3], [0, 1, 2]])
+        out = cv2.warpAffine(img, M, (width, height), borderMode=cv2.BORDER_REPLICATE)
+    elif kind == 'text':
+        y = max(20, height // 2)
+        cv2.rectangle(out, (10, y - 18), (min(width - 1, 260), y + 6), (246, 246, 246), -1)
+        cv2.putText(out, 'Sale ends today', (12, y), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 200), 1, cv2.LINE_AA)
+    elif kind == 'color':
+        rng = np.random.default_rng(seed)
+        x0, y0 = int(rng.integers(0, width // 2)), int(rng.integers(0, height // 2))
+        block = out[y0:y0 + height // 4, x0:x0 + width // 4]
+        block[...] = 255 - block
+    elif kind != 'identical':
+        raise ValueError(f"Unknown perturbation '{kind}'. Expected one of: {', '.join(PERTURBATIONS)}")
+    return out
+
+
+def generate_pairs(folder, sizes, perturbations):
+    """Write one PNG pair per (size, perturbation) into folder. Returns {(size, kind): (pathA, pathB)}."""
+    pairs = {}
+    for size in sizes:
+        height, width = SIZES[size]
+        base = synthetic_page(height, width)
+        pathA = os.path.join(folder, f"{size}_baseline.png")
+        cv2.imwrite(pathA, base)
+        for kind in perturbations:
+            pathB = os.path.join(folder, f"{size}_{kind}.png")
+            cv2.imwrite(pathB, perturb(base, kind))
+            pairs[(size, kind)] = (pathA, pathB)
+    return pairs
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MiB, or None where unavailable."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _stage_callable(stage, pathA, pathB, output_dir):
+    """Return a no-argument callable running one stage on the pair (inputs prepared up front)."""
+    if stage == 'load':
+        return lambda: (ic.load_image(pathA), ic.load_image(pathB))
+
+    imgA, imgB = ic.load_image(pathA), ic.load_image(pathB)
+    if stage == 'align':
+        return lambda: ic.align_images(imgA, imgB)
+
+    grayA = cv2.cvtColor(imgA, cv2.COLOR_BGR2GRAY)
+    grayB = cv2.cvtColor(ic.ensure_same_size(imgA, imgB), cv2.COLOR_BGR2GRAY)
+    if stage == 'absdiff_mask':
+        return lambda: ic.compute_absdiff_mask(grayA, grayB)
+    if stage == 'ssim_mask':
+        return lambda: ic.compute_ssim_mask(grayA, grayB)
+    if stage == 'compare_images':
+        # Pre-check, result memo and caches off: every repeat runs the full pipeline from the PNG files
+        return lambda: ic.compare_images(pathA, pathB, output_dir=output_dir, precheck=False, memo=False,
+                                         decode_cache=False, cache_features=False, artifacts='never')
+    if stage == 'compare_images_ocr':
+        # The same, with SSIM + OCR; the OCR engine's baseline text cache is warm after the first call
+        import compare_images as ocr_pipeline
+        return lambda: ocr_pipeline.compare_images(pathA, pathB, output_dir=output_dir, precheck=False,
+                                                   memo=False, decode_cache=False)
+    raise ValueError(f"Unknown stage '{stage}'. Expected one of: {', '.join(STAGES)}")
+
+
+def run_case(stage, pathA, pathB, output_dir, repeat, warmup=1):
+    """Time one stage in the current process. Returns the case's measurements."""
+    cv2.setNumThreads(1)  # keep timings comparable across machines with different core counts
+    # Result logs and any cache files go to the scratch folder, never the repository's output/
+    os.environ["IMAGE_COMPARE_CACHE_DIR"] = os.path.join(output_dir, 'cache')
+    os.environ["IMAGE_COMPARE_RESULTS_DIR"] = os.path.join(output_dir, 'results')
+    fn = _stage_callable(stage, pathA, pathB, output_dir)
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    total = sum(samples)
+    return {
+        "median_s": statistics.median(samples),
+        "min_s": min(samples),
+        "max_s": max(samples),
+        "pairs_per_s": (repeat / total) if total else None,
+        "peak_rss_mb": peak_rss_mb(),
+        "repeat": repeat,
+    }
+
+
+def run_benchmarks(sizes=tuple(SIZES), perturbations=PERTURBATIONS, stages=DEFAULT_STAGES, repeat=5, workdir=None):
+    """Run every (size, perturbation, stage) case, each in a fresh child process.
+    Returns {"meta": ..., "results": {"size/perturbation/stage": measurements}}.
+    """
+    own_dir = workdir is None
+    workdir = workdir or tempfile.mkdtemp(prefix='imgcmp-bench-')
+    results = {}
+    try:
+        pairs = generate_pairs(workdir, sizes, perturbations)
+        ctx = multiprocessing.get_context('spawn')
+        for (size, kind), (pathA, pathB) in pairs.items():
+            for stage in stages:
+                key = f"{size}/{kind}/{stage}"
+                output_dir = os.path.join(workdir, 'out', key.replace('/', '_'))
+                with ctx.Pool(1, maxtasksperchild=1) as pool:
+                    try:
+                        results[key] = pool.apply(run_case, (stage, pathA, pathB, output_dir, repeat))
+                    except Exception as e:
+                        results[key] = {"error": f"{type(e).__name__}: {e}"}
+                print(_format_row(key, results[key]), flush=True)
+    finally:
+        if own_dir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    meta = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "opencv": cv2.__version__,
+        "numpy": np.__version__,
+        "cpu_count": os.cpu_count(),
+        "repeat": repeat,
+        "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+    return {"meta": meta, "results": results}
+
+
+def compare_to_baseline(report, baseline, threshold=0.15):
+    """Return [(key, baseline median, current median, ratio)] for cases slower by more than threshold."""
+    regressions = []
+    for key, current in report["results"].items():
+        previous = baseline.get("results", {}).get(key)
+        if not previous or "median_s" not in previous or "median_s" not in current:
+            continue
+        if previous["median_s"] > 0:
+            ratio = current["median_s"] / previous["median_s"]
+            if ratio > 1.0 + threshold:
+                regressions.append((key, previous["median_s"], current["median_s"], ratio))
+    return regressions
+
+
+def _format_row(key, row):
+    if "error" in row:
+        return f"{key:<40} ERROR {row['error']}"
+    rss = f"{row['peak_rss_mb']:8.1f} MiB" if row["peak_rss_mb"] is not None else "       n/a"
+    return f"{key:<40} {row['median_s'] * 1000:10.2f} ms {row['pairs_per_s']:10.2f} pairs/s {rss}"
+
+
+def _csv(value, allowed):
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = set(names) - set(allowed)
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown {sorted(unknown)}; expected any of: {', '.join(allowed)}")
+    return tuple(names)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=lambda v: _csv(v, SIZES), default=tuple(SIZES))
+    parser.add_argument('--perturbations', type=lambda v: _csv(v, PERTURBATIONS), default=PERTURBATIONS)
+    parser.add_argument('--stages', type=lambda v: _csv(v, STAGES), default=DEFAULT_STAGES,
+                        help="compare_images_ocr needs tesseract and is off by default")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--save', help="write the JSON report to this path")
+    parser.add_argument('--baseline', help="JSON report from an earlier run to check against")
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help="allowed slowdown against the baseline, as a fraction (default 0.15)")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.sizes, args.perturbations, args.stages, args.repeat)
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"Saved report to {args.save}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(report, baseline, args.threshold)
+        for key, before, after, ratio in regressions:
+            print(f"REGRESSION {key}: {before * 1000:.2f} ms -> {after * 1000:.2f} ms ({ratio:.2f}x)")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
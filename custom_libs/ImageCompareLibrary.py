@@ -0,0 +1,179 @@
+import importlib
+import os
+import sys
+from typing import Optional
+
+# Robot imports this file by path as a top-level module and may drop its folder from
+# sys.path afterwards; the engines are imported on first use, so remember where they live.
+_HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def _engine(name):
+    if __package__:
+        return importlib.import_module(f".{name}", __package__)
+    if _HERE not in sys.path:
+        sys.path.insert(0, _HERE)
+    return importlib.import_module(name)
+
+
+class _ArtifactFlusher:
+    """Library listener: waits for background artifact writes at the end of every suite and of the run."""
+    ROBOT_LISTENER_API_VERSION = 3
+
+    def __init__(self, library):
+        self._library = library
+
+    def end_suite(self, data, result):
+        self._library._flush_if_loaded()
+
+    def close(self):
+        self._library._flush_if_loaded()
+
+
+class ImageCompareLibrary:
+    """Robot Framework keywords for visual comparison, shared by every suite of a run.
+
+    Importing the library loads nothing heavy: OpenCV, scikit-image and the OCR
+    backend are imported by the first keyword that needs them (or by
+    `Warm Up Image Comparison` in a suite setup). One instance serves the whole
+    run, so the warm resources it creates are reused by every call: ORB
+    detectors, the descriptor matcher, the morphology kernel, the decoded-image
+    and feature caches and the resident OCR engine.
+
+    Example:
+    | Library    ../custom_libs/ImageCompareLibrary.py
+    | ${res}=    Compare Images    ${ACTUAL}    ${EXPECTED}
+    """
+    ROBOT_LIBRARY_SCOPE = 'GLOBAL'
+
+    def __init__(self):
+        self._ssim = None
+        self._diff = None
+        self.ROBOT_LIBRARY_LISTENER = _ArtifactFlusher(self)
+
+    def _flush_if_loaded(self):
+        # Nothing can be queued before the engine was imported; do not import it just to flush
+        if self._diff is not None:
+            self._diff.flush_artifacts()
+
+    @property
+    def _ssim_engine(self):
+        if self._ssim is None:
+            self._ssim = _engine('compare_images')
+        return self._ssim
+
+    @property
+    def _diff_engine(self):
+        if self._diff is None:
+            self._diff = _engine('ImageComparision')
+        return self._diff
+
+    def warm_up_image_comparison(self, ocr: bool = True, max_features: int = 5000):
+        """Import the comparison engines and create their shared resources now instead of on first use."""
+        self._diff_engine._orb_detector(int(max_features))
+        self._diff_engine._hamming_matcher()
+        self._ssim_engine.get_decode_cache()
+        if ocr:
+            self._ssim_engine.get_ocr_engine()
+
+    def compare_images(self, baseline_path: str, current_path: str, diff_output: str = "diff.png",
+                       highlighted_output: str = "highlighted_diff.png", log_file: str = "debug_log.txt",
+                       output_dir: Optional[str] = None, precheck: bool = True,
+                       decode_cache: bool = True, include=None, ignore=None, roi_mask: Optional[str] = None,
+                       verbose: bool = False, memo: bool = True) -> dict:
+        """SSIM + OCR comparison of ``current_path`` against ``baseline_path``; returns the results dictionary.
+
+        See ``compare_images.compare_images`` for the arguments and the returned keys
+        (ssim_score, ocr_result, final_decision, ...).
+        """
+        return self._ssim_engine.compare_images(
+            baseline_path, current_path, diff_output=diff_output, highlighted_output=highlighted_output,
+            log_file=log_file, output_dir=output_dir, precheck=precheck,
+            decode_cache=decode_cache, include=include, ignore=ignore, roi_mask=roi_mask, verbose=verbose,
+            memo=memo)
+
+    def diff_images(self, baseline_path: str, current_path: str, output_dir: Optional[str] = None,
+                    method: str = 'absdiff', align: bool = True, min_area: int = 100, cache_features: bool = True,
+                    align_mode: str = 'homography', tile_height: Optional[int] = None, precheck: bool = True,
+                    artifacts: str = 'always', artifact_set: Optional[str] = None, image_format: str = 'png',
+                    png_compression: Optional[int] = None, background_writes: bool = True,
+                    decode_cache: bool = True, include=None, ignore=None, roi_mask: Optional[str] = None,
+                    memo: bool = True):
+        """Pixel/SSIM diff with alignment and region detection; returns a DiffResult.
+
+        See ``ImageComparision.compare_images`` for the arguments. They are typed here so
+        Robot converts values such as ``precheck=False`` or ``min_area=500``.
+        """
+        return self._diff_engine.compare_images(
+            baseline_path, current_path, output_dir=output_dir, method=method, align=align, min_area=min_area,
+            cache_features=cache_features, align_mode=align_mode, tile_height=tile_height, precheck=precheck,
+            artifacts=artifacts, artifact_set=artifact_set, image_format=image_format,
+            png_compression=png_compression, background_writes=background_writes, decode_cache=decode_cache,
+            include=include, ignore=ignore, roi_mask=roi_mask, memo=memo)
+
+    def diff_images_batch(self, manifest: Optional[str] = None, baseline_dir: Optional[str] = None,
+                          actual_dir: Optional[str] = None, output_dir: Optional[str] = None,
+                          method: str = 'absdiff', align: bool = True, min_area: int = 100,
+                          processes: Optional[int] = None, align_mode: str = 'homography',
+                          artifacts: str = 'always'):
+        """Diff many (baseline, actual) pairs across a process pool; returns a BatchResult.
+
+        See ``ImageComparision.compare_images_batch``.
+        """
+        return self._diff_engine.compare_images_batch(
+            manifest, baseline_dir=baseline_dir, actual_dir=actual_dir, output_dir=output_dir, method=method,
+            align=align, min_area=min_area, processes=processes, align_mode=align_mode, artifacts=artifacts)
+
+    def approve_baseline(self, image_path: str, test_id: Optional[str] = None, browser: Optional[str] = None,
+                         viewport: Optional[str] = None, store_dir: Optional[str] = None,
+                         max_features: int = 5000) -> str:
+        """Store ``image_path`` as the approved baseline for (test, browser, viewport); returns its digest.
+
+        See ``ImageComparision.approve_baseline``.
+        """
+        return self._diff_engine.approve_baseline(image_path, test_id, browser, viewport, store_dir, max_features)
+
+    def compare_to_baseline(self, current_path: str, test_id: Optional[str] = None, browser: Optional[str] = None,
+                            viewport: Optional[str] = None, store_dir: Optional[str] = None,
+                            output_dir: Optional[str] = None, method: str = 'absdiff', align: bool = True,
+                            min_area: int = 100, align_mode: str = 'homography', tile_height: Optional[int] = None,
+                            precheck: bool = True, artifacts: str = 'always', include=None, ignore=None,
+                            roi_mask: Optional[str] = None, memo: bool = True):
+        """Diff ``current_path`` against the approved baseline for (test, browser, viewport); returns a DiffResult.
+
+        See ``ImageComparision.compare_to_baseline``.
+        """
+        return self._diff_engine.compare_to_baseline(
+            current_path, test_id, browser, viewport, store_dir, output_dir=output_dir, method=method, align=align,
+            min_area=min_area, align_mode=align_mode, tile_height=tile_height, precheck=precheck,
+            artifacts=artifacts, include=include, ignore=ignore, roi_mask=roi_mask, memo=memo)
+
+    def resolve_selector_regions(self, *selectors, relative_to: Optional[str] = None, full_page: bool = False) -> list:
+        """Screenshot-pixel boxes of the elements matching ``selectors``, for ``include`` / ``ignore``.
+
+        See ``ImageComparision.resolve_selector_regions``.
+        """
+        return self._diff_engine.resolve_selector_regions(*selectors, relative_to=relative_to, full_page=full_page)
+
+    def flush_artifacts(self):
+        """Wait until every artifact image of earlier `Diff Images` calls is on disk.
+
+        Artifacts are written by a background thread (``background_writes``); call this
+        before a step opens them. The library also flushes at the end of each suite.
+        """
+        self._flush_if_loaded()
+
+    def cleanup_output(self, root: Optional[str] = None, max_age_days: Optional[float] = None,
+                       keep_runs: Optional[int] = None) -> int:
+        """Delete old comparison run folders and return how many were removed.
+
+        See ``output_paths.cleanup_output``; defaults come from $IMAGE_COMPARE_RETENTION_DAYS
+        and $IMAGE_COMPARE_KEEP_RUNS.
+        """
+        self._flush_if_loaded()
+        return _engine('output_paths').cleanup_output(root, max_age_days, keep_runs)
+
+    def image_comparison_stats(self) -> dict:
+        """Pre-check tiers and result-memo hits/misses of this process so far."""
+        return {"precheck": _engine('precheck').precheck_stats(),
+                "memo": _engine('result_memo').memo_stats()}
@@ -1,11 +1,43 @@
+import csv
+import json
 import os
 import sys
+import threading
+import time
 import cv2
 import numpy as np
-from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
 from pathlib import Path
 from typing import Optional
 
+try:
+    from .artifacts import encode_params, flush_artifacts, get_artifact_writer, select_artifacts
+    from .baseline_store import Baseline, get_baseline_store
+    from .batch_kernels import KernelWorkspace, as_grays, batch_absdiff_masks, batch_ssim_masks
+    from .decode_cache import DecodeCache, get_decode_cache
+    from .feature_cache import get_feature_cache
+    from .output_paths import atomic_imwrite, atomic_write_text, comparison_output_dir, _robot_variable
+    from .precheck import PRECHECK_TIERS, precheck_pair, record_tier
+    from .result_memo import get_result_memo
+    from .result_sink import record_result
+    from .regions import draw_regions, mask_components, regions_from_components, tint_components
+    from .roi import build_roi_mask, neutralise_ignored, roi_bounds
+    from .stage_timings import record_comparison, timed
+except ImportError:
+    from artifacts import encode_params, flush_artifacts, get_artifact_writer, select_artifacts
+    from baseline_store import Baseline, get_baseline_store
+    from batch_kernels import KernelWorkspace, as_grays, batch_absdiff_masks, batch_ssim_masks
+    from decode_cache import DecodeCache, get_decode_cache
+    from feature_cache import get_feature_cache
+    from output_paths import atomic_imwrite, atomic_write_text, comparison_output_dir, _robot_variable
+    from precheck import PRECHECK_TIERS, precheck_pair, record_tier
+    from result_memo import get_result_memo
+    from result_sink import record_result
+    from regions import draw_regions, mask_components, regions_from_components, tint_components
+    from roi import build_roi_mask, neutralise_ignored, roi_bounds
+    from stage_timings import record_comparison, timed
+
 try:
     from skimage.metrics import structural_similarity as ssim_metric
     HAVE_SKIMAGE = True
@@ -18,46 +50,64 @@ class DiffResult:
     regions_count: int
     ssim_score: Optional[float]
     output_paths: dict
+    alignment_mode: str = "disabled"
+    timings: dict = field(default_factory=dict)  # stage name -> seconds
+    precheck: str = "full"  # pre-check tier that resolved the pair, see precheck.PRECHECK_TIERS
+    memory: dict = field(default_factory=dict)  # stage name -> peak traced allocation in bytes, when tracemalloc runs
+    roi: Optional[tuple] = None  # (x, y, w, h) of pathA the comparison was cropped to, None for the whole image
+    cached: bool = False  # returned from the result memo without comparing again
+    # One dict per region (x, y, width, height, changed_pixels), in the compared image's coordinates (see roi)
+    regions: list = field(default_factory=list)
 
+    @property
+    def passed(self) -> bool:
+        return self.regions_count == 0
 
-def load_image(path: str):
-    """Load image with fallbacks. Tries the given path as-is, then looks
-    relative to this module's repo root and the current working directory.
-    Returns the loaded image (BGR) or raises FileNotFoundError with details.
-    """
-    tried = []
 
-    # 1) If absolute path or exists as given, try it first
-    candidate = Path(path)
-    tried.append(str(candidate))
-    if candidate.exists():
-        img = cv2.imread(str(candidate), cv2.IMREAD_COLOR)
-        if img is not None:
-            return img
+@dataclass
+class BatchResult:
+    results: list  # one DiffResult per pair (None if the pair errored), manifest order
+    summary: dict = field(default_factory=dict)
 
-    # 2) Try path relative to this module's repository root (two levels up)
-    repo_root = Path(__file__).resolve().parents[1]
-    candidate = repo_root / path
-    tried.append(str(candidate))
-    if candidate.exists():
-        img = cv2.imread(str(candidate), cv2.IMREAD_COLOR)
-        if img is not None:
-            return img
 
-    # 3) Try path relative to current working directory
-    candidate = Path(os.getcwd()) / path
-    tried.append(str(candidate))
-    if candidate.exists():
-        img = cv2.imread(str(candidate), cv2.IMREAD_COLOR)
-        if img is not None:
-            return img
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.webp')
+
 
+def _candidate_paths(path: str):
+    """Yield the locations ``load_image`` probes for ``path``, in order."""
+    # 1) If absolute path or exists as given, try it first
+    yield Path(path)
+    # 2) Try path relative to this module's repository root (two levels up)
+    yield Path(__file__).resolve().parents[1] / path
+    # 3) Try path relative to current working directory
+    yield Path(os.getcwd()) / path
     # 4) Try resolving via sys.path entries (helpful if running from tests folder)
     for p in sys.path:
-        candidate = Path(p) / path
+        yield Path(p) / path
+
+
+def resolve_image_path(path: str) -> Optional[str]:
+    """Return the first existing location ``load_image`` would try for ``path``, or None."""
+    for candidate in _candidate_paths(path):
+        if candidate.is_file():
+            return str(candidate)
+    return None
+
+
+def load_image(path: str, decode_cache: Optional[DecodeCache] = None):
+    """Load image with fallbacks. Tries the given path as-is, then looks
+    relative to this module's repo root and the current working directory.
+    With a ``decode_cache`` the pixels come memory-mapped (read-only) from it
+    when the file was decoded before.
+    Returns the loaded image (BGR) or raises FileNotFoundError with details.
+    """
+    tried = []
+    imread = decode_cache.imread if decode_cache is not None else cv2.imread
+
+    for candidate in _candidate_paths(path):
         tried.append(str(candidate))
-        if candidate.exists():
-            img = cv2.imread(str(candidate), cv2.IMREAD_COLOR)
+        if candidate.is_file():
+            img = imread(str(candidate), cv2.IMREAD_COLOR)
             if img is not None:
                 return img
 
@@ -86,26 +136,47 @@ def ensure_same_size(imgA, imgB):
     return imgB
 
 
-def align_images(imgA, imgB, max_features = 5000, good_match_ratio=0.75):
-    """Align imgB to imgA using ORB feature matching and homography.
-    Always returns a tuple (aligned_image, homography_ok: bool).
-    """
-    grayA = cv2.cvtColor(imgA, cv2.COLOR_BGR2GRAY)
-    grayB = cv2.cvtColor(imgB, cv2.COLOR_BGR2GRAY)
+# 5x5 rect used by every mask clean-up; read-only, so one instance serves all calls
+MORPH_KERNEL = cv2.getStructuringElement(cv2.MORPH_RECT, (5, 5))
 
-    orb = cv2.ORB_create(nfeatures = max_features)
-    kpA, desA = orb.detectAndCompute(grayA, None)
-    kpB, desB = orb.detectAndCompute(grayB, None)
+# OpenCV algorithm objects are not safe to share across threads: each thread keeps its own
+_warm = threading.local()
 
-    if desA is None or desB is None or len(kpA) < 10 or len(kpB) < 10:
-        return ensure_same_size(imgA, imgB), False
+
+def _orb_detector(max_features):
+    detectors = _warm.__dict__.setdefault('orb', {})
+    if max_features not in detectors:
+        detectors[max_features] = cv2.ORB_create(nfeatures=max_features)
+    return detectors[max_features]
+
+
+def _hamming_matcher():
+    if not hasattr(_warm, 'matcher'):
+        _warm.matcher = cv2.BFMatcher(cv2.NORM_HAMMING, crossCheck=False)
+    return _warm.matcher
+
+
+def detect_features(gray, max_features=5000):
+    """Run ORB on a grayscale image. Returns (points Nx2 float32, descriptors) or (None, None)."""
+    kp, des = _orb_detector(int(max_features)).detectAndCompute(gray, None)
+    if des is None:
+        return None, None
+    return np.float32([k.pt for k in kp]).reshape(-1, 2), des
+
+
+ALIGN_MODES = ('homography', 'pyramid', 'translation')
+
+
+def _estimate_homography(ptsA, desA, ptsB, desB, good_match_ratio=0.75):
+    """Match ORB descriptors and return the homography mapping imgA points onto imgB, or None."""
+    if desA is None or desB is None or len(ptsA) < 10 or len(ptsB) < 10:
+        return None
 
     # ORB produces binary descriptors; use Hamming distance
-    matcher = cv2.BFMatcher(cv2.NORM_HAMMING, crossCheck=False)
     try:
-        knn_matches = matcher.knnMatch(desA, desB, 2)
+        knn_matches = _hamming_matcher().knnMatch(desA, desB, 2)
     except Exception:
-        return ensure_same_size(imgA, imgB), False
+        return None
 
     good = []
     for m_n in knn_matches:
@@ -116,65 +187,242 @@ def align_images(imgA, imgB, max_features = 5000, good_match_ratio=0.75):
             good.append(m)
 
     if len(good) < 10:
-        return ensure_same_size(imgA, imgB), False
+        return None
 
-    src_pts = np.float32([kpA[m.queryIdx].pt for m in good]).reshape(-1, 1, 2)
-    dst_pts = np.float32([kpB[m.trainIdx].pt for m in good]).reshape(-1, 1, 2)
+    src_pts = ptsA[[m.queryIdx for m in good]].reshape(-1, 1, 2)
+    dst_pts = ptsB[[m.trainIdx for m in good]].reshape(-1, 1, 2)
 
     H, mask = cv2.findHomography(src_pts, dst_pts, cv2.RANSAC, 5.0)
+    return H
+
+
+def _warp_to(imgB, H, shape):
+    # H maps imgA coordinates onto imgB, so imgB is sampled through it (inverse map)
+    return cv2.warpPerspective(imgB, H, (shape[1], shape[0]), flags=cv2.INTER_LINEAR | cv2.WARP_INVERSE_MAP)
+
+
+def align_images(imgA, imgB, max_features = 5000, good_match_ratio=0.75, pathA=None, feature_cache=None, timings=None):
+    """Align imgB to imgA using ORB feature matching and homography.
+    When ``pathA`` and a ``FeatureCache`` are given, imgA's features are read from
+    the cache instead of being re-detected.
+    Always returns a tuple (aligned_image, homography_ok: bool).
+    """
+    def _detect_baseline():
+        return detect_features(cv2.cvtColor(imgA, cv2.COLOR_BGR2GRAY), max_features)
+
+    with timed(timings, "align.detect"):
+        if feature_cache is not None and pathA:
+            ptsA, desA = feature_cache.get_or_compute(pathA, max_features, _detect_baseline)
+        else:
+            ptsA, desA = _detect_baseline()
+        ptsB, desB = detect_features(cv2.cvtColor(imgB, cv2.COLOR_BGR2GRAY), max_features)
+
+    with timed(timings, "align.match"):
+        H = _estimate_homography(ptsA, desA, ptsB, desB, good_match_ratio)
     if H is None:
         return ensure_same_size(imgA, imgB), False
 
-    alignedB = cv2.warpPerspective(imgB, H, (imgA.shape[1], imgA.shape[0]), flags=cv2.INTER_LINEAR)
+    with timed(timings, "align.warp"):
+        alignedB = _warp_to(imgB, H, imgA.shape)
     return alignedB, True
 
 
-def compute_absdiff_mask(grayA, grayB):
-    blurA = cv2.GaussianBlur(grayA, (5, 5), 0)
-    blurB = cv2.GaussianBlur(grayB, (5, 5), 0)
+def estimate_translation(grayA, grayB):
+    """Phase-correlate two same-size grayscale images.
+    Returns (dx, dy, response) where grayB(x) ~= grayA(x - (dx, dy)); response is in [0, 1].
+    """
+    (dx, dy), response = cv2.phaseCorrelate(np.float32(grayA), np.float32(grayB))
+    return dx, dy, response
+
+
+def align_translation(imgA, imgB, min_response=0.3, timings=None):
+    """Fast path for pages that only scrolled: undo a pure (dx, dy) shift found by phase correlation.
+    Returns (aligned_image, ok); ok is False when the images differ in size or the correlation peak is weak.
+    """
+    if imgA.shape[:2] != imgB.shape[:2]:
+        return ensure_same_size(imgA, imgB), False
+
+    with timed(timings, "align.phase_correlate"):
+        dx, dy, response = estimate_translation(cv2.cvtColor(imgA, cv2.COLOR_BGR2GRAY),
+                                                cv2.cvtColor(imgB, cv2.COLOR_BGR2GRAY))
+    if response < min_response:
+        return imgB, False
+
+    with timed(timings, "align.warp"):
+        M = np.float32([[1, 0, -dx], [0, 1, -dy]])
+        alignedB = cv2.warpAffine(imgB, M, (imgA.shape[1], imgA.shape[0]), flags=cv2.INTER_LINEAR)
+    return alignedB, True
+
+
+def align_pyramid(imgA, imgB, max_features=5000, good_match_ratio=0.75, max_dim=1024,
+                  pathA=None, feature_cache=None, timings=None):
+    """Coarse-to-fine alignment for large screenshots.
+
+    The homography is estimated with ORB on copies downscaled so the longer side
+    is at most ``max_dim``, lifted back to full resolution, and then refined from
+    full-resolution patch correspondences (see ``_refine_homography``).
+    Returns (aligned_image, ok).
+    """
+    scale = min(1.0, max_dim / float(max(imgA.shape[:2])))
+    # Feature density per pixel stays the same at the coarse level, which keeps knn matching cheap
+    coarse_features = max(500, int(max_features * scale * scale))
+
+    def _downscaled_gray(img):
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        if scale == 1.0:
+            return gray
+        return cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+    def _detect_baseline():
+        return detect_features(_downscaled_gray(imgA), coarse_features)
+
+    with timed(timings, "align.downscale_detect"):
+        if feature_cache is not None and pathA:
+            ptsA, desA = feature_cache.get_or_compute(pathA, coarse_features, _detect_baseline,
+                                                      variant=f"pyr{scale:.4f}")
+        else:
+            ptsA, desA = _detect_baseline()
+        ptsB, desB = detect_features(_downscaled_gray(imgB), coarse_features)
+
+    with timed(timings, "align.match"):
+        H_small = _estimate_homography(ptsA, desA, ptsB, desB, good_match_ratio)
+    if H_small is None:
+        return ensure_same_size(imgA, imgB), False
+
+    # Lift to full resolution: points scale by `scale` in both images
+    S = np.diag([scale, scale, 1.0])
+    H = np.linalg.inv(S) @ H_small @ S
+
+    with timed(timings, "align.warp"):
+        alignedB = _warp_to(imgB, H, imgA.shape)
+
+    with timed(timings, "align.refine"):
+        H_refined = _refine_homography(cv2.cvtColor(imgA, cv2.COLOR_BGR2GRAY),
+                                       cv2.cvtColor(alignedB, cv2.COLOR_BGR2GRAY), H)
+        if H_refined is not None:
+            H = H_refined
+            alignedB = _warp_to(imgB, H, imgA.shape)
+    return alignedB, True
 
-    diff = cv2.absdiff(blurA, blurB)
-    _,thresh = cv2.threshold(diff, 0, 255, cv2.THRESH_BINARY+cv2.THRESH_OTSU)
 
-    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (5, 5))
-    clean = cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, kernel, iterations=2)
-    clean = cv2.dilate(clean, kernel, iterations=1)
-    return diff, clean
+def _refine_homography(grayA, grayWarped, H, patch=256, grid=6, min_response=0.2):
+    """Re-fit H from full-resolution patch correspondences.
 
-def compute_ssim_mask(grayA, grayB):
+    ``grayWarped`` is imgB already warped through the coarse H. Each patch on a
+    grid over imgA is phase-correlated against the same patch of the warped image;
+    the residual shift turns the patch centre into a correspondence in imgB's
+    coordinates. Returns the refined homography, or None if too few patches agree.
+    """
+    h, w = grayA.shape[:2]
+    patch = min(patch, h, w)
+    half = patch // 2
+    window = cv2.createHanningWindow((patch, patch), cv2.CV_32F)
+
+    src, dst = [], []
+    for cy in np.linspace(half, h - half, num=min(grid, max(1, h // patch))).astype(int):
+        for cx in np.linspace(half, w - half, num=min(grid, max(1, w // patch))).astype(int):
+            pa = np.float32(grayA[cy - half:cy - half + patch, cx - half:cx - half + patch])
+            pb = np.float32(grayWarped[cy - half:cy - half + patch, cx - half:cx - half + patch])
+            (dx, dy), response = cv2.phaseCorrelate(pa, pb, window)
+            if response < min_response or abs(dx) > patch / 4 or abs(dy) > patch / 4:
+                continue
+            src.append((cx, cy))
+            dst.append((cx + dx, cy + dy))
+
+    if len(src) < 8:
+        return None
+    # The shifted centres live in warped coordinates; map them through the coarse H into imgB
+    dst_b = cv2.perspectiveTransform(np.float64(dst).reshape(-1, 1, 2), H)
+    H_refined, _ = cv2.findHomography(np.float64(src).reshape(-1, 1, 2), dst_b, cv2.RANSAC, 2.0)
+    return H_refined
+
+
+def align_by_mode(imgA, imgB, mode='homography', max_features=5000, pathA=None, feature_cache=None, timings=None):
+    """Align imgB to imgA with the given mode ('homography', 'pyramid' or 'translation').
+
+    'translation' falls back to 'pyramid' when the phase-correlation peak is weak.
+    Returns (aligned_image, mode_used) where mode_used is the mode that succeeded,
+    or 'resize' if none did and imgB was only resized.
+    """
+    mode = mode.lower()
+    if mode not in ALIGN_MODES:
+        raise ValueError(f"Unknown alignment mode '{mode}'. Expected one of: {', '.join(ALIGN_MODES)}")
+
+    if mode == 'translation':
+        alignedB, ok = align_translation(imgA, imgB, timings=timings)
+        if ok:
+            return alignedB, 'translation'
+        mode = 'pyramid'
+
+    if mode == 'pyramid':
+        alignedB, ok = align_pyramid(imgA, imgB, max_features=max_features, pathA=pathA,
+                                     feature_cache=feature_cache, timings=timings)
+    else:
+        alignedB, ok = align_images(imgA, imgB, max_features=max_features, pathA=pathA,
+                                    feature_cache=feature_cache, timings=timings)
+    return alignedB, (mode if ok else 'resize')
+
+
+def _clean_mask(diff_uint8, timings=None, memory=None):
+    with timed(timings, "morphology", memory):
+        _,thresh = cv2.threshold(diff_uint8, 0, 255, cv2.THRESH_BINARY+cv2.THRESH_OTSU)
+        clean = cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, MORPH_KERNEL, iterations=2)
+        clean = cv2.dilate(clean, MORPH_KERNEL, iterations=1)
+    return clean
+
+def compute_absdiff_mask(grayA, grayB, timings=None, memory=None):
+    with timed(timings, "absdiff", memory):
+        blurA = cv2.GaussianBlur(grayA, (5, 5), 0)
+        blurB = cv2.GaussianBlur(grayB, (5, 5), 0)
+        diff = cv2.absdiff(blurA, blurB)
+    return diff, _clean_mask(diff, timings, memory)
+
+def compute_ssim_mask(grayA, grayB, timings=None, memory=None):
     if not HAVE_SKIMAGE:
         raise RuntimeError("SSIM method selected but is not installed.")
-    score, diff = ssim_metric(grayA, grayB, full=True)
-    diff_inv = (1.0-diff)
-    diff_uint8 = np.uint8(np.clip(diff_inv*255, 0, 255))
+    with timed(timings, "ssim", memory):
+        score, diff = ssim_metric(grayA, grayB, full=True)
+        diff_inv = (1.0-diff)
+        diff_uint8 = np.uint8(np.clip(diff_inv*255, 0, 255))
+    return score, diff_uint8, _clean_mask(diff_uint8, timings, memory)
+
+def compute_masks_batch(imagesA, imagesB, method='absdiff', workspace=None):
+    """Batched compute_absdiff_mask / compute_ssim_mask over many same-size crops.
+
+    Stacks every pair into one array and runs the blur, diff, Otsu and morphology
+    passes once for the whole batch (see ``batch_kernels``) instead of once per
+    pair, which suits many small element screenshots. Inputs may be BGR or
+    grayscale. Returns one (ssim_score or None, diff_uint8, mask) tuple per pair.
+
+    Pass a ``KernelWorkspace`` to reuse its buffers across calls; the returned
+    arrays are then views into it and only valid until its next use.
+    """
+    graysA, graysB = as_grays(imagesA), as_grays(imagesB)
+    workspace = workspace or KernelWorkspace()
+
+    if method.lower() == 'ssim':
+        scores, diffs, masks = batch_ssim_masks(graysA, graysB, workspace)
+        scores = [float(s) for s in scores]
+    else:
+        diffs, masks = batch_absdiff_masks(graysA, graysB, workspace)
+        scores = [None] * len(graysA)
+    return list(zip(scores, diffs, masks))
 
-    _,thresh = cv2.threshold(diff_uint8, 0, 255, cv2.THRESH_BINARY+cv2.THRESH_OTSU)
-    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (5, 5))
-    clean = cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, kernel, iterations=2)
-    clean = cv2.dilate(clean, kernel, iterations=1)
-    return score, diff_uint8, clean
+def overlay_mask(image, mask, color=(0, 0, 255), alpha=0.4, components=None):
+    """Copy of image with the changed pixels tinted. Only the boxes of the mask's components are blended."""
+    if components is None:
+        components = mask_components(mask)
+    return tint_components(image.copy(), mask, components, color, alpha)
 
 
-def overlay_mask(image, mask, color=(0, 0, 255), alpha=0.4):
-    overlay = image.copy()
-    color_layer = np.zeros_like(image)
-    color_layer[mask==255] = color
-    cv2.addWeighted(color_layer, alpha, overlay, 1 - alpha, 0, overlay)
-    return overlay
+def find_regions(mask, min_area=500):
+    """Regions of mask with at least min_area changed pixels, see ``regions.regions_from_components``."""
+    return regions_from_components(mask_components(mask), min_area)
 
 
 def draw_bboxes(image, mask, min_area=500, color=(0, 255, 0), thickness=2  ):
-    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-    boxed = image.copy()
-    regions = 0
-    for c in contours:
-        if cv2.contourArea(c) < min_area:
-            continue
-        x, y, w, h = cv2.boundingRect(c)
-        cv2.rectangle(boxed, (x, y), (x + w, y + h), color, thickness)
-        regions += 1
-    
-    return boxed, regions
+    regions = find_regions(mask, min_area)
+    return draw_regions(image.copy(), regions, color, thickness), len(regions)
 
 
 def apply_heatmap(diff_unit8, base_image, alpha=0.5):
@@ -183,78 +431,537 @@ def apply_heatmap(diff_unit8, base_image, alpha=0.5):
     return heatmap_overlay
 
 
-def save_image(path: str, image):
-    ok = cv2.imwrite(path, image)
+# Extra rows each band reads above and below the rows it owns. Blur needs 2 and SSIM's 7x7 window 3;
+# the 5x5 close (2 iterations) + dilate after thresholding reach 10 rows, so 16 keeps every owned row exact.
+TILE_HALO = 16
+
+
+def _bands(height, tile_height, halo=TILE_HALO):
+    """Yield (lo, y0, y1, hi): the band owns rows [y0, y1) and reads rows [lo, hi)."""
+    for y0 in range(0, height, tile_height):
+        y1 = min(height, y0 + tile_height)
+        yield max(0, y0 - halo), y0, y1, min(height, y1 + halo)
+
+
+def compute_masks_tiled(imgA, imgB, method='absdiff', tile_height=512):
+    """Band-by-band equivalent of compute_absdiff_mask / compute_ssim_mask on BGR inputs.
+
+    Only the single-channel diff and mask are kept at full size; grayscale, blur,
+    SSIM and morphology buffers exist for one band (plus halo) at a time. Otsu
+    still sees the whole diff histogram, so the threshold matches the full-frame path.
+    Returns (ssim_score or None, diff_uint8, mask).
+    """
+    use_ssim = method.lower() == 'ssim'
+    if use_ssim and not HAVE_SKIMAGE:
+        raise RuntimeError("SSIM method selected but is not installed.")
+
+    height, width = imgA.shape[:2]
+    diff = np.empty((height, width), np.uint8)
+    ssim_sum, ssim_count = 0.0, 0
+    pad = 3  # (win_size - 1) // 2 for skimage's default 7x7 window, excluded from the mean like skimage does
+
+    for lo, y0, y1, hi in _bands(height, tile_height):
+        grayA = cv2.cvtColor(imgA[lo:hi], cv2.COLOR_BGR2GRAY)
+        grayB = cv2.cvtColor(imgB[lo:hi], cv2.COLOR_BGR2GRAY)
+        if use_ssim:
+            _, band = ssim_metric(grayA, grayB, full=True)
+            band = band[y0 - lo:y1 - lo]
+            rows = band[max(0, pad - y0):max(0, min(y1, height - pad) - y0), pad:width - pad]
+            ssim_sum += float(rows.sum(dtype=np.float64))
+            ssim_count += rows.size
+            diff[y0:y1] = np.uint8(np.clip((1.0 - band) * 255, 0, 255))
+        else:
+            band = cv2.absdiff(cv2.GaussianBlur(grayA, (5, 5), 0), cv2.GaussianBlur(grayB, (5, 5), 0))
+            diff[y0:y1] = band[y0 - lo:y1 - lo]
+
+    # Otsu over the whole diff; the full-size result is only used for its threshold value and then overwritten
+    mask = np.empty_like(diff)
+    otsu, _ = cv2.threshold(diff, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU, dst=mask)
+
+    for lo, y0, y1, hi in _bands(height, tile_height):
+        _, band = cv2.threshold(diff[lo:hi], otsu, 255, cv2.THRESH_BINARY)
+        band = cv2.morphologyEx(band, cv2.MORPH_CLOSE, MORPH_KERNEL, iterations=2)
+        band = cv2.dilate(band, MORPH_KERNEL, iterations=1)
+        mask[y0:y1] = band[y0 - lo:y1 - lo]
+
+    ssim_score = (ssim_sum / ssim_count) if use_ssim else None
+    return ssim_score, diff, mask
+
+
+def _save_artifacts_tiled(imgA, mask, diff_uint8, components, regions, paths, tile_height, params):
+    """Write the requested overlay/bboxes/heatmap through one reused full-frame canvas.
+    Writes are synchronous: the canvas is overwritten between artifacts.
+    """
+    if "overlay" in paths or "bboxes" in paths:
+        canvas = np.empty_like(imgA)
+        np.copyto(canvas, imgA)
+        tint_components(canvas, mask, components, color=(0, 0, 255), alpha=0.4)
+        if "overlay" in paths:
+            save_image(paths["overlay"], canvas, params)
+        if "bboxes" in paths:
+            # Components were labelled on the full single-channel mask, so regions spanning band seams stay whole
+            draw_regions(canvas, regions)
+            save_image(paths["bboxes"], canvas, params)
+
+    if "heatmap" in paths:
+        canvas = np.empty_like(imgA)
+        for _, y0, y1, _ in _bands(imgA.shape[0], tile_height, halo=0):
+            canvas[y0:y1] = apply_heatmap(diff_uint8[y0:y1], imgA[y0:y1], alpha=0.6)
+        save_image(paths["heatmap"], canvas, params)
+
+
+def save_image(path: str, image, params=None):
+    ok = atomic_imwrite(path, image, params)
     if not ok:
         raise IOError(f"Failed to save image to: {path}")
     
 
-def compare_images(pathA: str, pathB: str, output_dir: str = None, method: str = 'absdiff', align: bool = True, min_area = 100) -> DiffResult:
-    # Ensure we have an output directory
-    if not output_dir:
-        output_dir = os.path.join(str(Path(__file__).resolve().parents[1]), 'output')
-
-    os.makedirs(output_dir, exist_ok=True)
-    imgA = load_image(pathA)
-    imgB = load_image(pathB)
+def compare_images(pathA: str, pathB: str, output_dir: str = None, method: str = 'absdiff', align: bool = True, min_area = 100,
+                   cache_features: bool = True, align_mode: str = 'homography',
+                   tile_height: Optional[int] = None, precheck: bool = True,
+                   artifacts: str = 'always', artifact_set=None, image_format: str = 'png',
+                   png_compression: Optional[int] = None, background_writes: bool = True,
+                   baseline: Optional[Baseline] = None, decode_cache: bool = True,
+                   include=None, ignore=None, roi_mask=None, memo: bool = True) -> DiffResult:
+    """Diff pathB against the baseline pathA and write the comparison artifacts to output_dir.
+    Without an output_dir, artifacts go to a fresh folder from ``comparison_output_dir``.
+
+    ``tile_height`` switches to the banded pipeline (see ``compute_masks_tiled``), which
+    bounds memory on very tall screenshots and returns the same result.
+    With ``precheck`` on, pairs that ``precheck_pair`` proves identical return a passing
+    result straight away, without alignment or any artifact.
+
+    ``artifacts`` ('always', 'on-failure', 'never') and ``artifact_set`` (subset of
+    artifacts.ARTIFACT_NAMES) decide which artifacts are rendered; skipped ones are
+    never computed. Images are encoded as ``image_format`` and, with
+    ``background_writes``, written by a background thread; call ``flush_artifacts``
+    before reading them back.
+
+    ``baseline`` is the stored form of pathA (see ``compare_to_baseline``): its
+    memory-mapped pixels, grayscale and ORB features are used instead of decoding
+    and detecting them again. Otherwise, with ``decode_cache``, pathA's decoded
+    pixels are kept in (and later mapped from) the shared ``DecodeCache``; the
+    actual image is always decoded, as it is new on nearly every run.
+
+    ``include`` / ``ignore`` take rectangles (see ``roi.parse_regions``, e.g. from
+    ``resolve_selector_regions``) and ``roi_mask`` a mask image whose black pixels
+    are ignored. Both images are cropped to the bounding box of what is left
+    before alignment, and ignored pixels inside it never count as changed, so
+    work shrinks with the excluded area. The crop is returned as ``roi`` and the
+    artifacts cover only it; ``changed_percent`` is relative to the compared pixels.
+
+    ``regions`` lists every changed area with at least ``min_area`` changed pixels
+    (8-connected components of the diff mask) as x/y/width/height/changed_pixels,
+    so callers can assert on where the image changed without opening an artifact.
+
+    With ``memo``, a pair whose two files and settings match an earlier full
+    comparison returns that stored result (``cached`` set, same artifact paths)
+    as long as its artifacts are unchanged on disk; see ``result_memo.memo_stats``.
+
+    The result's ``timings`` hold seconds per stage (load, align, ssim/absdiff,
+    morphology, regions, artifacts). While tracemalloc is tracing, ``memory``
+    holds each stage's peak allocation in bytes.
+    """
+    timings, memory = {}, {}
+    cache = get_decode_cache() if decode_cache else None
+
+    memo_key = None
+    if memo:
+        with timed(timings, "memo", memory):
+            resolvedA, resolvedB = resolve_image_path(pathA), resolve_image_path(pathB)
+            if resolvedA and resolvedB:
+                memo_store = get_result_memo()
+                memo_key = memo_store.key("ImageComparision", resolvedA, resolvedB, {
+                    "output_dir": output_dir, "method": method.lower(), "align": bool(align),
+                    "min_area": min_area, "align_mode": align_mode, "tile_height": tile_height,
+                    "precheck": precheck, "artifacts": artifacts,
+                    "artifact_set": artifact_set, "image_format": image_format, "png_compression": png_compression,
+                    "include": include, "ignore": ignore, "roi_mask": memo_store.file_params(roi_mask)})
+                stored = memo_store.get(memo_key)
+        if memo_key and stored is not None:
+            record_comparison("ImageComparision", timings, memory, pair=(pathA, pathB))
+            record_result("ImageComparision", pathA, pathB, stored["regions_count"] == 0, timings,
+                          changed_percent=stored["changed_percent"], regions=stored["regions_count"],
+                          ssim=stored["ssim_score"], precheck=stored["precheck"], method=method, memo=True)
+            roi = stored.pop("roi")
+            return DiffResult(**{**stored, "timings": timings, "memory": memory, "cached": True,
+                                 "roi": tuple(roi) if roi else None})
+
+    decoded = {}
+    if precheck:
+        with timed(timings, "precheck", memory):
+            resolvedA, resolvedB = resolve_image_path(pathA), resolve_image_path(pathB)
+            if baseline is not None:
+                imreadA = lambda path, flags: baseline.image
+            else:
+                imreadA = cache.imread if cache is not None else None
+            tier = precheck_pair(resolvedA, resolvedB, imreadA, decoded) if resolvedA and resolvedB else None
+        if tier:
+            record_tier(tier)
+            record_comparison("ImageComparision", timings, memory, pair=(pathA, pathB))
+            record_result("ImageComparision", pathA, pathB, True, timings, changed_percent=0.0, regions=0,
+                          precheck=tier, method=method)
+            return DiffResult(
+                changed_percent=0.0,
+                regions_count=0,
+                ssim_score=1.0 if method.lower() == 'ssim' else None,
+                output_paths={},
+                alignment_mode="skipped",
+                timings=timings,
+                precheck=tier,
+                memory=memory
+            )
+        record_tier('full')
+
+    with timed(timings, "load", memory):
+        imgA, imgB = decoded.get('A'), decoded.get('B')
+        if imgA is None:
+            imgA = baseline.image if baseline is not None else load_image(pathA, cache)
+        if imgB is None:
+            imgB = load_image(pathB)
+    grayA = baseline.gray if baseline is not None else None
+
+    roi = build_roi_mask(imgA.shape, include, ignore, roi_mask)
+    bounds = roi_bounds(roi)
+    if roi is not None and bounds is None:
+        raise ValueError("The include/ignore regions leave no pixels to compare")
+    cropped = bounds is not None and bounds != (0, 0, imgA.shape[1], imgA.shape[0])
+    if cropped:
+        x, y, w, h = bounds
+        imgB = ensure_same_size(imgA, imgB)
+        imgA, imgB, roi = imgA[y:y + h, x:x + w], imgB[y:y + h, x:x + w], roi[y:y + h, x:x + w]
+        if grayA is not None:
+            grayA = grayA[y:y + h, x:x + w]
+    has_ignored = roi is not None and cv2.countNonZero(roi) < roi.size
 
     if align:
-        alignedB, homography_ok = align_images(imgA, imgB)
-        alignment_status = "homography" if homography_ok else "resize"
+        if cropped:
+            feature_cache = None  # cached features describe the whole baseline, not this crop
+        elif baseline is not None:
+            feature_cache = baseline if cache_features else None
+        else:
+            feature_cache = get_feature_cache() if cache_features else None
+        with timed(timings, "align", memory):
+            alignedB, alignment_status = align_by_mode(imgA, imgB, mode=align_mode, pathA=resolve_image_path(pathA),
+                                                       feature_cache=feature_cache, timings=timings)
     else:
         alignedB = ensure_same_size(imgA, imgB)
         alignment_status = "disabled"
     
-    # keep filename consistent with paths below
-    save_image(os.path.join(output_dir, 'aligned_B.png'), alignedB)
-
-    grayA = cv2.cvtColor(imgA, cv2.COLOR_BGR2GRAY)
-    grayB = cv2.cvtColor(alignedB, cv2.COLOR_BGR2GRAY)
-
-    ssim_score = None
-    if method.lower() == 'ssim':
-        ssim_score, diff_uint8, mask = compute_ssim_mask(grayA, grayB)
-        ssim_score = float(ssim_score)
+    del imgB
+
+    if tile_height and int(tile_height) < imgA.shape[0]:
+        tile_height = max(64, int(tile_height))
+        with timed(timings, "tiled_diff", memory):
+            if has_ignored:
+                alignedB = neutralise_ignored(imgA, alignedB, roi)
+            ssim_score, diff_uint8, mask = compute_masks_tiled(imgA, alignedB, method, tile_height)
     else:
-        diff_uint8, mask = compute_absdiff_mask(grayA, grayB)
+        tile_height = None
+        if grayA is None:
+            grayA = cv2.cvtColor(imgA, cv2.COLOR_BGR2GRAY)
+        grayB = cv2.cvtColor(alignedB, cv2.COLOR_BGR2GRAY)
+        if has_ignored:
+            grayB = neutralise_ignored(grayA, grayB, roi)
+
+        ssim_score = None
+        if method.lower() == 'ssim':
+            ssim_score, diff_uint8, mask = compute_ssim_mask(grayA, grayB, timings, memory)
+        else:
+            diff_uint8, mask = compute_absdiff_mask(grayA, grayB, timings, memory)
+        del grayA, grayB
+    if ssim_score is not None:
+        ssim_score = float(ssim_score)
 
-    changed_pixels = int(np.count_nonzero(mask))
-    total_pixels = mask.size
+    if has_ignored:
+        cv2.bitwise_and(mask, roi, dst=mask)
+
+    # One labelling pass gives the region boxes and the changed pixel count
+    with timed(timings, "regions", memory):
+        components = mask_components(mask)
+        region_list = regions_from_components(components, min_area)
+    regions = len(region_list)
+    changed_pixels = int(components[:, cv2.CC_STAT_AREA].sum())
+    total_pixels = cv2.countNonZero(roi) if has_ignored else mask.size
     changed_percent = (changed_pixels / total_pixels) * 100.0
 
-    overlay = overlay_mask(imgA, mask, color=(0, 0, 255), alpha=0.4)
-    bboxes, regions = draw_bboxes(overlay, mask, min_area=min_area, color=(0, 255, 0), thickness=2)
-    heatmap = apply_heatmap(diff_uint8, imgA, alpha=0.6)
-
-    paths = {
-        "alignedB": os.path.join(output_dir, 'aligned_B.png'),
-        "diff_mask": os.path.join(output_dir, 'diff_mask.png'),
-        "overlay": os.path.join(output_dir, 'overlay.png'),
-        "bboxes": os.path.join(output_dir, 'bboxes.png'),
-        "heatmap": os.path.join(output_dir, 'heatmap.png'),
-        "report": os.path.join(output_dir, 'report.txt'),
+    wanted = select_artifacts(artifacts, artifact_set, failed=regions > 0)
+    ext, params = encode_params(image_format, png_compression)
+    filenames = {
+        "alignedB": 'aligned_B' + ext,
+        "diff_mask": 'diff_mask' + ext,
+        "overlay": 'overlay' + ext,
+        "bboxes": 'bboxes' + ext,
+        "heatmap": 'heatmap' + ext,
+        "report": 'report.txt',
     }
-
-    save_image(paths["diff_mask"], mask)
-    save_image(paths["overlay"], overlay)
-    save_image(paths["bboxes"], bboxes)
-    save_image(paths["heatmap"], heatmap)
-
-    with open(paths["report"], 'w', encoding="utf-8") as f:
-        f.write("Image Comparison Report\n")
-        f.write("=======================\n\n")
-        f.write(f"Image A: {pathA}\n")
-        f.write(f"Image B: {pathB}\n")
-        f.write(f"Alignment method: {alignment_status}\n")
-        f.write(f"Comparison method: {method}\n")
-        f.write(f"Changed pixels: {changed_pixels} / {total_pixels} ({changed_percent:.4f}%)\n")
-        f.write(f"Regions detected: {regions}\n")
-        if ssim_score is not None:
-            f.write(f"SSIM score: {ssim_score:.4f} (1.0 = identical)\n")
-
-    return DiffResult(
+    if wanted:
+        # Default to a per-test, per-worker folder so parallel pabot workers never share filenames
+        output_dir = output_dir or comparison_output_dir()
+        os.makedirs(output_dir, exist_ok=True)
+    paths = {name: os.path.join(output_dir, filenames[name]) for name in wanted}
+
+    def write(name, image):
+        if background_writes:
+            get_artifact_writer().submit(paths[name], image, params)
+        else:
+            save_image(paths[name], image, params)
+
+    # With background_writes this covers rendering and queueing; encoding overlaps later work
+    with timed(timings, "artifacts", memory):
+        if "alignedB" in paths:
+            write("alignedB", alignedB)
+        del alignedB
+        if "diff_mask" in paths:
+            write("diff_mask", mask)
+
+        if tile_height:
+            _save_artifacts_tiled(imgA, mask, diff_uint8, components, region_list, paths, tile_height, params)
+        else:
+            if "overlay" in paths or "bboxes" in paths:
+                overlay = overlay_mask(imgA, mask, color=(0, 0, 255), alpha=0.4, components=components)
+                if "overlay" in paths:
+                    write("overlay", overlay)
+                if "bboxes" in paths:
+                    write("bboxes", draw_regions(overlay.copy(), region_list))
+            if "heatmap" in paths:
+                write("heatmap", apply_heatmap(diff_uint8, imgA, alpha=0.6))
+
+        if "report" in paths:
+            report = [
+                "Image Comparison Report",
+                "=======================",
+                "",
+                f"Image A: {pathA}",
+                f"Image B: {pathB}",
+                f"Alignment method: {alignment_status}",
+                f"Comparison method: {method}",
+                f"Compared area (x, y, w, h): {bounds if cropped else 'full image'}",
+                f"Changed pixels: {changed_pixels} / {total_pixels} ({changed_percent:.4f}%)",
+                f"Regions detected: {regions}",
+            ]
+            if ssim_score is not None:
+                report.append(f"SSIM score: {ssim_score:.4f} (1.0 = identical)")
+            atomic_write_text(paths["report"], "\n".join(report) + "\n")
+
+    record_comparison("ImageComparision", timings, memory, pair=(pathA, pathB))
+    record_result("ImageComparision", pathA, pathB, regions == 0, timings, changed_percent=changed_percent,
+                  regions=regions, ssim=ssim_score, precheck='full', method=method, alignment=alignment_status,
+                  roi=bounds if cropped else None, output_dir=output_dir if paths else None)
+    result = DiffResult(
         changed_percent=changed_percent,
         regions_count=regions,
         ssim_score=ssim_score,
-        output_paths=paths
+        output_paths=paths,
+        alignment_mode=alignment_status,
+        timings=timings,
+        memory=memory,
+        roi=bounds if cropped else None,
+        regions=region_list
     )
+    if memo_key:
+        stored = {k: v for k, v in asdict(result).items() if k not in ("timings", "memory", "cached")}
+        def remember():
+            memo_store.put(memo_key, stored, paths.values())
+
+        # Store once the artifacts are on disk, so the entry can record their mtime and size
+        if background_writes and paths:
+            get_artifact_writer().when_written(remember)
+        else:
+            remember()
+    return result
+
+
+def _baseline_identity(test_id=None, browser=None, viewport=None):
+    """Fill in the baseline key from Robot variables: ${SUITE NAME}.${TEST NAME}, ${BROWSER} and
+    ${VIEWPORT_WIDTH}x${VIEWPORT_HEIGHT} (variables.robot defaults outside Robot)."""
+    if not test_id:
+        suite, test = _robot_variable('${SUITE NAME}'), _robot_variable('${TEST NAME}')
+        if not test:
+            raise ValueError("test_id is required outside a Robot test")
+        test_id = f"{suite}.{test}"
+    browser = browser or _robot_variable('${BROWSER}') or 'chromium'
+    viewport = viewport or (f"{_robot_variable('${VIEWPORT_WIDTH}') or 1920}x"
+                            f"{_robot_variable('${VIEWPORT_HEIGHT}') or 1080}")
+    return str(test_id), str(browser), str(viewport)
+
+
+def approve_baseline(image_path: str, test_id: str = None, browser: str = None, viewport: str = None,
+                     store_dir: str = None, max_features: int = 5000) -> str:
+    """Store image_path as the approved baseline for (test, browser, viewport) and return its digest.
+
+    The image is decoded once here, along with its grayscale pyramid, perceptual
+    hash and the ORB features ``align_images`` uses, so later comparisons skip all of it.
+    """
+    baseline = get_baseline_store(store_dir).approve(*_baseline_identity(test_id, browser, viewport), image_path)
+    baseline.get_or_compute(baseline.path, int(max_features), lambda: detect_features(baseline.gray, int(max_features)))
+    return baseline.digest
+
+
+def compare_to_baseline(pathB: str, test_id: str = None, browser: str = None, viewport: str = None,
+                        store_dir: str = None, **options) -> DiffResult:
+    """Compare pathB against the approved baseline for (test, browser, viewport).
+    Takes the same ``options`` as ``compare_images``.
+    """
+    baseline = get_baseline_store(store_dir).get(*_baseline_identity(test_id, browser, viewport))
+    return compare_images(baseline.path, pathB, baseline=baseline, **options)
+
+
+def resolve_selector_regions(*selectors, relative_to: str = None, full_page: bool = False) -> list:
+    """Bounding boxes of every element matching ``selectors`` on the current page, as (x, y, w, h)
+    screenshot pixels for ``include`` / ``ignore``.
+
+    Call it right after taking the screenshot, so the boxes describe what was captured.
+    Boxes are relative to the viewport, to the page with ``full_page``, or to the
+    element ``relative_to`` when the screenshot was taken of that element. Hidden
+    elements are skipped.
+    """
+    from robot.libraries.BuiltIn import BuiltIn
+    run = BuiltIn().run_keyword
+
+    scroll_x, scroll_y, scale = run('Evaluate JavaScript', None,
+                                    '() => [window.scrollX, window.scrollY, window.devicePixelRatio]')
+    if relative_to:
+        origin = run('Get BoundingBox', relative_to)
+        origin_x, origin_y = origin["x"], origin["y"]
+    elif full_page:
+        origin_x, origin_y = -scroll_x, -scroll_y
+    else:
+        origin_x, origin_y = 0, 0
+
+    regions = []
+    for selector in selectors:
+        for element in run('Get Elements', selector):
+            box = run('Get BoundingBox', element)
+            if box["width"] <= 0 or box["height"] <= 0:
+                continue
+            regions.append((int(round((box["x"] - origin_x) * scale)), int(round((box["y"] - origin_y) * scale)),
+                            int(round(box["width"] * scale)), int(round(box["height"] * scale))))
+    return regions
+
+
+def load_manifest(manifest):
+    """Normalise a batch manifest into a list of (baseline, actual) pairs.
+
+    Accepts a list of pairs, a JSON file holding such a list (or a list of
+    {"baseline": ..., "actual": ...} objects) or a two-column CSV file.
+    """
+    if isinstance(manifest, (str, Path)):
+        manifest_path = Path(manifest)
+        if manifest_path.suffix.lower() == '.json':
+            with open(manifest_path, encoding="utf-8") as f:
+                entries = json.load(f)
+        else:
+            with open(manifest_path, newline='', encoding="utf-8") as f:
+                entries = [row for row in csv.reader(f) if row and not row[0].startswith('#')]
+    else:
+        entries = manifest
+
+    pairs = []
+    for entry in entries:
+        if isinstance(entry, dict):
+            pairs.append((str(entry["baseline"]), str(entry["actual"])))
+        else:
+            baseline, actual = entry[0], entry[1]
+            pairs.append((str(baseline).strip(), str(actual).strip()))
+    return pairs
+
+
+def match_directories(baseline_dir: str, actual_dir: str):
+    """Pair up images in two directories by filename.
+    Returns (pairs, unmatched) where unmatched lists names found on only one side.
+    """
+    def _images(folder):
+        return {p.name: str(p) for p in sorted(Path(folder).iterdir())
+                if p.is_file() and p.suffix.lower() in IMAGE_EXTENSIONS}
+
+    baselines = _images(baseline_dir)
+    actuals = _images(actual_dir)
+    pairs = [(baselines[name], actuals[name]) for name in baselines if name in actuals]
+    unmatched = sorted(set(baselines) ^ set(actuals))
+    return pairs, unmatched
+
+
+def _init_batch_worker():
+    # Each worker already owns a core; stop OpenCV from spawning its own thread pool on top.
+    cv2.setNumThreads(1)
+
+
+def _compare_pair(pathA, pathB, output_dir, method, align, min_area, align_mode, artifacts):
+    result = compare_images(pathA, pathB, output_dir=output_dir, method=method, align=align, min_area=min_area,
+                            align_mode=align_mode, artifacts=artifacts)
+    # Pool workers exit without running atexit hooks, so artifacts must be on disk before returning
+    flush_artifacts()
+    return result
+
+
+def compare_images_batch(manifest=None, baseline_dir: str = None, actual_dir: str = None, output_dir: str = None,
+                         method: str = 'absdiff', align: bool = True, min_area: int = 100,
+                         processes: Optional[int] = None, align_mode: str = 'homography',
+                         artifacts: str = 'always') -> BatchResult:
+    """Compare many (baseline, actual) pairs across a process pool.
+
+    Pairs come from ``manifest`` (see ``load_manifest``) or from two directories
+    matched by filename. Each pair writes its artifacts to its own subfolder of
+    ``output_dir`` so workers never overwrite each other. ``processes`` defaults
+    to the number of CPUs; 1 runs everything in the calling process.
+    """
+    if manifest is not None:
+        pairs, unmatched = load_manifest(manifest), []
+    elif baseline_dir and actual_dir:
+        pairs, unmatched = match_directories(baseline_dir, actual_dir)
+    else:
+        raise ValueError("Provide either a manifest or both baseline_dir and actual_dir.")
+
+    if not output_dir:
+        output_dir = comparison_output_dir()
+
+    jobs = []
+    for index, (pathA, pathB) in enumerate(pairs):
+        pair_dir = os.path.join(output_dir, f"{index:04d}_{Path(pathB).stem}")
+        jobs.append((pathA, pathB, pair_dir, method, align, min_area, align_mode, artifacts))
+
+    processes = processes or os.cpu_count() or 1
+    processes = max(1, min(int(processes), len(jobs) or 1))
+
+    started = time.perf_counter()
+    results, errors = [None] * len(jobs), {}
+    if processes == 1:
+        for index, job in enumerate(jobs):
+            try:
+                results[index] = _compare_pair(*job)
+            except Exception as e:
+                errors[index] = f"{type(e).__name__}: {e}"
+    else:
+        # Spawned workers re-import this module by name, so its folder must be importable
+        # even when Robot loaded us by path and has since restored sys.path.
+        module_dir = str(Path(__file__).resolve().parent)
+        if module_dir not in sys.path:
+            sys.path.insert(0, module_dir)
+        # Forking while the artifact writer is mid-encode would copy its held locks into the workers
+        flush_artifacts()
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_batch_worker) as pool:
+            futures = [pool.submit(_compare_pair, *job) for job in jobs]
+            for index, future in enumerate(futures):
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    errors[index] = f"{type(e).__name__}: {e}"
+    elapsed = time.perf_counter() - started
+
+    compared = [r for r in results if r is not None]
+    summary = {
+        "pairs": len(jobs),
+        "compared": len(compared),
+        "errors": {f"{jobs[i][0]} vs {jobs[i][1]}": msg for i, msg in errors.items()},
+        "unmatched": unmatched,
+        "pairs_with_regions": sum(1 for r in compared if r.regions_count > 0),
+        "total_regions": sum(r.regions_count for r in compared),
+        "mean_changed_percent": (sum(r.changed_percent for r in compared) / len(compared)) if compared else 0.0,
+        "max_changed_percent": max((r.changed_percent for r in compared), default=0.0),
+        "precheck": {tier: sum(1 for r in compared if r.precheck == tier) for tier in PRECHECK_TIERS},
+        "memo_hits": sum(1 for r in compared if r.cached),
+        "processes": processes,
+        "wall_time_s": elapsed,
+    }
+    return BatchResult(results=results, summary=summary)
@@ -0,0 +1,120 @@
+import atexit
+import os
+import queue
+import threading
+
+import cv2
+
+try:
+    from .output_paths import atomic_imwrite
+except ImportError:
+    from output_paths import atomic_imwrite
+
+ARTIFACT_POLICIES = ('always', 'on-failure', 'never')
+ARTIFACT_NAMES = ('alignedB', 'diff_mask', 'overlay', 'bboxes', 'heatmap', 'report')
+IMAGE_FORMATS = ('png', 'webp', 'jpg', 'bmp')
+
+
+def select_artifacts(policy: str = 'always', artifact_set=None, failed: bool = True):
+    """Return the artifact names to produce for one comparison.
+
+    ``artifact_set`` restricts the names (a list or a comma-separated string) and
+    ``policy`` decides whether anything is produced at all: 'never', 'always', or
+    'on-failure' (only when ``failed`` is true).
+    """
+    policy = (policy or 'always').lower()
+    if policy not in ARTIFACT_POLICIES:
+        raise ValueError(f"Unknown artifact policy '{policy}'. Expected one of: {', '.join(ARTIFACT_POLICIES)}")
+    if policy == 'never' or (policy == 'on-failure' and not failed):
+        return ()
+
+    if artifact_set is None:
+        return ARTIFACT_NAMES
+    if isinstance(artifact_set, str):
+        artifact_set = [name.strip() for name in artifact_set.split(',') if name.strip()]
+    unknown = set(artifact_set) - set(ARTIFACT_NAMES)
+    if unknown:
+        raise ValueError(f"Unknown artifacts {sorted(unknown)}. Expected any of: {', '.join(ARTIFACT_NAMES)}")
+    return tuple(name for name in ARTIFACT_NAMES if name in artifact_set)
+
+
+def encode_params(image_format: str = 'png', png_compression=None):
+    """Return (file extension, cv2.imwrite params) for the chosen image format."""
+    image_format = (image_format or 'png').lower()
+    if image_format not in IMAGE_FORMATS:
+        raise ValueError(f"Unknown image format '{image_format}'. Expected one of: {', '.join(IMAGE_FORMATS)}")
+    params = []
+    if image_format == 'png' and png_compression is not None:
+        params = [cv2.IMWRITE_PNG_COMPRESSION, int(png_compression)]
+    elif image_format == 'webp':
+        params = [cv2.IMWRITE_WEBP_QUALITY, 101]  # >100 selects lossless WebP
+    return f".{image_format}", params
+
+
+class ArtifactWriter:
+    """Encodes and writes images on a background thread.
+
+    ``cv2.imwrite`` releases the GIL, so encoding overlaps with the caller's next
+    comparison. The queue is bounded: once ``max_pending`` images are waiting,
+    ``submit`` blocks instead of buffering unbounded full-frame arrays.
+    Failures are collected and raised from ``flush``.
+    """
+
+    def __init__(self, max_pending: int = 8):
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._errors = []
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _run(self):
+        while True:
+            path, image, params = self._queue.get()
+            try:
+                if path is None:
+                    image()  # a when_written callback
+                elif not atomic_imwrite(path, image, params):
+                    raise IOError(f"Failed to save image to: {path}")
+            except Exception as e:
+                self._errors.append(e)
+            finally:
+                self._queue.task_done()
+
+    def _put(self, item):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="artifact-writer", daemon=True)
+                self._thread.start()
+        self._queue.put(item)
+
+    def submit(self, path: str, image, params=None):
+        self._put((path, image, params or []))
+
+    def when_written(self, callback):
+        """Call ``callback()`` on the writer thread once every image submitted before it has been written."""
+        self._put((None, callback, None))
+
+    def flush(self):
+        """Block until every submitted image is on disk; raise IOError if any write failed."""
+        self._queue.join()
+        errors, self._errors = self._errors, []
+        if errors:
+            raise IOError("Failed to write artifacts:\n" + "\n".join(f" - {e}" for e in errors))
+
+
+_writer = None
+_writer_pid = None
+
+
+def get_artifact_writer() -> ArtifactWriter:
+    global _writer, _writer_pid
+    # A forked pool worker inherits the parent's writer object but not its thread
+    if _writer is None or _writer_pid != os.getpid():
+        _writer, _writer_pid = ArtifactWriter(), os.getpid()
+        atexit.register(_writer.flush)
+    return _writer
+
+
+def flush_artifacts():
+    """Wait for background artifact writes to finish. Call before reading artifact files."""
+    if _writer is not None and _writer_pid == os.getpid():
+        _writer.flush()
@@ -0,0 +1,264 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+try:
+    from .feature_cache import file_digest
+    from .file_lock import file_lock
+except ImportError:
+    from feature_cache import file_digest
+    from file_lock import file_lock
+
+DEFAULT_STORE_DIR = os.path.join(str(Path(__file__).resolve().parents[1]), 'baselines')
+# Grayscale pyramid levels kept per baseline: level n is 1/2**n of the full size
+PYRAMID_LEVELS = 3
+
+# Open-addressing hash table: a slot holds the first 16 bytes of the key's sha256 (as two integers)
+# and the blob digest. An all-zero key marks an empty slot.
+INDEX_DTYPE = np.dtype([('k0', '<u8'), ('k1', '<u8'), ('digest', 'S64')])
+INDEX_MIN_SLOTS = 16
+
+
+def baseline_key(test_id: str, browser: str, viewport: str) -> tuple:
+    digest = hashlib.sha256(f"{test_id}|{browser}|{viewport}".encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:16], 'little')
+
+
+def _lookup(table, key: tuple):
+    slots = len(table)
+    i = key[0] & (slots - 1)
+    for _ in range(slots):
+        k0, k1 = int(table['k0'][i]), int(table['k1'][i])
+        if (k0, k1) == key:
+            return table['digest'][i].decode('ascii')
+        if not (k0 or k1):
+            return None
+        i = (i + 1) & (slots - 1)
+    return None
+
+
+def _build_table(entries: dict):
+    slots = INDEX_MIN_SLOTS
+    while slots < 2 * (len(entries) + 1):
+        slots *= 2
+    table = np.zeros(slots, INDEX_DTYPE)
+    for key, digest in entries.items():
+        i = key[0] & (slots - 1)
+        while table['k0'][i] or table['k1'][i]:
+            i = (i + 1) & (slots - 1)
+        table[i] = (key[0], key[1], digest.encode('ascii'))
+    return table
+
+
+def perceptual_hash(gray) -> int:
+    """64-bit DCT perceptual hash: the sign of the lowest 8x8 frequencies against their median (DC excluded)."""
+    small = cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:8, :8].ravel()
+    bits = low > np.median(low[1:])
+    return int(np.packbits(bits).view('>u8')[0])
+
+
+def hamming_distance(hash_a: int, hash_b: int) -> int:
+    return bin(hash_a ^ hash_b).count('1')
+
+
+def _save_npy(path: Path, array):
+    tmp = path.with_name(f"{path.stem}.{os.getpid()}.{threading.get_ident()}.tmp.npy")
+    np.save(tmp, np.ascontiguousarray(array))
+    os.replace(tmp, path)
+
+
+class Baseline:
+    """One stored baseline: the original file plus its precomputed decodings.
+
+    Pixel arrays are memory-mapped read-only from the blob, so opening a baseline
+    decodes nothing and processes on the same host share the pages. The object
+    also serves as the ``feature_cache`` of ``align_by_mode``: ORB features are
+    kept in ``derived_dir``, a per-digest folder outside the immutable blob.
+    """
+
+    def __init__(self, directory: Path, digest: str, derived_dir: Path):
+        self.directory = Path(directory)
+        self.digest = digest
+        self.derived_dir = Path(derived_dir)
+        self._meta = None
+
+    @property
+    def meta(self) -> dict:
+        if self._meta is None:
+            with open(self.directory / 'meta.json', encoding='utf-8') as f:
+                self._meta = json.load(f)
+        return self._meta
+
+    @property
+    def path(self) -> str:
+        """The original image file, for APIs that take a path."""
+        return str(self.directory / self.meta["file"])
+
+    @property
+    def image(self):
+        return np.load(self.directory / 'image.npy', mmap_mode='r')
+
+    @property
+    def gray(self):
+        return self.level(0)
+
+    def level(self, n: int):
+        """Grayscale pyramid level ``n`` (0 is full size, each level halves both sides)."""
+        return np.load(self.directory / f'gray_{int(n)}.npy', mmap_mode='r')
+
+    @property
+    def phash(self) -> int:
+        return int(self.meta["phash"], 16)
+
+    def _features_path(self, max_features: int, variant: str) -> Path:
+        return self.derived_dir / f"orb{max_features}{variant}_cv{cv2.__version__}.npz"
+
+    def get_or_compute(self, path: str, max_features: int, compute, variant: str = ''):
+        """FeatureCache-compatible lookup; ``path`` is ignored, the blob is the key."""
+        entry = self._features_path(max_features, variant)
+        try:
+            with np.load(entry) as data:
+                pts, des = data["pts"], data["des"]
+            return (None, None) if des.size == 0 else (pts, des)
+        except (OSError, KeyError, ValueError):
+            pass
+        pts, des = compute()
+        stored_pts = pts if des is not None else np.zeros((0, 2), np.float32)
+        stored_des = des if des is not None else np.zeros((0, 32), np.uint8)
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        tmp = entry.with_name(f"{entry.stem}.{os.getpid()}.{threading.get_ident()}.tmp.npz")
+        np.savez(tmp, pts=stored_pts, des=stored_des)
+        os.replace(tmp, entry)
+        return pts, des
+
+
+class BaselineStore:
+    """Content-addressed baselines, looked up by (test id, browser, viewport).
+
+    Layout under ``root``::
+
+        blobs/<d[:2]>/<d>/     one folder per distinct image (d = sha256 of the file)
+            image.<ext>        the approved file as it was given
+            image.npy          decoded BGR pixels
+            gray_<n>.npy       grayscale pyramid, level 0 = full size
+            meta.json          shape, perceptual hash, source
+        derived/<d[:2]>/<d>/   data computed later from a blob
+            orb*.npz           ORB features, added on first use per parameter set
+        index.npy              hash table key -> digest, memory-mapped by readers
+        approvals.jsonl        who pointed which key at which digest, and when
+
+    Blobs are immutable once published; data computed later goes to ``derived``,
+    each file written under a temporary name and renamed into place. Approving
+    writes a new index and renames it over the old one, so readers see either
+    the previous or the new pointer.
+    """
+
+    def __init__(self, root: str = None):
+        self.root = Path(root or os.environ.get('BASELINE_STORE_DIR') or DEFAULT_STORE_DIR)
+        self.index_path = self.root / 'index.npy'
+        self._table = None
+        self._table_stamp = None
+
+    def _index(self):
+        # Remap only when approval replaced the file
+        try:
+            st = os.stat(self.index_path)
+        except FileNotFoundError:
+            return np.zeros(0, INDEX_DTYPE)
+        stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+        if stamp != self._table_stamp:
+            self._table, self._table_stamp = np.load(self.index_path, mmap_mode='r'), stamp
+        return self._table
+
+    def blob(self, digest: str) -> Baseline:
+        return Baseline(self.root / 'blobs' / digest[:2] / digest, digest,
+                        self.root / 'derived' / digest[:2] / digest)
+
+    def lookup(self, test_id: str, browser: str, viewport: str):
+        """Return the approved Baseline for the key, or None."""
+        table = self._index()
+        digest = _lookup(table, baseline_key(test_id, browser, viewport)) if len(table) else None
+        return self.blob(digest) if digest else None
+
+    def get(self, test_id: str, browser: str, viewport: str) -> Baseline:
+        baseline = self.lookup(test_id, browser, viewport)
+        if baseline is None:
+            raise FileNotFoundError(f"No approved baseline for test '{test_id}' on {browser} at {viewport} "
+                                    f"in {self.root}")
+        return baseline
+
+    def add_blob(self, image_path: str) -> Baseline:
+        """Store ``image_path`` and its decodings under its content hash (a no-op if already stored)."""
+        digest = file_digest(image_path)
+        baseline = self.blob(digest)
+        if (baseline.directory / 'meta.json').exists():
+            return baseline
+
+        image = cv2.imread(image_path, cv2.IMREAD_COLOR)
+        if image is None:
+            raise FileNotFoundError(f"Image not found or could not be opened: {image_path}")
+        baseline.directory.parent.mkdir(parents=True, exist_ok=True)
+        tmp = baseline.directory.with_name(f".{digest}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.mkdir()
+        try:
+            file_name = 'image' + (Path(image_path).suffix.lower() or '.png')
+            shutil.copyfile(image_path, tmp / file_name)
+            _save_npy(tmp / 'image.npy', image)
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            _save_npy(tmp / 'gray_0.npy', gray)
+            level = gray
+            for n in range(1, PYRAMID_LEVELS + 1):
+                if min(level.shape) < 2:
+                    break
+                level = cv2.pyrDown(level)
+                _save_npy(tmp / f'gray_{n}.npy', level)
+            meta = {"file": file_name, "shape": list(image.shape), "phash": f"{perceptual_hash(gray):016x}",
+                    "source": os.path.abspath(image_path), "stored": time.time()}
+            with open(tmp / 'meta.json', 'w', encoding='utf-8') as f:
+                json.dump(meta, f, indent=2)
+            try:
+                os.rename(tmp, baseline.directory)  # publish; blobs are never modified afterwards
+            except OSError:
+                if not (baseline.directory / 'meta.json').exists():
+                    raise
+                # Another worker stored the same content first
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        return baseline
+
+    def approve(self, test_id: str, browser: str, viewport: str, image_path: str) -> Baseline:
+        """Make ``image_path`` the baseline for the key, storing it first if needed."""
+        baseline = self.add_blob(image_path)
+        key = baseline_key(test_id, browser, viewport)
+        with file_lock(str(self.index_path) + '.lock'):
+            table = self._index()
+            entries = {(int(k0), int(k1)): d.decode('ascii')
+                       for k0, k1, d in zip(table['k0'], table['k1'], table['digest']) if k0 or k1}
+            entries[key] = baseline.digest
+            tmp = self.root / f"index.{os.getpid()}.{threading.get_ident()}.tmp.npy"
+            np.save(tmp, _build_table(entries))
+            os.replace(tmp, self.index_path)
+            record = {"test_id": test_id, "browser": browser, "viewport": viewport,
+                      "digest": baseline.digest, "source": os.path.abspath(image_path), "approved": time.time()}
+            with open(self.root / 'approvals.jsonl', 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record) + "\n")
+        return baseline
+
+
+_stores = {}
+
+
+def get_baseline_store(root: str = None) -> BaselineStore:
+    """Process-wide store for ``root`` (default $BASELINE_STORE_DIR or <repo>/baselines)."""
+    root = str(root or os.environ.get('BASELINE_STORE_DIR') or DEFAULT_STORE_DIR)
+    if root not in _stores:
+        _stores[root] = BaselineStore(root)
+    return _stores[root]
@@ -0,0 +1,228 @@
+import cv2
+import numpy as np
+
+try:
+    from scipy.ndimage import uniform_filter  # ships with scikit-image
+    HAVE_SCIPY = True
+except Exception:
+    HAVE_SCIPY = False
+
+# Rows between neighbouring slices (and before the first). Blur reads 2 rows past each edge of a
+# slice, so a shared gap holds the 2 border rows below one slice and the 2 above the next; the
+# 5x5 close (2 iterations) reaches 4 rows, so slices never see each other's pixels.
+SLICE_GAP = 4
+SSIM_WIN = 7
+_FLT_EPSILON = np.finfo(np.float32).eps
+
+
+class KernelWorkspace:
+    """Preallocated buffers for the batched kernels, reused while the stack shape stays the same.
+
+    Arrays returned by the kernels are views into these buffers: copy them if they
+    must survive the next call with the same workspace.
+    """
+
+    def __init__(self):
+        self._buffers = {}
+        self.kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (5, 5))
+
+    def get(self, name, shape, dtype):
+        buf = self._buffers.get(name)
+        if buf is None or buf.shape != shape or buf.dtype != dtype:
+            buf = self._buffers[name] = np.empty(shape, dtype)
+        return buf
+
+
+_default_workspace = None
+
+
+def _workspace(workspace):
+    global _default_workspace
+    if workspace is not None:
+        return workspace
+    if _default_workspace is None:
+        _default_workspace = KernelWorkspace()
+    return _default_workspace
+
+
+def as_grays(images):
+    """Convert same-size BGR or grayscale images to a list of (h, w) uint8 planes.
+
+    The kernels copy the planes straight into their stacked buffers, so no
+    intermediate (n, h, w) array is built.
+    """
+    grays = [cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img for img in images]
+    shapes = {g.shape for g in grays}
+    if len(shapes) != 1:
+        raise ValueError(f"Batched kernels need same-size images, got shapes {sorted(shapes)}")
+    return grays
+
+
+def _batch_shape(graysA, graysB):
+    if len(graysA) != len(graysB) or graysA[0].shape != graysB[0].shape:
+        raise ValueError(f"Batch sides differ: {len(graysA)} x {graysA[0].shape} vs {len(graysB)} x {graysB[0].shape}")
+    return (len(graysA),) + graysA[0].shape
+
+
+def _fill(stack, grays):
+    for plane, gray in zip(stack, grays):
+        plane[...] = gray
+
+
+def _padded(ws, name, n, h, w):
+    """Return (2-D buffer, (n, h + gap, w) slot view, (n, h, w) core view) of a stacked buffer.
+
+    The 2-D buffer is one gap followed by n slots; each slot is a slice's h rows and the gap after it.
+    """
+    flat = ws.get(name, (SLICE_GAP + n * (h + SLICE_GAP), w), np.uint8)
+    slots = flat[SLICE_GAP:].reshape(n, h + SLICE_GAP, w)
+    return flat, slots, slots[:, :h]
+
+
+def _reflect_101(flat, slots, h):
+    # Reproduce OpenCV's default BORDER_REFLECT_101 in the gap rows each slice's blur reads
+    before = flat[SLICE_GAP - 2:SLICE_GAP - 2 + slots.shape[0] * slots.shape[1]].reshape(slots.shape)
+    before[:, 0] = slots[:, 2]
+    before[:, 1] = slots[:, 1]
+    slots[:, h] = slots[:, h - 2]
+    slots[:, h + 1] = slots[:, h - 3]
+
+
+def _fill_gaps(flat, slots, h, value):
+    flat[:SLICE_GAP] = value
+    slots[:, h:] = value
+
+
+def otsu_thresholds(stack):
+    """Per-slice Otsu threshold of an (n, h, w) uint8 stack, as cv2.THRESH_OTSU computes it."""
+    # One C-level histogram per slice beats a single bincount over int64-widened offsets
+    hist = np.stack([cv2.calcHist([plane], [0], None, [256], [0, 256]).ravel() for plane in stack])
+
+    levels = np.arange(256, dtype=np.float64)
+    p = hist.astype(np.float64) / float(stack[0].size)
+    mu = (p * levels).sum(axis=1, keepdims=True)
+    q1 = np.cumsum(p, axis=1)
+    q2 = 1.0 - q1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mu1 = np.cumsum(p * levels, axis=1) / q1
+        mu2 = (mu - q1 * mu1) / q2
+        sigma = q1 * q2 * (mu1 - mu2) ** 2
+    valid = (np.minimum(q1, q2) >= _FLT_EPSILON) & (np.maximum(q1, q2) <= 1.0 - _FLT_EPSILON)
+    sigma = np.where(valid, sigma, 0.0)
+    return sigma.argmax(axis=1)  # first maximum, like OpenCV's strict '>' scan
+
+
+def _threshold_and_clean(ws, diff_core, n, h, w):
+    """Otsu-threshold each slice, then close(2) + dilate(1) with a 5x5 rect, all slices per call."""
+    thresholds = otsu_thresholds(diff_core)
+    mask2d, mask, mask_core = _padded(ws, "mask", n, h, w)
+    tmp2d, tmp, tmp_core = _padded(ws, "morph", n, h, w)
+    above = ws.get("above", (n, h, w), np.bool_)
+    np.greater(diff_core, thresholds.astype(np.uint8)[:, None, None], out=above)
+    np.multiply(above.view(np.uint8), np.uint8(255), out=mask_core)
+
+    # Gap rows act as each slice's border: 0 is neutral for dilation, 255 for erosion
+    _fill_gaps(mask2d, mask, h, 0)
+    cv2.dilate(mask2d, ws.kernel, dst=tmp2d, iterations=2)
+    _fill_gaps(tmp2d, tmp, h, 255)
+    cv2.erode(tmp2d, ws.kernel, dst=mask2d, iterations=2)
+    _fill_gaps(mask2d, mask, h, 0)
+    cv2.dilate(mask2d, ws.kernel, dst=tmp2d, iterations=1)
+    return tmp_core
+
+
+def batch_absdiff_masks(graysA, graysB, workspace=None):
+    """Batched compute_absdiff_mask over n same-size uint8 grays (a list or an (n, h, w) array).
+    Returns (diff, mask), both (n, h, w).
+    """
+    ws = _workspace(workspace)
+    n, h, w = _batch_shape(graysA, graysB)
+    if h <= 2:
+        raise ValueError("Batched absdiff needs crops at least 3 pixels tall")
+
+    bufA2d, slotsA, coreA = _padded(ws, "inA", n, h, w)
+    bufB2d, slotsB, coreB = _padded(ws, "inB", n, h, w)
+    _fill(coreA, graysA)
+    _fill(coreB, graysB)
+    _reflect_101(bufA2d, slotsA, h)
+    _reflect_101(bufB2d, slotsB, h)
+
+    blurA2d, _, _ = _padded(ws, "blurA", n, h, w)
+    blurB2d, _, _ = _padded(ws, "blurB", n, h, w)
+    cv2.GaussianBlur(bufA2d, (5, 5), 0, dst=blurA2d)
+    cv2.GaussianBlur(bufB2d, (5, 5), 0, dst=blurB2d)
+    diff2d, _, diff_core = _padded(ws, "diff", n, h, w)
+    cv2.absdiff(blurA2d, blurB2d, dst=diff2d)
+
+    return diff_core, _threshold_and_clean(ws, diff_core, n, h, w)
+
+
+def batch_ssim_masks(graysA, graysB, workspace=None):
+    """Batched compute_ssim_mask over n same-size uint8 grays (a list or an (n, h, w) array).
+
+    Follows skimage's structural_similarity defaults (7x7 uniform window, sample
+    covariance, data range 255) operation for operation.
+    Returns (scores (n,), diff_uint8 (n, h, w), mask (n, h, w)).
+    """
+    if not HAVE_SCIPY:
+        raise RuntimeError("SSIM method selected but scipy/scikit-image is not installed.")
+    ws = _workspace(workspace)
+    n, h, w = shape = _batch_shape(graysA, graysB)
+    size = (1, SSIM_WIN, SSIM_WIN)  # filter within each slice only
+
+    x = ws.get("x", shape, np.float64)
+    y = ws.get("y", shape, np.float64)
+    ux, uy = ws.get("ux", shape, np.float64), ws.get("uy", shape, np.float64)
+    uxx, uyy, uxy = ws.get("uxx", shape, np.float64), ws.get("uyy", shape, np.float64), ws.get("uxy", shape, np.float64)
+    t1, t2 = ws.get("t1", shape, np.float64), ws.get("t2", shape, np.float64)
+    _fill(x, graysA)
+    _fill(y, graysB)
+
+    uniform_filter(x, size, output=ux)
+    uniform_filter(y, size, output=uy)
+    np.multiply(x, x, out=t1)
+    uniform_filter(t1, size, output=uxx)
+    np.multiply(y, y, out=t1)
+    uniform_filter(t1, size, output=uyy)
+    np.multiply(x, y, out=t1)
+    uniform_filter(t1, size, output=uxy)
+
+    np_ = SSIM_WIN ** 2
+    cov_norm = np_ / (np_ - 1)
+    C1 = (0.01 * 255) ** 2
+    C2 = (0.03 * 255) ** 2
+
+    # vx -> uxx, vy -> uyy, vxy -> uxy
+    for u, a, b in ((uxx, ux, ux), (uyy, uy, uy), (uxy, ux, uy)):
+        np.multiply(a, b, out=t1)
+        np.subtract(u, t1, out=u)
+        np.multiply(u, cov_norm, out=u)
+
+    # A1 = 2*ux*uy + C1 -> t1 ; A2 = 2*vxy + C2 -> uxy
+    np.multiply(ux, 2, out=t1)
+    np.multiply(t1, uy, out=t1)
+    np.add(t1, C1, out=t1)
+    np.multiply(uxy, 2, out=uxy)
+    np.add(uxy, C2, out=uxy)
+    # B1 = ux**2 + uy**2 + C1 -> ux ; B2 = vx + vy + C2 -> uxx
+    np.multiply(ux, ux, out=ux)
+    np.multiply(uy, uy, out=t2)
+    np.add(ux, t2, out=ux)
+    np.add(ux, C1, out=ux)
+    np.add(uxx, uyy, out=uxx)
+    np.add(uxx, C2, out=uxx)
+    # S = (A1 * A2) / (B1 * B2) -> t1
+    np.multiply(ux, uxx, out=t2)
+    np.multiply(t1, uxy, out=t1)
+    np.divide(t1, t2, out=t1)
+
+    pad = (SSIM_WIN - 1) // 2
+    scores = np.array([t1[i, pad:h - pad, pad:w - pad].mean(dtype=np.float64) for i in range(n)])
+
+    _, _, diff_core = _padded(ws, "diff", n, h, w)
+    np.subtract(1.0, t1, out=t2)
+    np.multiply(t2, 255, out=t2)
+    np.clip(t2, 0, 255, out=t2)
+    np.copyto(diff_core, t2, casting='unsafe')
+
+    return scores, diff_core, _threshold_and_clean(ws, diff_core, n, h, w)
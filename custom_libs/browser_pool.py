@@ -0,0 +1,204 @@
+import time
+
+from robot.api import logger
+from robot.libraries.BuiltIn import BuiltIn
+
+# Imported as a module so its functions do not become keywords of this library as well
+try:
+    from . import browserstack_connection_helper as bs_helper
+except ImportError:
+    import browserstack_connection_helper as bs_helper
+
+# Robot will treat module-level functions as keywords; the pool lives as long as the Robot process
+ROBOT_LIBRARY_SCOPE = 'GLOBAL'
+
+DEFAULT_MAX_USES = 20
+DEFAULT_WARM_CONTEXTS = 1
+
+
+def _run(name, *args):
+    return BuiltIn().run_keyword(name, *args)
+
+
+def _robot_variable(name, default=None):
+    try:
+        value = BuiltIn().get_variable_value(name)
+    except Exception:  # Robot not running
+        return default
+    return default if value is None else value
+
+
+class BrowserPool:
+    """One browser per Robot process plus a pool of warm contexts handed out per test.
+
+    A context is cleaned when it is released (cookies, permissions, local and
+    session storage, pages) and goes back to the pool. After ``max_uses`` tests,
+    or when the cleanup fails because the context crashed, it is closed and a
+    fresh one takes its place. A browser that disappeared is reopened (and remote
+    sessions reconnected) on the next acquire.
+
+    Browser must be imported with ``auto_closing_level=MANUAL`` (resources/common.robot
+    does), or it closes pooled contexts at the end of the test that used them.
+    """
+
+    def __init__(self, max_uses: int = DEFAULT_MAX_USES, warm_contexts: int = DEFAULT_WARM_CONTEXTS):
+        self.max_uses = max_uses
+        self.warm_contexts = warm_contexts
+        self.config = None
+        self.browser_id = None
+        self._idle = []  # [context id, uses] ready to hand out
+        self._active = None
+        self.stats = {"browser_opens": 0, "contexts_created": 0, "acquired": 0, "recycled": 0, "discarded": 0}
+
+    def open(self, execution_env='local', browser='chromium', headless=False, viewport_width=1920, viewport_height=1080):
+        """Open the process browser unless it is already open with the same settings, then warm the pool."""
+        config = {"execution_env": execution_env, "browser": browser, "headless": headless,
+                  "viewport_width": int(viewport_width), "viewport_height": int(viewport_height)}
+        if self.browser_id and config == self.config and self._browser_alive():
+            return self.browser_id
+        if self.browser_id:
+            self.close()
+        self.config = config
+
+        started = time.perf_counter()
+        if execution_env == 'remote':
+            bs_helper.startLocalTunnel()
+            cdp_url = bs_helper.createCdpUrl(browser)
+            logger.info(f"Connecting to remote browser on {bs_helper.getPlatformDetails()}")
+            self.browser_id = _run('Connect To Browser', cdp_url)
+        else:
+            self.browser_id = _run('New Browser', f'browser={browser}', f'headless={headless}')
+        self.stats["browser_opens"] += 1
+        logger.info(f"Opened pooled browser {self.browser_id} in {time.perf_counter() - started:.2f}s")
+
+        while len(self._idle) < self.warm_contexts:
+            self._idle.append([self._new_context(), 0])
+        return self.browser_id
+
+    def acquire(self):
+        """Make a clean pooled context the active one for the current test and return its id."""
+        if self._active:
+            self.release()
+        if not self.browser_id or not self._browser_alive():
+            self.browser_id = None
+            self._idle = []
+            self.open(**(self.config or self._config_from_variables()))
+
+        while self._idle:
+            entry = self._idle.pop()
+            try:
+                _run('Switch Context', entry[0], self.browser_id)
+                break
+            except Exception as e:
+                logger.info(f"Dropping pooled context {entry[0]}: {e}")
+                self.stats["discarded"] += 1
+        else:
+            entry = [self._new_context(), 0]
+        entry[1] += 1
+        self._active = entry
+        self.stats["acquired"] += 1
+        return entry[0]
+
+    def release(self, crashed=False):
+        """Clean the active context and return it to the pool, or close it when worn out or crashed."""
+        entry, self._active = self._active, None
+        if entry is None:
+            return
+        if not crashed and entry[1] < self.max_uses:
+            try:
+                self._reset_context(entry[0])
+                self._idle.append(entry)
+                return
+            except Exception as e:
+                logger.info(f"Cleaning pooled context {entry[0]} failed, recycling it: {e}")
+                crashed = True
+        self.stats["discarded" if crashed else "recycled"] += 1
+        try:
+            _run('Close Context', entry[0], self.browser_id)
+        except Exception:
+            pass  # already gone with a crashed browser or context
+        if self.browser_id and self._browser_alive() and len(self._idle) < self.warm_contexts:
+            self._idle.append([self._new_context(), 0])
+
+    def close(self):
+        """Close every pooled context and the browser; stop the tunnel of a remote session."""
+        self._active = None
+        self._idle = []
+        if self.browser_id:
+            try:
+                _run('Close Browser', self.browser_id)
+            except Exception as e:
+                logger.info(f"Closing pooled browser {self.browser_id} failed: {e}")
+        if self.config and self.config["execution_env"] == 'remote':
+            bs_helper.stopLocalTunnel()
+        self.browser_id = None
+
+    def _new_context(self):
+        viewport = {"width": self.config["viewport_width"], "height": self.config["viewport_height"]}
+        context_id = _run('New Context', f'viewport={viewport}')
+        self.stats["contexts_created"] += 1
+        return context_id
+
+    def _reset_context(self, context_id):
+        _run('Switch Context', context_id, self.browser_id)
+        if _run('Get Page Ids', 'ALL', 'CURRENT'):
+            # Storage belongs to the origin of the open page; the suite stays on one site
+            try:
+                _run('LocalStorage Clear')
+                _run('SessionStorage Clear')
+            except Exception as e:  # e.g. about:blank has no storage; not a crash
+                logger.debug(f"Storage not cleared: {e}")
+            _run('Close Page', 'ALL', 'CURRENT')
+        _run('Delete All Cookies')
+        _run('Clear Permissions')
+
+    def _browser_alive(self):
+        try:
+            return self.browser_id in _run('Get Browser Ids')
+        except Exception:
+            return False
+
+    @staticmethod
+    def _config_from_variables():
+        return {
+            "execution_env": _robot_variable('${EXECUTION_ENV}', 'local'),
+            "browser": _robot_variable('${BROWSER}', 'chromium'),
+            "headless": _robot_variable('${HEADLESS}', False),
+            "viewport_width": _robot_variable('${VIEWPORT_WIDTH}', 1920),
+            "viewport_height": _robot_variable('${VIEWPORT_HEIGHT}', 1080),
+        }
+
+
+_pool = BrowserPool()
+
+
+def configureBrowserPool(max_uses=DEFAULT_MAX_USES, warm_contexts=DEFAULT_WARM_CONTEXTS):
+    """Set how many tests a context serves before it is recycled and how many contexts are kept warm."""
+    _pool.max_uses = int(max_uses)
+    _pool.warm_contexts = int(warm_contexts)
+
+
+def openPooledBrowser(execution_env='local', browser='chromium', headless=False,
+                      viewport_width=1920, viewport_height=1080):
+    """Open (or reuse) this process's browser and warm its context pool. Returns the browser id."""
+    return _pool.open(execution_env, browser, headless, viewport_width, viewport_height)
+
+
+def acquireTestContext():
+    """Activate a clean pooled context for the current test, opening the browser if needed. Returns its id."""
+    return _pool.acquire()
+
+
+def releaseTestContext(crashed=False):
+    """Clean the current test's context and put it back in the pool (closed if worn out or crashed)."""
+    _pool.release(str(crashed).lower() in ('1', 'true', 'yes'))
+
+
+def closePooledBrowser():
+    """Close the pooled contexts and browser of this process."""
+    _pool.close()
+
+
+def browserPoolStats():
+    """Counters for this process: browser opens, contexts created, acquired, recycled and discarded."""
+    return dict(_pool.stats)
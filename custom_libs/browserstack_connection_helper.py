@@ -1,12 +1,23 @@
+import functools
 import json
+import os
+import re
+import shutil
 import subprocess
 import urllib.parse
-from browserstack.local import Local
+from importlib import metadata
+from pathlib import Path
+from types import MappingProxyType
+
+try:
+    from .browserstack_tunnel import TunnelManager
+except ImportError:
+    from browserstack_tunnel import TunnelManager
 
 # Robot will treat module-level functions as keywords
 ROBOT_LIBRARY_SCOPE = 'GLOBAL'
 
-bs_local = None
+tunnel_manager = None
 
 desired_cap = {
     'browser_version': 'latest',
@@ -29,53 +40,128 @@ desired_cap = {
 }
 
 
+# Per-browser platform settings layered over desired_cap; anything else runs on WebKit
+PLATFORMS = {
+    'chrome': {'os': 'Windows', 'os_version': '11', 'browser': 'chrome'},
+    'firefox': {'os': 'OS X', 'os_version': 'Ventura', 'browser': 'playwright-firefox'},
+}
+DEFAULT_PLATFORM = {'os': 'OS X', 'os_version': 'Ventura', 'browser': 'playwright-webkit'}
+
+CACHE_DIR = os.environ.get("BROWSERSTACK_CACHE_DIR") or os.path.join(
+    str(Path(__file__).resolve().parents[1]), 'output', '.cache')
+
+_last_browser = None
+
+
+def _playwright_install_key():
+    """Identify the installed Playwright: package versions plus the CLI's path and mtime."""
+    versions = {}
+    for package in ('playwright', 'robotframework-browser'):
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    cli = shutil.which('playwright')
+    return {"packages": versions, "cli": cli, "cli_mtime": os.path.getmtime(cli) if cli else None}
+
+
+@functools.lru_cache(maxsize=None)
+def clientPlaywrightVersion():
+    """Version of the local Playwright client, probed with `playwright --version` once per install.
+
+    The result is cached in <CACHE_DIR>/playwright_version.json, keyed by the installed
+    package versions and CLI, so other processes and later runs skip the Node startup.
+    Falls back to desired_cap's value when Playwright cannot be probed.
+    """
+    key = _playwright_install_key()
+    cache_file = os.path.join(CACHE_DIR, 'playwright_version.json')
+    try:
+        with open(cache_file, encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached.get("key") == key:
+            return cached["version"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    if not key["cli"]:
+        return desired_cap['client.playwrightVersion']
+    # Prints e.g. "Version 1.44.0"
+    words = str(subprocess.getoutput('playwright --version')).strip().split(" ")
+    if len(words) < 2 or not re.match(r'^\d+\.\d+', words[1]):
+        return desired_cap['client.playwrightVersion']
+    version = words[1]
+
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp = f"{cache_file}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding="utf-8") as f:
+            json.dump({"key": key, "version": version}, f)
+        os.replace(tmp, cache_file)  # concurrent writers leave one complete file
+    except OSError:
+        pass
+    return version
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    return value
+
+
+def _thaw(value):
+    if isinstance(value, MappingProxyType):
+        return {k: _thaw(v) for k, v in value.items()}
+    return value
+
+
+@functools.lru_cache(maxsize=None)
+def buildCapabilities(browser):
+    """Read-only BrowserStack capabilities for browser: desired_cap plus its platform and client version."""
+    caps = json.loads(json.dumps(desired_cap))  # deep copy; desired_cap stays the untouched template
+    caps['client.playwrightVersion'] = clientPlaywrightVersion()
+    caps.update(PLATFORMS.get(browser, DEFAULT_PLATFORM))
+    return _freeze(caps)
+
+
+@functools.lru_cache(maxsize=None)
+def _cdp_url(browser):
+    caps = _thaw(buildCapabilities(browser))
+    return 'wss://cdp.browserstack.com/playwright?caps=' + urllib.parse.quote(json.dumps(caps))
+
+
 def createCdpUrl(browser):
-    """Create BrowserStack CDP URL for Playwright based on desired_cap and browser."""
-    clientPlaywrightVersion = str(subprocess.getoutput('playwright --version')).strip().split(" ")[1]
-    desired_cap['client.playwrightVersion'] = clientPlaywrightVersion
-    if browser == 'chrome':
-        desired_cap['os'] = 'Windows'
-        desired_cap['os_version'] = '11'
-        desired_cap['browser'] = 'chrome'
-    elif browser == 'firefox':
-        desired_cap['os'] = 'OS X'
-        desired_cap['os_version'] = 'Ventura'
-        desired_cap['browser'] = 'playwright-firefox'
-    else:
-        desired_cap['os'] = 'OS X'
-        desired_cap['os_version'] = 'Ventura'
-        desired_cap['browser'] = 'playwright-webkit'
-
-    cdpUrl = 'wss://cdp.browserstack.com/playwright?caps=' + urllib.parse.quote(json.dumps(desired_cap))
+    """Create BrowserStack CDP URL for Playwright based on desired_cap and browser (memoized per browser)."""
+    global _last_browser
+    _last_browser = browser
+    cdpUrl = _cdp_url(browser)
     print(cdpUrl)
     return cdpUrl
 
 
-def getPlatformDetails():
-    """Return a readable string describing the selected platform."""
+def getPlatformDetails(browser=None):
+    """Return a readable string describing the platform of browser (default: the last CDP URL's browser)."""
+    caps = buildCapabilities(browser if browser is not None else _last_browser)
     platformDetails = (
-        f"{desired_cap.get('os', '')} {desired_cap.get('os_version', '')} "
-        f"{desired_cap.get('browser', '')} {desired_cap.get('browser_version', '')}"
+        f"{caps.get('os', '')} {caps.get('os_version', '')} "
+        f"{caps.get('browser', '')} {caps.get('browser_version', '')}"
     )
     print(platformDetails)
     return platformDetails
 
 
+def _tunnel():
+    global tunnel_manager
+    if tunnel_manager is None:
+        tunnel_manager = TunnelManager(desired_cap.get('browserstack.accessKey'),
+                                       desired_cap.get('browserstack.localIdentifier'))
+    return tunnel_manager
+
+
 def startLocalTunnel():
-    """Start BrowserStackLocal tunnel if not already running."""
-    global bs_local
-    if not bs_local:
-        bs_local = Local()
-        bs_local_args = {
-            "key": desired_cap.get('browserstack.accessKey'),
-            "localIdentifier": desired_cap.get('browserstack.localIdentifier')
-        }
-        bs_local.start(**bs_local_args)
+    """Start the BrowserStackLocal tunnel, or join the one another process on this machine already runs."""
+    _tunnel().acquire()
 
 
 def stopLocalTunnel():
-    """Stop BrowserStackLocal tunnel if running."""
-    global bs_local
-    if bs_local:
-        bs_local.stop()
-        bs_local = None
+    """Leave the BrowserStackLocal tunnel; it is stopped once the last process using it leaves."""
+    _tunnel().release()
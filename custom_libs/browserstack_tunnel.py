@@ -0,0 +1,116 @@
+import json
+import os
+import re
+import tempfile
+
+import psutil
+
+try:
+    from .file_lock import DEFAULT_LOCK_TIMEOUT, file_lock
+except ImportError:
+    from file_lock import DEFAULT_LOCK_TIMEOUT, file_lock
+
+
+class TunnelManager:
+    """One BrowserStack Local tunnel per machine and localIdentifier, shared by reference count.
+
+    Every process that calls ``acquire`` is recorded as a user in a state file
+    under ``state_dir`` (guarded by a lock file next to it). The first user starts
+    the tunnel; ``release`` stops it only when no other live process still uses
+    it. Users whose process died are pruned, so a crashed pabot worker does not
+    keep the tunnel alive forever.
+
+    ``local_factory`` builds the ``browserstack.local.Local``-like object: it needs
+    ``start(**options)``, ``stop()`` and, after a start, a ``pid``. The process
+    that stops the tunnel need not be the one that started it; it calls
+    ``start(..., onlyCommand=True)`` first so the binary is resolved without
+    starting a second tunnel, exactly like ``Local`` supports.
+    """
+
+    def __init__(self, key: str, local_identifier: str, local_factory=None, state_dir: str = None,
+                 lock_timeout: float = DEFAULT_LOCK_TIMEOUT):
+        if local_factory is None:
+            from browserstack.local import Local
+            local_factory = Local
+        self.key = key
+        self.local_identifier = local_identifier
+        self.local_factory = local_factory
+        self.lock_timeout = lock_timeout
+        state_dir = state_dir or os.environ.get('BROWSERSTACK_TUNNEL_STATE_DIR') or tempfile.gettempdir()
+        name = re.sub(r'[^\w\-_\.]', '_', str(local_identifier))
+        self.state_path = os.path.join(state_dir, f"bs_tunnel_{name}.json")
+        self.lock_path = self.state_path + '.lock'
+        self._local = None  # the Local this process started, if any
+
+    def _options(self):
+        return {"key": self.key, "localIdentifier": self.local_identifier}
+
+    def _read_state(self):
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = {}
+        users = {pid: n for pid, n in state.get("users", {}).items() if psutil.pid_exists(int(pid))}
+        return {"users": users, "tunnel_pid": state.get("tunnel_pid")}
+
+    def _write_state(self, state):
+        if not state["users"]:
+            try:
+                os.remove(self.state_path)
+            except OSError:
+                pass
+            return
+        tmp = f"{self.state_path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp, self.state_path)
+
+    def _tunnel_running(self, state):
+        pid = state.get("tunnel_pid")
+        if pid is not None:
+            return psutil.pid_exists(int(pid))
+        return bool(state["users"])  # a Local stand-in without a pid
+
+    def acquire(self) -> bool:
+        """Register this process as a user, starting the tunnel if none is running. Returns True if it started one."""
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        with file_lock(self.lock_path, self.lock_timeout):
+            state = self._read_state()
+            started = False
+            if not self._tunnel_running(state):
+                local = self.local_factory()
+                local.start(**self._options())
+                self._local = local
+                state["tunnel_pid"] = getattr(local, 'pid', None)
+                started = True
+            pid = str(os.getpid())
+            state["users"][pid] = state["users"].get(pid, 0) + 1
+            self._write_state(state)
+            return started
+
+    def release(self) -> bool:
+        """Drop one use by this process and stop the tunnel if nobody uses it anymore. Returns True if it stopped."""
+        with file_lock(self.lock_path, self.lock_timeout):
+            state = self._read_state()
+            pid = str(os.getpid())
+            if pid not in state["users"]:
+                return False
+            state["users"][pid] -= 1
+            if state["users"][pid] <= 0:
+                del state["users"][pid]
+            stopped = False
+            if not state["users"]:
+                local = self._local
+                if local is None:
+                    local = self.local_factory()
+                    local.start(onlyCommand=True, **self._options())
+                local.stop()
+                self._local = None
+                stopped = True
+            self._write_state(state)
+            return stopped
+
+    def users(self) -> dict:
+        """Live processes using the tunnel: {pid: number of acquires}."""
+        return self._read_state()["users"]
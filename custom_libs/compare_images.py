@@ -1,46 +1,148 @@
 import cv2
 from skimage.metrics import structural_similarity as ssim
-import numpy as np
-import pytesseract
 from datetime import datetime
 import os
 import difflib
-from pathlib import Path
 
-# Set the path to the Tesseract executable
-pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+try:
+    from .decode_cache import get_decode_cache
+    from .ocr_engine import get_ocr_engine, merge_boxes
+    from .output_paths import atomic_imwrite, atomic_write_text, comparison_output_dir
+    from .precheck import precheck_pair, record_tier
+    from .result_memo import get_result_memo
+    from .regions import draw_regions, mask_components, regions_from_components
+    from .result_sink import record_result
+    from .roi import build_roi_mask, neutralise_ignored, roi_bounds
+    from .stage_timings import record_comparison, timed
+except ImportError:
+    from decode_cache import get_decode_cache
+    from ocr_engine import get_ocr_engine, merge_boxes
+    from output_paths import atomic_imwrite, atomic_write_text, comparison_output_dir
+    from precheck import precheck_pair, record_tier
+    from result_memo import get_result_memo
+    from regions import draw_regions, mask_components, regions_from_components
+    from result_sink import record_result
+    from roi import build_roi_mask, neutralise_ignored, roi_bounds
+    from stage_timings import record_comparison, timed
+
+# Above this share of the image, one full-page OCR pass is cheaper than many crops
+FULL_PAGE_OCR_RATIO = 0.6
 
 def compare_images(baseline_path, current_path,
                    diff_output="diff.png",
                    highlighted_output="highlighted_diff.png",
-                   log_file="debug_log.txt",output_dir: str = None):
-    
-    # Ensure we have an output directory
+                   log_file="debug_log.txt",output_dir: str = None,
+                   precheck: bool = True, decode_cache: bool = True,
+                   include=None, ignore=None, roi_mask=None, verbose: bool = False, memo: bool = True):
+    """SSIM + OCR comparison of current_path against baseline_path.
+
+    ``include`` / ``ignore`` rectangles and ``roi_mask`` (see ``roi.build_roi_mask``)
+    restrict the comparison: both images are cropped to what is left, ignored pixels
+    inside the crop never count as changed, and box coordinates refer to the crop
+    (returned as ``results["roi"]``). ``results["regions"]`` lists the changed areas
+    that were highlighted and read by OCR (x, y, width, height, changed_pixels).
+
+    Every result is appended to the JSON-lines log of ``result_sink``; progress is
+    only printed with ``verbose``. With ``memo``, an unchanged pair compared with
+    the same settings before gets the stored results back (``cached`` is True),
+    as long as the files of its output folder are unchanged (same mtime and size).
+    """
+
+    log = print if verbose else (lambda *args: None)
+    # Seconds per stage, and peak traced bytes per stage while tracemalloc is tracing
+    timings, memory = {}, {}
+    # Baselines are compared again and again; the shared cache maps their decoded pixels instead
+    cache = get_decode_cache() if decode_cache else None
+
+    memo_key = None
+    if memo and os.path.isfile(baseline_path) and os.path.isfile(current_path):
+        with timed(timings, "memo", memory):
+            memo_store = get_result_memo()
+            memo_key = memo_store.key("compare_images", baseline_path, current_path, {
+                "diff_output": diff_output, "highlighted_output": highlighted_output, "log_file": log_file,
+                "output_dir": output_dir, "precheck": precheck,
+                "include": include, "ignore": ignore, "roi_mask": memo_store.file_params(roi_mask)})
+            stored = memo_store.get(memo_key)
+        if stored is not None:
+            record_comparison("compare_images", timings, memory, pair=(baseline_path, current_path))
+            record_result("compare_images", baseline_path, current_path, stored["final_decision"], timings,
+                          ssim=stored["ssim_score"], precheck=stored["precheck"], memo=True)
+            return {**stored, "timings": timings, "memory": memory, "cached": True}
+
+    # --- Step 0: Cheap pre-check; identical pairs skip SSIM, OCR and every file write ---
+    decoded = {}
+    if precheck:
+        with timed(timings, "precheck", memory):
+            tier = precheck_pair(baseline_path, current_path, cache.imread if cache is not None else None, decoded)
+        record_tier(tier or 'full')
+        if tier:
+            record_comparison("compare_images", timings, memory, pair=(baseline_path, current_path))
+            record_result("compare_images", baseline_path, current_path, True, timings, ssim=1.0, precheck=tier)
+            return {
+                "timestamp": str(datetime.now()),
+                "output_dir": None,
+                "ssim_score": 1.0,
+                "diff_image": None,
+                "highlighted_image": None,
+                "ocr_differences": {"removed": [], "added": []},
+                "ocr_result": None,
+                "final_decision": True,
+                "precheck": tier,
+                "roi": None,
+                "regions": [],
+                "timings": timings,
+                "memory": memory,
+                "cached": False
+            }
+
+    # Ensure we have an output directory; the default is unique per test and pabot worker
     if not output_dir:
-        output_dir = os.path.join(str(Path(__file__).resolve().parents[1]), 'output')
+        output_dir = comparison_output_dir()
 
     os.makedirs(output_dir, exist_ok=True)
 
-    # Load images
-    baseline = cv2.imread(baseline_path)
-    current = cv2.imread(current_path)
+    # Load images (unless the pre-check already decoded them)
+    with timed(timings, "load", memory):
+        baseline, current = decoded.get("A"), decoded.get("B")
+        if baseline is None:
+            baseline = cache.imread(baseline_path) if cache is not None else cv2.imread(baseline_path)
+        if current is None:
+            current = cv2.imread(current_path)
 
-    # Ensure both images have the same dimensions
-    if baseline.shape != current.shape:
-        print(f"Resizing current image from {current.shape} to {baseline.shape}")
-        current = cv2.resize(current, (baseline.shape[1], baseline.shape[0]))
+        # Ensure both images have the same dimensions
+        if baseline.shape != current.shape:
+            log(f"Resizing current image from {current.shape} to {baseline.shape}")
+            current = cv2.resize(current, (baseline.shape[1], baseline.shape[0]))
 
-    # Convert to grayscale
-    gray_base = cv2.cvtColor(baseline, cv2.COLOR_BGR2GRAY)
-    gray_curr = cv2.cvtColor(current, cv2.COLOR_BGR2GRAY)
+        # Only the pixels the regions leave are compared
+        roi = build_roi_mask(baseline.shape, include, ignore, roi_mask)
+        bounds = roi_bounds(roi)
+        if roi is not None and bounds is None:
+            raise ValueError("The include/ignore regions leave no pixels to compare")
+        # OCR reads the uncropped images, so its baseline cache always sees full-image coordinates
+        full_baseline, full_current = baseline, current
+        if bounds is not None and bounds != (0, 0, baseline.shape[1], baseline.shape[0]):
+            x, y, w, h = bounds
+            baseline, current, roi = baseline[y:y + h, x:x + w], current[y:y + h, x:x + w], roi[y:y + h, x:x + w]
+        else:
+            bounds = None
+
+        # Convert to grayscale
+        gray_base = cv2.cvtColor(baseline, cv2.COLOR_BGR2GRAY)
+        gray_curr = cv2.cvtColor(current, cv2.COLOR_BGR2GRAY)
+        has_ignored = roi is not None and cv2.countNonZero(roi) < roi.size
+        if has_ignored:
+            gray_curr = neutralise_ignored(gray_base, gray_curr, roi)
 
     # --- Step 1: SSIM Comparison ---
-    score, diff = ssim(gray_base, gray_curr, full=True)
-    print(f"SSIM Score: {score:.4f}")
+    with timed(timings, "ssim", memory):
+        score, diff = ssim(gray_base, gray_curr, full=True)
+        diff = (diff * 255).astype("uint8")
+    log(f"SSIM Score: {score:.4f}")
 
     # Save raw diff heatmap
-    diff = (diff * 255).astype("uint8")
-    cv2.imwrite(os.path.join(output_dir, diff_output), diff)
+    with timed(timings, "encode", memory):
+        atomic_imwrite(os.path.join(output_dir, diff_output), diff)
 
     # Prepare log entries
     log_entries = []
@@ -50,46 +152,59 @@ def compare_images(baseline_path, current_path,
     # Initialize results dictionary
     results = {
         "timestamp": str(datetime.now()),
+        "output_dir": output_dir,
         "ssim_score": float(f'{score:.4f}'),
         "diff_image": diff_output,
         "highlighted_image": None,
         "ocr_differences": {"removed": [], "added": []},  # <-- clean diff format
         "ocr_result": None,
-        "final_decision": None
+        "final_decision": None,
+        "precheck": "full",
+        "roi": bounds,
+        "regions": []
     }
 
     # --- Step 2: Highlight Differences ---
     if score < 1.0:
-        print("⚠️ Differences detected. Highlighting regions...")
+        log("⚠️ Differences detected. Highlighting regions...")
         log_entries.append("Differences detected. Highlighting regions...")
 
-        # Threshold the diff image to find contours
-        thresh = cv2.threshold(diff, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)[1]
-        contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        # Threshold the diff image and label its changed areas
+        with timed(timings, "contours", memory):
+            thresh = cv2.threshold(diff, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)[1]
+            if has_ignored:
+                cv2.bitwise_and(thresh, roi, dst=thresh)
+            regions = regions_from_components(mask_components(thresh), min_area=51)  # ignore tiny noise
+            results["regions"] = regions
 
-        # Draw bounding boxes on the current image
-        highlighted = current.copy()
-        for c in contours:
-            if cv2.contourArea(c) > 50:  # ignore tiny noise
-                (x, y, w, h) = cv2.boundingRect(c)
-                cv2.rectangle(highlighted, (x, y), (x+w, y+h), (0, 0, 255), 2)
+            # Draw bounding boxes on the current image
+            highlighted = draw_regions(current.copy(), regions, color=(0, 0, 255))
+            boxes = [(r["x"], r["y"], r["width"], r["height"]) for r in regions]
 
-        cv2.imwrite(os.path.join(output_dir, highlighted_output), highlighted)
+        with timed(timings, "encode", memory):
+            atomic_imwrite(os.path.join(output_dir, highlighted_output), highlighted)
         log_entries.append(f"Highlighted differences saved to {highlighted_output}")
         results["highlighted_image"] = highlighted_output
 
-        # --- Step 3: OCR Text Extraction ---
-        text_base = extract_clean_text(baseline)
-        text_curr = extract_clean_text(current)
+        # --- Step 3: OCR Text Extraction (changed regions only) ---
+        boxes = merge_boxes(boxes)
+        if sum(w * h for _, _, w, h in boxes) > FULL_PAGE_OCR_RATIO * gray_base.size:
+            boxes = [(0, 0, baseline.shape[1], baseline.shape[0])]
+        if bounds is not None:
+            boxes = [(x + bounds[0], y + bounds[1], w, h) for x, y, w, h in boxes]
+        with timed(timings, "ocr", memory):
+            engine = get_ocr_engine()
+            text_base = engine.extract_regions(full_baseline, boxes, baseline_path=baseline_path)
+            text_curr = engine.extract_regions(full_current, boxes)
 
-        # Compute differences using difflib
-        diff = difflib.ndiff(text_base, text_curr)
+        # Compute differences using difflib, region by region
         removed, added = [], []
-        for line in diff:
-            if line.startswith("- "):
-                removed.append(line[2:])
-            elif line.startswith("+ "):
-                added.append(line[2:])
+        for lines_base, lines_curr in zip(text_base, text_curr):
+            for line in difflib.ndiff(lines_base, lines_curr):
+                if line.startswith("- "):
+                    removed.append(line[2:])
+                elif line.startswith("+ "):
+                    added.append(line[2:])
 
         results["ocr_differences"]["removed"] = removed
         results["ocr_differences"]["added"] = added
@@ -103,34 +218,38 @@ Before: {added}"""
             result_msg = "✅ OCR: No text differences detected."
             results["ocr_result"] = True
 
-        print(result_msg)
+        log(result_msg)
         log_entries.append(result_msg)
 
         # Final decision based on SSIM + OCR
         results["final_decision"] = results["ocr_result"]
     else:
         result_msg = "✅ UI looks identical (SSIM=1.0)."
-        print(result_msg)
+        log(result_msg)
         log_entries.append(result_msg)
         results["final_decision"] = True
 
-    # --- Step 4: Write logs to file (overwrite each run) ---
-    with open(os.path.join(output_dir,log_file), "w", encoding="utf-8") as f:
-        f.write("=== Debug Run ===\n")
-        for entry in log_entries:
-            f.write(entry + "\n")
-        f.write("\n")
+    # --- Step 4: Write logs to file (written atomically; the folder is unique per comparison) ---
+    with timed(timings, "log", memory):
+        atomic_write_text(os.path.join(output_dir, log_file),
+                          "=== Debug Run ===\n" + "".join(entry + "\n" for entry in log_entries) + "\n")
+
+    if memo_key:
+        memo_store.put(memo_key, results, [os.path.join(output_dir, name) for name in
+                                           (results["diff_image"], results["highlighted_image"], log_file) if name])
+    results["timings"] = timings
+    results["memory"] = memory
+    results["cached"] = False
+    record_comparison("compare_images", timings, memory, pair=(baseline_path, current_path))
+    record_result("compare_images", baseline_path, current_path, results["final_decision"], timings,
+                  ssim=results["ssim_score"], precheck='full', ocr_result=results["ocr_result"],
+                  ocr_differences=results["ocr_differences"], roi=bounds, output_dir=output_dir)
 
     # Return dictionary for decision-making
     return results
 
 def extract_clean_text(img):
-    text = pytesseract.image_to_string(img)
-    # Remove unreadable symbols
-    import re
-    lines = [re.sub(r'[^A-Za-z0-9\s]', '', line).strip()
-             for line in text.splitlines() if line.strip()]
-    return lines
+    return get_ocr_engine().extract_text(img)
 
 def find_project_root(start_path=None, markers=None):
     if start_path is None:
@@ -159,12 +278,9 @@ def find_project_root(start_path=None, markers=None):
         cur = parent
 
 
-current_directory = find_project_root()
-baseline_image_path = os.path.join(current_directory, "top_categories_expected.png")
-current_image_path = os.path.join(current_directory, "top_categories_actual.png")
-
-# Example usage
-print(compare_images(baseline_image_path, current_image_path))
-
-
-
+if __name__ == '__main__':
+    # Example usage; importing this module (e.g. as a Robot library) runs nothing
+    current_directory = find_project_root()
+    baseline_image_path = os.path.join(current_directory, "top_categories_expected.png")
+    current_image_path = os.path.join(current_directory, "top_categories_actual.png")
+    print(compare_images(baseline_image_path, current_image_path, verbose=True))
@@ -0,0 +1,96 @@
+import hashlib
+import os
+import threading
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+
+class DecodeCache:
+    """On-disk cache of decoded images as raw ``.npy`` arrays, opened memory-mapped.
+
+    Entries are keyed by the source's absolute path, mtime and size plus the
+    ``cv2.imread`` flags, so a replaced file is decoded afresh. A hit costs a
+    stat and an mmap: the arrays are read-only views of the page cache, which
+    pabot workers on the same host share. Once the folder grows past
+    ``max_bytes`` the least recently used entries are deleted.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def entry_path(self, path: str, flags: int = cv2.IMREAD_COLOR) -> Path:
+        st = os.stat(path)
+        source = f"{os.path.abspath(path)}|{st.st_mtime_ns}|{st.st_size}|{int(flags)}"
+        return self.cache_dir / f"{hashlib.sha256(source.encode('utf-8')).hexdigest()[:32]}.npy"
+
+    def imread(self, path: str, flags: int = cv2.IMREAD_COLOR):
+        """Like ``cv2.imread``, but served from the cache when possible. The result may be read-only."""
+        try:
+            entry = self.entry_path(path, flags)
+        except OSError:
+            return None
+        try:
+            image = np.load(entry, mmap_mode='r')
+        except (OSError, ValueError):
+            image = None
+        if image is not None:
+            try:
+                os.utime(entry)  # mark as recently used for eviction
+            except OSError:
+                pass
+            return image
+
+        image = cv2.imread(path, flags)
+        if image is not None:
+            # Write under a unique temp name and rename, so concurrent workers never map a partial file
+            tmp = entry.with_name(f"{entry.stem}.{os.getpid()}.{threading.get_ident()}.tmp.npy")
+            try:
+                np.save(tmp, image)
+                os.replace(tmp, entry)
+            except OSError:
+                pass  # the decoded image is still good; only caching failed
+            self.evict()
+        return image
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in ``max_bytes``."""
+        with self._lock:
+            entries = []
+            total = 0
+            for entry in os.scandir(self.cache_dir):
+                if not entry.name.endswith('.npy') or '.tmp.' in entry.name:
+                    continue
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry.path))
+                total += st.st_size
+            if total <= self.max_bytes:
+                return
+            for _, size, path in sorted(entries):
+                try:
+                    os.remove(path)  # workers that mapped it keep their pages until they drop the array
+                except OSError:
+                    continue
+                total -= size
+                if total <= self.max_bytes:
+                    break
+
+
+_default_cache = None
+
+
+def get_decode_cache() -> DecodeCache:
+    """Process-wide cache, stored in $IMAGE_COMPARE_CACHE_DIR or <repo>/output/.cache/decoded."""
+    global _default_cache
+    if _default_cache is None:
+        cache_dir = os.environ.get("IMAGE_COMPARE_CACHE_DIR") or os.path.join(
+            str(Path(__file__).resolve().parents[1]), 'output', '.cache')
+        max_bytes = int(os.environ.get("IMAGE_DECODE_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES))
+        _default_cache = DecodeCache(os.path.join(cache_dir, 'decoded'), max_bytes=max_bytes)
+    return _default_cache
@@ -0,0 +1,120 @@
+import hashlib
+import os
+import threading
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def file_digest(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Return the sha256 hex digest of a file's contents."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class FeatureCache:
+    """On-disk cache of ORB keypoints/descriptors for baseline images.
+
+    Entries are keyed by the baseline's content hash plus the ORB parameters and
+    OpenCV version, so an edited baseline or a different ``max_features`` never
+    reuses stale features. Once the folder grows past ``max_bytes`` the least
+    recently used entries are deleted.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._digests = {}  # (path, mtime_ns, size) -> content hash, avoids re-hashing within a process
+        self._lock = threading.Lock()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _digest(self, path: str) -> str:
+        st = os.stat(path)
+        memo_key = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+        digest = self._digests.get(memo_key)
+        if digest is None:
+            digest = self._digests[memo_key] = file_digest(path)
+        return digest
+
+    def entry_path(self, path: str, max_features: int, variant: str = '') -> Path:
+        key = f"{self._digest(path)}_orb{max_features}{variant}_cv{cv2.__version__}"
+        return self.cache_dir / f"{key}.npz"
+
+    def get(self, path: str, max_features: int, variant: str = ''):
+        """Return cached (points, descriptors) for ``path`` or None on a miss.
+        ``variant`` distinguishes features extracted from a transformed copy (e.g. a downscaled one).
+        """
+        entry = self.entry_path(path, max_features, variant)
+        try:
+            with np.load(entry) as data:
+                pts, des = data["pts"], data["des"]
+        except (OSError, KeyError, ValueError):
+            return None
+        try:
+            os.utime(entry)  # mark as recently used for eviction
+        except OSError:
+            pass
+        if des.size == 0:
+            return None, None
+        return pts, des
+
+    def put(self, path: str, max_features: int, pts, des, variant: str = ''):
+        entry = self.entry_path(path, max_features, variant)
+        if des is None:
+            pts, des = np.zeros((0, 2), np.float32), np.zeros((0, 32), np.uint8)
+        # Write under a unique temp name and rename, so concurrent workers never see a partial file
+        tmp = entry.with_name(f"{entry.stem}.{os.getpid()}.{threading.get_ident()}.tmp.npz")
+        np.savez(tmp, pts=pts, des=des)
+        os.replace(tmp, entry)
+        self.evict()
+
+    def get_or_compute(self, path: str, max_features: int, compute, variant: str = ''):
+        """Return cached features for ``path``, calling ``compute()`` and storing its result on a miss."""
+        cached = self.get(path, max_features, variant)
+        if cached is not None:
+            return cached
+        pts, des = compute()
+        self.put(path, max_features, pts, des, variant)
+        return pts, des
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in ``max_bytes``."""
+        with self._lock:
+            entries = []
+            total = 0
+            for entry in os.scandir(self.cache_dir):
+                if not entry.name.endswith('.npz') or '.tmp.' in entry.name:
+                    continue
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry.path))
+                total += st.st_size
+            if total <= self.max_bytes:
+                return
+            for _, size, path in sorted(entries):
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                if total <= self.max_bytes:
+                    break
+
+
+_default_cache = None
+
+
+def get_feature_cache() -> FeatureCache:
+    """Process-wide cache, stored in $IMAGE_COMPARE_CACHE_DIR or <repo>/output/.cache/orb."""
+    global _default_cache
+    if _default_cache is None:
+        cache_dir = os.environ.get("IMAGE_COMPARE_CACHE_DIR") or os.path.join(
+            str(Path(__file__).resolve().parents[1]), 'output', '.cache')
+        max_bytes = int(os.environ.get("IMAGE_COMPARE_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES))
+        _default_cache = FeatureCache(os.path.join(cache_dir, 'orb'), max_bytes=max_bytes)
+    return _default_cache
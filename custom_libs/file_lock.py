@@ -0,0 +1,34 @@
+import os
+import time
+from contextlib import contextmanager
+
+DEFAULT_LOCK_TIMEOUT = 120
+# A lock file older than this belongs to a process that died while holding it
+STALE_LOCK_SECONDS = 300
+
+
+@contextmanager
+def file_lock(path: str, timeout: float = DEFAULT_LOCK_TIMEOUT):
+    """Cross-process lock on one machine: whoever creates ``path`` first holds it."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) > STALE_LOCK_SECONDS:
+                    os.remove(path)
+                    continue
+            except OSError:
+                continue  # released between our checks
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Timed out after {timeout}s waiting for lock {path}")
+            time.sleep(0.05)
+    try:
+        yield
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
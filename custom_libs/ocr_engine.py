@@ -0,0 +1,164 @@
+import json
+import os
+import re
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+try:
+    from .feature_cache import file_digest
+    from .output_paths import atomic_write_text
+except ImportError:
+    from feature_cache import file_digest
+    from output_paths import atomic_write_text
+
+# Used only on Windows when $TESSERACT_CMD is not set and tesseract is not on PATH
+WINDOWS_DEFAULT_TESSERACT = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+
+
+def clean_lines(text: str):
+    """Split OCR output into non-empty lines with unreadable symbols removed."""
+    return [re.sub(r'[^A-Za-z0-9\s]', '', line).strip()
+            for line in text.splitlines() if line.strip()]
+
+
+def tesseract_command():
+    """Resolve the tesseract executable: $TESSERACT_CMD, else PATH, else the Windows default install."""
+    cmd = os.environ.get("TESSERACT_CMD")
+    if cmd:
+        return cmd
+    if sys.platform.startswith("win") and os.path.exists(WINDOWS_DEFAULT_TESSERACT):
+        return WINDOWS_DEFAULT_TESSERACT
+    return "tesseract"
+
+
+def merge_boxes(boxes, gap=8):
+    """Union boxes (x, y, w, h) that overlap or lie within ``gap`` pixels of each other."""
+    merged = [list(b) for b in boxes]
+    changed = True
+    while changed:
+        changed = False
+        out = []
+        for x, y, w, h in merged:
+            for m in out:
+                if x <= m[0] + m[2] + gap and m[0] <= x + w + gap and y <= m[1] + m[3] + gap and m[1] <= y + h + gap:
+                    x2, y2 = max(m[0] + m[2], x + w), max(m[1] + m[3], y + h)
+                    m[0], m[1] = min(m[0], x), min(m[1], y)
+                    m[2], m[3] = x2 - m[0], y2 - m[1]
+                    changed = True
+                    break
+            else:
+                out.append([x, y, w, h])
+        merged = out
+    return sorted((tuple(m) for m in merged), key=lambda b: (b[1], b[0]))
+
+
+class _PytesseractBackend:
+    """One tesseract subprocess per crop; the thread pool keeps several running at once."""
+
+    def __init__(self, config):
+        import pytesseract
+        pytesseract.pytesseract.tesseract_cmd = tesseract_command()
+        self._pytesseract = pytesseract
+        self._config = config
+
+    def image_to_string(self, img):
+        return self._pytesseract.image_to_string(img, config=self._config)
+
+
+class _TesserocrBackend:
+    """Resident tesseract API per worker thread (no process spawn, models loaded once)."""
+
+    def __init__(self, config):
+        import tesserocr
+        from PIL import Image
+        self._tesserocr = tesserocr
+        self._image = Image
+        self._local = threading.local()
+        self._psm = int(re.search(r'--psm\s+(\d+)', config).group(1)) if '--psm' in config else tesserocr.PSM.AUTO
+
+    def image_to_string(self, img):
+        api = getattr(self._local, "api", None)
+        if api is None:
+            api = self._local.api = self._tesserocr.PyTessBaseAPI(psm=self._psm)
+        # tesserocr expects RGB; crops come from OpenCV in BGR
+        api.SetImage(self._image.fromarray(img[:, :, ::-1] if img.ndim == 3 else img))
+        return api.GetUTF8Text()
+
+
+class OcrEngine:
+    """OCR restricted to changed regions, run on a persistent thread pool.
+
+    Uses tesserocr (a resident tesseract API per thread) when it is installed and
+    falls back to pytesseract. Text found in baseline regions is cached per
+    baseline content hash, in memory and under ``cache_dir``, so a baseline
+    region is only read once.
+    """
+
+    def __init__(self, workers: int = None, config: str = "--psm 6", cache_dir: str = None, pad: int = 4):
+        try:
+            self._backend = _TesserocrBackend(config)
+        except ImportError:
+            self._backend = _PytesseractBackend(config)
+        self._pool = ThreadPoolExecutor(max_workers=workers or min(4, os.cpu_count() or 1),
+                                        thread_name_prefix="ocr")
+        self._pad = pad
+        self._memory = {}  # baseline digest -> {"x,y,w,h": lines}
+        self._cache_dir = Path(cache_dir or os.environ.get("IMAGE_COMPARE_CACHE_DIR") or
+                               os.path.join(str(Path(__file__).resolve().parents[1]), 'output', '.cache')) / 'ocr'
+
+    def _crop(self, img, box):
+        x, y, w, h = box
+        p = self._pad
+        return img[max(0, y - p):y + h + p, max(0, x - p):x + w + p]
+
+    def _read(self, img, boxes):
+        crops = [self._crop(img, box) for box in boxes]
+        return [clean_lines(text) for text in self._pool.map(self._backend.image_to_string, crops)]
+
+    def extract_text(self, img):
+        """OCR the whole image (one call, no region scoping)."""
+        return clean_lines(self._backend.image_to_string(img))
+
+    def extract_regions(self, img, boxes, baseline_path: str = None):
+        """Return the cleaned text lines of each box, in box order.
+
+        With ``baseline_path`` the result is cached under the file's content hash.
+        """
+        if not baseline_path:
+            return self._read(img, boxes)
+
+        digest = file_digest(baseline_path)
+        cached = self._memory.get(digest)
+        if cached is None:
+            cache_file = self._cache_dir / f"{digest}.json"
+            try:
+                with open(cache_file, encoding="utf-8") as f:
+                    cached = json.load(f)
+            except (OSError, ValueError):
+                cached = {}
+            self._memory[digest] = cached
+
+        keys = [",".join(map(str, box)) for box in boxes]
+        missing = [box for box, key in zip(boxes, keys) if key not in cached]
+        if missing:
+            for box, lines in zip(missing, self._read(img, missing)):
+                cached[",".join(map(str, box))] = lines
+            self._cache_dir.mkdir(parents=True, exist_ok=True)
+            atomic_write_text(str(self._cache_dir / f"{digest}.json"), json.dumps(cached))
+        return [cached[key] for key in keys]
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+
+
+_engine = None
+
+
+def get_ocr_engine() -> OcrEngine:
+    """Process-wide engine, created on first use."""
+    global _engine
+    if _engine is None:
+        _engine = OcrEngine()
+    return _engine
@@ -0,0 +1,113 @@
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+
+import cv2
+
+DEFAULT_OUTPUT_ROOT = os.path.join(str(Path(__file__).resolve().parents[1]), 'output')
+DEFAULT_RETENTION_DAYS = 7
+DEFAULT_KEEP_RUNS = 20
+
+# Leaf folder name of a namespaced comparison: <UTC timestamp>-<pid>-<random>
+RUN_DIR_PATTERN = re.compile(r'^\d{8}T\d{6}-\d+-[0-9a-f]{8}$')
+
+_cleaned_roots = set()
+
+
+def _robot_variable(name):
+    try:
+        from robot.libraries.BuiltIn import BuiltIn
+        return BuiltIn().get_variable_value(name)
+    except Exception:  # Robot not installed or not running
+        return None
+
+
+def safe_name(name: str) -> str:
+    return re.sub(r'[^\w\-_\.]', '_', str(name)).strip('._') or 'unnamed'
+
+
+def worker_id() -> str:
+    """Identify the pabot process: ${PABOTEXECUTIONPOOLID} when run under pabot, else 'main'."""
+    pool_id = _robot_variable('${PABOTEXECUTIONPOOLID}') or os.environ.get('PABOTEXECUTIONPOOLID')
+    return f"pabot{pool_id}" if pool_id not in (None, '') else 'main'
+
+
+def comparison_output_dir(root: str = None, test_name: str = None) -> str:
+    """Create and return a collision-free folder for one comparison's artifacts.
+
+    Layout: <root>/<worker>/<test name>/<timestamp>-<pid>-<random>. The test name
+    defaults to Robot's ${TEST NAME} (or ${SUITE NAME} outside a test). The first
+    call per root in a process also applies the retention policy (see cleanup_output).
+    """
+    root = root or os.environ.get('IMAGE_COMPARE_OUTPUT_ROOT') or DEFAULT_OUTPUT_ROOT
+    test_name = test_name or _robot_variable('${TEST NAME}') or _robot_variable('${SUITE NAME}') or 'adhoc'
+
+    if root not in _cleaned_roots:
+        _cleaned_roots.add(root)
+        cleanup_output(root)
+
+    run = f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+    path = os.path.join(root, worker_id(), safe_name(test_name), run)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _temp_path(path: str) -> str:
+    # Keep the real extension last: cv2.imwrite picks the encoder from it
+    base, ext = os.path.splitext(path)
+    return f"{base}.tmp-{os.getpid()}-{threading.get_ident()}{ext}"
+
+
+def atomic_imwrite(path: str, image, params=None) -> bool:
+    """cv2.imwrite through a temp file + rename, so readers never see a half-written image."""
+    tmp = _temp_path(path)
+    ok = cv2.imwrite(tmp, image, params or [])
+    if ok:
+        os.replace(tmp, path)
+    elif os.path.exists(tmp):
+        os.remove(tmp)
+    return ok
+
+
+def atomic_write_text(path: str, text: str):
+    tmp = _temp_path(path)
+    with open(tmp, 'w', encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def cleanup_output(root: str = None, max_age_days: float = None, keep_runs: int = None) -> int:
+    """Delete old namespaced comparison folders under root and return how many were removed.
+
+    A run folder is removed when it is older than ``max_age_days`` or when its test
+    already has ``keep_runs`` newer runs. Defaults come from $IMAGE_COMPARE_RETENTION_DAYS
+    and $IMAGE_COMPARE_KEEP_RUNS. Only folders created by comparison_output_dir are touched.
+    """
+    root = root or os.environ.get('IMAGE_COMPARE_OUTPUT_ROOT') or DEFAULT_OUTPUT_ROOT
+    if max_age_days is None:
+        max_age_days = float(os.environ.get('IMAGE_COMPARE_RETENTION_DAYS', DEFAULT_RETENTION_DAYS))
+    if keep_runs is None:
+        keep_runs = int(os.environ.get('IMAGE_COMPARE_KEEP_RUNS', DEFAULT_KEEP_RUNS))
+
+    cutoff = time.time() - float(max_age_days) * 86400
+    removed = 0
+    for worker_dir in Path(root).glob('*'):
+        if not worker_dir.is_dir() or worker_dir.name.startswith('.'):
+            continue
+        for test_dir in worker_dir.iterdir():
+            if not test_dir.is_dir():
+                continue
+            runs = sorted((d for d in test_dir.iterdir() if d.is_dir() and RUN_DIR_PATTERN.match(d.name)),
+                          key=lambda d: d.name, reverse=True)
+            for index, run in enumerate(runs):
+                try:
+                    if index >= int(keep_runs) or run.stat().st_mtime < cutoff:
+                        shutil.rmtree(run)
+                        removed += 1
+                except OSError:
+                    continue  # another worker removed it first
+    return removed
@@ -0,0 +1,58 @@
+import os
+from collections import Counter
+
+import cv2
+import numpy as np
+
+try:
+    from .feature_cache import file_digest
+except ImportError:
+    from feature_cache import file_digest
+
+# Tiers in the order they are tried; 'full' means the pair had to be compared
+PRECHECK_TIERS = ('content_hash', 'decoded_pixels', 'full')
+
+_stats = Counter()
+
+
+def precheck_pair(pathA: str, pathB: str, imread=None, decoded: dict = None):
+    """Prove two screenshots identical without running the full diff.
+
+    Both tiers are lossless: any shortcut such as comparing downscaled thumbnails
+    can hide a one-character text change.
+
+    - 'content_hash': the files are byte-identical (sizes are compared before hashing).
+    - 'decoded_pixels': the files differ but decode to the same BGR pixels, the way
+      the comparison reads them, e.g. one screenshot saved with another PNG
+      compression level or extra metadata.
+
+    ``imread`` decodes ``pathA`` (e.g. ``DecodeCache.imread``, default ``cv2.imread``).
+    When ``decoded`` is a dict, the decoded images are stored in it under 'A' and 'B'
+    so the caller does not decode them again. Returns the tier, or None when the pair
+    has to be compared.
+    """
+    try:
+        if os.path.getsize(pathA) == os.path.getsize(pathB) and file_digest(pathA) == file_digest(pathB):
+            return 'content_hash'
+    except OSError:
+        return None
+    imgA = (imread or cv2.imread)(pathA, cv2.IMREAD_COLOR)
+    imgB = cv2.imread(pathB, cv2.IMREAD_COLOR)
+    if decoded is not None:
+        decoded.update(A=imgA, B=imgB)
+    if imgA is not None and imgB is not None and imgA.shape == imgB.shape and np.array_equal(imgA, imgB):
+        return 'decoded_pixels'
+    return None
+
+
+def record_tier(tier: str):
+    _stats[tier] += 1
+
+
+def precheck_stats() -> dict:
+    """How many comparisons each tier resolved in this process, e.g. {'content_hash': 40, 'full': 3}."""
+    return {tier: _stats.get(tier, 0) for tier in PRECHECK_TIERS}
+
+
+def reset_precheck_stats():
+    _stats.clear()
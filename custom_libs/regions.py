@@ -0,0 +1,57 @@
+import cv2
+import numpy as np
+
+# Above this many components, tint the window around all changes at once instead of box by box
+MAX_TINT_BOXES = 256
+
+
+def mask_components(mask, connectivity: int = 8):
+    """Connected components of a binary uint8 mask as an (n, 5) int array of x, y, w, h, pixel count.
+
+    Labelling only runs over the bounding rect of the nonzero pixels, so a small
+    change on a tall page never allocates a full-frame label image. Coordinates
+    are those of ``mask``. The background is not included.
+    """
+    x, y, w, h = cv2.boundingRect(mask)
+    if w == 0 or h == 0:
+        return np.empty((0, 5), np.int32)
+    _, _, stats, _ = cv2.connectedComponentsWithStats(mask[y:y + h, x:x + w], connectivity=connectivity)
+    stats = stats[1:].copy()
+    stats[:, cv2.CC_STAT_LEFT] += x
+    stats[:, cv2.CC_STAT_TOP] += y
+    return stats
+
+
+def regions_from_components(stats, min_area: int = 0) -> list:
+    """Components with at least ``min_area`` changed pixels as dicts of x, y, width, height and changed_pixels.
+
+    The dicts use `Get BoundingBox` keys, so a region can be passed back as an ``ignore`` region.
+    """
+    kept = stats[stats[:, cv2.CC_STAT_AREA] >= min_area]
+    return [{"x": int(x), "y": int(y), "width": int(w), "height": int(h), "changed_pixels": int(area)}
+            for x, y, w, h, area in kept.tolist()]
+
+
+def tint_components(image, mask, stats, color=(0, 0, 255), alpha=0.4):
+    """Blend ``color`` into ``image`` (in place) where ``mask`` is 255. Only the components' boxes are read or written."""
+    if not len(stats):
+        return image
+    if len(stats) > MAX_TINT_BOXES:
+        x0, y0 = stats[:, 0].min(), stats[:, 1].min()
+        x1, y1 = (stats[:, 0] + stats[:, 2]).max(), (stats[:, 1] + stats[:, 3]).max()
+        boxes = [(x0, y0, x1 - x0, y1 - y0)]
+    else:
+        boxes = stats[:, :4].tolist()
+    tint = np.array(color, np.float32) * alpha
+    for x, y, w, h in boxes:
+        window = image[y:y + h, x:x + w]
+        changed = mask[y:y + h, x:x + w] == 255
+        window[changed] = np.clip(window[changed] * (1 - alpha) + tint, 0, 255).astype(image.dtype)
+    return image
+
+
+def draw_regions(image, regions, color=(0, 255, 0), thickness=2):
+    """Draw every region's box on ``image`` in place."""
+    for r in regions:
+        cv2.rectangle(image, (r["x"], r["y"]), (r["x"] + r["width"], r["y"] + r["height"]), color, thickness)
+    return image
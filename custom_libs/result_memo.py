@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+import threading
+from collections import Counter
+from pathlib import Path
+
+try:
+    from .feature_cache import file_digest
+except ImportError:
+    from feature_cache import file_digest
+
+DEFAULT_MAX_ENTRIES = 5000
+# Eviction trims the memo to this share of max_entries, so the folder is only scanned once per that many puts
+EVICT_TO = 0.9
+# Bump when the stored result layout or the comparison semantics change
+MEMO_VERSION = 3
+
+_stats = Counter()
+
+
+def _fingerprint(path: str):
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size]
+
+
+class ResultMemo:
+    """Persistent memo of comparison outcomes, keyed by what the outcome depends on.
+
+    The key is the content hash of both images plus the comparison source and
+    every parameter that affects the result, so an unchanged pair with unchanged
+    settings gets its stored result back without decoding anything. Each entry
+    also records the mtime and size of the artifact files it refers to; once any
+    of them is deleted or overwritten (e.g. by another comparison reusing the
+    same output folder) the entry counts as a miss. Once more than
+    ``max_entries`` are stored, the least recently used ones are deleted.
+    """
+
+    def __init__(self, cache_dir: str, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.cache_dir = Path(cache_dir)
+        self.max_entries = max_entries
+        self._digests = {}  # (path, mtime_ns, size) -> content hash, avoids re-hashing within a process
+        self._count = None  # entries on disk, counted on the first put and kept up to date afterwards
+        self._lock = threading.Lock()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _digest(self, path: str) -> str:
+        st = os.stat(path)
+        memo_key = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+        digest = self._digests.get(memo_key)
+        if digest is None:
+            digest = self._digests[memo_key] = file_digest(path)
+        return digest
+
+    def key(self, source: str, pathA: str, pathB: str, params: dict) -> str:
+        """Memo key for comparing the files at pathA and pathB with ``params`` (JSON-serialisable)."""
+        identity = {"v": MEMO_VERSION, "source": source, "a": self._digest(pathA), "b": self._digest(pathB),
+                    "params": params}
+        return hashlib.sha256(json.dumps(identity, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def file_params(self, path) -> str:
+        """Stand-in for a file-valued parameter (e.g. a mask image): its content hash."""
+        return self._digest(path) if isinstance(path, str) and os.path.isfile(path) else path
+
+    def get(self, key: str):
+        """Return the stored result for ``key``, or None if there is none or its artifacts changed."""
+        entry = self.cache_dir / f"{key}.json"
+        try:
+            with open(entry, encoding='utf-8') as f:
+                stored = json.load(f)
+            fresh = all(_fingerprint(path) == fingerprint for path, fingerprint in stored["artifacts"].items())
+        except (OSError, ValueError, KeyError):
+            fresh = False
+        if not fresh:
+            _stats["misses"] += 1
+            return None
+        try:
+            os.utime(entry)  # mark as recently used for eviction
+        except OSError:
+            pass
+        _stats["hits"] += 1
+        return stored["result"]
+
+    def put(self, key: str, result: dict, artifact_paths=()):
+        """Store ``result``. ``artifact_paths`` are the files it refers to; call once they are written.
+
+        Nothing is stored when one of them is missing, e.g. because its write failed.
+        """
+        try:
+            artifacts = {path: _fingerprint(path) for path in artifact_paths}
+        except OSError:
+            return
+        entry = self.cache_dir / f"{key}.json"
+        existed = entry.exists()
+        # Write under a unique temp name and rename, so concurrent workers never read a partial file
+        tmp = entry.with_name(f"{key}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({"result": result, "artifacts": artifacts}, f, default=str)
+        os.replace(tmp, entry)
+        with self._lock:
+            if self._count is None:
+                self._count = sum(1 for e in os.scandir(self.cache_dir) if e.name.endswith('.json'))
+            elif not existed:
+                self._count += 1
+            full = self._count > self.max_entries
+        if full:
+            self.evict()
+
+    def evict(self):
+        """Delete least recently used entries until at most ``EVICT_TO`` of ``max_entries`` remain."""
+        with self._lock:
+            entries = [(e.stat().st_mtime, e.path) for e in os.scandir(self.cache_dir) if e.name.endswith('.json')]
+            keep = int(self.max_entries * EVICT_TO)
+            removed = 0
+            for _, path in sorted(entries)[:max(0, len(entries) - keep)]:
+                try:
+                    os.remove(path)
+                    removed += 1
+                except OSError:
+                    continue
+            self._count = len(entries) - removed
+
+
+_default_memo = None
+
+
+def get_result_memo() -> ResultMemo:
+    """Process-wide memo, stored in $IMAGE_COMPARE_CACHE_DIR or <repo>/output/.cache/results."""
+    global _default_memo
+    if _default_memo is None:
+        cache_dir = os.environ.get("IMAGE_COMPARE_CACHE_DIR") or os.path.join(
+            str(Path(__file__).resolve().parents[1]), 'output', '.cache')
+        max_entries = int(os.environ.get("IMAGE_COMPARE_MEMO_MAX_ENTRIES", DEFAULT_MAX_ENTRIES))
+        _default_memo = ResultMemo(os.path.join(cache_dir, 'results'), max_entries=max_entries)
+    return _default_memo
+
+
+def memo_stats() -> dict:
+    """Memo hits and misses in this process, e.g. {'hits': 40, 'misses': 3}."""
+    return {"hits": _stats.get("hits", 0), "misses": _stats.get("misses", 0)}
+
+
+def reset_memo_stats():
+    _stats.clear()
@@ -0,0 +1,205 @@
+"""Append-only JSON-lines log of image comparison results, one file per process.
+
+Usage: python custom_libs/result_sink.py <results dir> [--merge merged.jsonl] [--top 10]
+"""
+import argparse
+import glob
+import heapq
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+try:
+    from .output_paths import DEFAULT_OUTPUT_ROOT, _robot_variable, worker_id
+except ImportError:
+    from output_paths import DEFAULT_OUTPUT_ROOT, _robot_variable, worker_id
+
+RESULT_FILE_PATTERN = 'results_*.jsonl'
+# Upper edges of the changed-percent histogram buckets; the last bucket is open-ended
+CHANGED_PERCENT_BUCKETS = (0.0, 0.1, 1.0, 5.0, 25.0)
+
+
+def results_dir() -> str:
+    """$IMAGE_COMPARE_RESULTS_DIR, else ${OUTPUT_DIR}/comparison_results under Robot, else <repo>/output/results."""
+    configured = os.environ.get('IMAGE_COMPARE_RESULTS_DIR')
+    if configured:
+        return configured
+    output_dir = _robot_variable('${OUTPUT_DIR}')
+    if output_dir:
+        return os.path.join(output_dir, 'comparison_results')
+    return os.path.join(DEFAULT_OUTPUT_ROOT, 'results')
+
+
+class ResultSink:
+    """Appends one JSON object per comparison to <directory>/results_<worker>_<pid>.jsonl.
+
+    Every process has its own file, so pabot workers and batch pool processes never
+    interleave lines; ``merge_results`` combines them afterwards.
+    """
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"results_{worker_id()}_{os.getpid()}.jsonl")
+        self._lock = threading.Lock()
+
+    def write(self, record: dict):
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line)
+
+
+_sinks = {}
+
+
+def get_result_sink(directory: str = None) -> ResultSink:
+    directory = directory or results_dir()
+    # A forked pool worker must not append to its parent's file
+    key = (directory, os.getpid())
+    if key not in _sinks:
+        _sinks[key] = ResultSink(directory)
+    return _sinks[key]
+
+
+def record_result(source: str, baseline: str, actual: str, passed: bool, timings: dict, **fields):
+    """Log one comparison. ``duration_s`` is the sum of its top-level stages (names without a dot)."""
+    record = {
+        "ts": time.time(),
+        "source": source,
+        "worker": worker_id(),
+        "pid": os.getpid(),
+        "test": _robot_variable('${TEST NAME}'),
+        "baseline": str(baseline),
+        "actual": str(actual),
+        "passed": bool(passed),
+        "duration_s": sum(seconds for stage, seconds in timings.items() if '.' not in stage),
+        **fields,
+        "timings": timings,
+    }
+    try:
+        get_result_sink().write(record)
+    except OSError as e:
+        print(f"WARNING: Failed to log comparison result: {e}")
+
+
+def result_files(directory: str) -> list:
+    return sorted(glob.glob(os.path.join(directory, RESULT_FILE_PATTERN)))
+
+
+def iter_results(*paths):
+    """Yield the records of every given file, or of every per-worker file of a given directory."""
+    for path in paths:
+        files = result_files(path) if os.path.isdir(path) else [path]
+        for file in files:
+            with open(file, encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+
+
+def merge_results(directory: str, merged_path: str = None) -> str:
+    """Combine the per-worker files of ``directory`` into one file ordered by time and return its path."""
+    merged_path = merged_path or os.path.join(directory, 'results.jsonl')
+    records = sorted(iter_results(*result_files(directory)), key=lambda r: r["ts"])
+    tmp = f"{merged_path}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, default=str) + "\n")
+    os.replace(tmp, merged_path)
+    return merged_path
+
+
+def summarize_results(*paths, top_n: int = 10) -> dict:
+    """Totals, failure rates per source, the slowest pairs and the changed-percent distribution.
+
+    Streams the records, so memory stays flat over thousands of comparisons.
+    """
+    total, failed = 0, 0
+    by_source = {}
+    precheck = {}
+    slowest = []  # min-heap of (duration, n, record summary)
+    buckets = [0] * (len(CHANGED_PERCENT_BUCKETS) + 1)
+    changed_sum, changed_max = 0.0, 0.0
+    for n, record in enumerate(iter_results(*paths)):
+        total += 1
+        failed += not record["passed"]
+        source = by_source.setdefault(record["source"], {"comparisons": 0, "failed": 0, "total_s": 0.0})
+        source["comparisons"] += 1
+        source["failed"] += not record["passed"]
+        source["total_s"] += record["duration_s"]
+        tier = record.get("precheck") or 'full'
+        precheck[tier] = precheck.get(tier, 0) + 1
+
+        changed = record.get("changed_percent")
+        if changed is not None:
+            changed_sum += changed
+            changed_max = max(changed_max, changed)
+            buckets[next((i for i, edge in enumerate(CHANGED_PERCENT_BUCKETS) if changed <= edge),
+                         len(CHANGED_PERCENT_BUCKETS))] += 1
+
+        entry = (record["duration_s"], n, {"baseline": record["baseline"], "actual": record["actual"],
+                                           "test": record.get("test"), "duration_s": record["duration_s"]})
+        if len(slowest) < top_n:
+            heapq.heappush(slowest, entry)
+        else:
+            heapq.heappushpop(slowest, entry)
+
+    for source in by_source.values():
+        source["failure_rate"] = source["failed"] / source["comparisons"]
+    edges = ("0",) + tuple(f"<={edge:g}" for edge in CHANGED_PERCENT_BUCKETS[1:]) + \
+        (f">{CHANGED_PERCENT_BUCKETS[-1]:g}",)
+    with_changed = sum(buckets)
+    return {
+        "comparisons": total,
+        "failed": failed,
+        "failure_rate": failed / total if total else 0.0,
+        "by_source": by_source,
+        "precheck": precheck,
+        "slowest": [item for _, _, item in sorted(slowest, reverse=True)],
+        "changed_percent": {
+            "mean": changed_sum / with_changed if with_changed else 0.0,
+            "max": changed_max,
+            "histogram": dict(zip(edges, buckets)),
+        },
+    }
+
+
+def format_summary(summary: dict) -> str:
+    lines = [f"{summary['comparisons']} comparisons, {summary['failed']} failed "
+             f"({summary['failure_rate']:.1%})"]
+    for name, source in sorted(summary["by_source"].items()):
+        lines.append(f"  {name}: {source['comparisons']} compared, {source['failure_rate']:.1%} failed, "
+                     f"{source['total_s']:.2f}s")
+    lines.append("  Pre-check tiers: " + ", ".join(f"{k}={v}" for k, v in sorted(summary["precheck"].items())))
+    changed = summary["changed_percent"]
+    lines.append(f"  Changed percent: mean {changed['mean']:.3f}%, max {changed['max']:.3f}%")
+    lines += [f"    {edge:>6}%  {count}" for edge, count in changed["histogram"].items()]
+    if summary["slowest"]:
+        lines.append("  Slowest pairs:")
+        lines += [f"    {item['duration_s']:9.3f}s  {item['baseline']} vs {item['actual']}" for item in summary["slowest"]]
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('directory', nargs='?', default=None, help="results folder (default: see results_dir)")
+    parser.add_argument('--merge', help="also write every worker's records, ordered by time, to this file")
+    parser.add_argument('--top', type=int, default=10, help="how many of the slowest pairs to list")
+    parser.add_argument('--json', action='store_true', help="print the summary as JSON")
+    args = parser.parse_args(argv)
+
+    directory = args.directory or results_dir()
+    if not Path(directory).is_dir():
+        print(f"No results folder at {directory}")
+        return 1
+    if args.merge:
+        print(f"Merged results into {merge_results(directory, args.merge)}")
+    summary = summarize_results(directory, top_n=args.top)
+    print(json.dumps(summary, indent=2) if args.json else format_summary(summary))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
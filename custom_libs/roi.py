@@ -0,0 +1,82 @@
+import cv2
+import numpy as np
+
+
+def parse_regions(regions):
+    """Normalise regions to a list of (x, y, w, h) int tuples.
+
+    Accepts None, a single region or a list of them. A region is an (x, y, w, h)
+    sequence, a dict with x/y/width/height (what Browser's `Get BoundingBox`
+    returns) or a "x,y,w,h" string; several strings may be joined with ';'.
+    """
+    if regions is None or regions == '':
+        return []
+    if isinstance(regions, str):
+        return [parse_region(part) for part in regions.split(';') if part.strip()]
+    if isinstance(regions, dict) or (len(regions) == 4 and all(isinstance(v, (int, float)) for v in regions)):
+        return [parse_region(regions)]
+    return [parse_region(region) for region in regions]
+
+
+def parse_region(region):
+    if isinstance(region, dict):
+        values = (region["x"], region["y"], region["width"], region["height"])
+    elif isinstance(region, str):
+        values = region.split(',')
+    else:
+        values = region
+    if len(values) != 4:
+        raise ValueError(f"A region needs x, y, width and height, got: {region!r}")
+    x, y, w, h = (int(round(float(v))) for v in values)
+    return x, y, w, h
+
+
+def build_roi_mask(shape, include=None, ignore=None, mask_image=None):
+    """Return a uint8 mask of the pixels to compare (255) for an image of ``shape``, or None for all of them.
+
+    ``include`` rectangles select pixels (everything when empty), ``ignore`` ones
+    and the black pixels of ``mask_image`` (a path or an array, resized to the
+    image) drop them again.
+    """
+    include, ignore = parse_regions(include), parse_regions(ignore)
+    if not include and not ignore and mask_image is None:
+        return None
+    height, width = shape[:2]
+    if include:
+        roi = np.zeros((height, width), np.uint8)
+        for x, y, w, h in include:
+            roi[max(0, y):max(0, y + h), max(0, x):max(0, x + w)] = 255
+    else:
+        roi = np.full((height, width), 255, np.uint8)
+    for x, y, w, h in ignore:
+        roi[max(0, y):max(0, y + h), max(0, x):max(0, x + w)] = 0
+    if mask_image is not None:
+        if isinstance(mask_image, str):
+            path, mask_image = mask_image, cv2.imread(mask_image, cv2.IMREAD_GRAYSCALE)
+            if mask_image is None:
+                raise FileNotFoundError(f"ROI mask image not found or could not be opened: {path}")
+        elif mask_image.ndim == 3:
+            mask_image = cv2.cvtColor(mask_image, cv2.COLOR_BGR2GRAY)
+        if mask_image.shape != (height, width):
+            mask_image = cv2.resize(mask_image, (width, height), interpolation=cv2.INTER_NEAREST)
+        roi[mask_image == 0] = 0
+    return roi
+
+
+def roi_bounds(roi):
+    """Bounding rect (x, y, w, h) of the compared pixels, or None if the mask selects nothing."""
+    if roi is None:
+        return None
+    return cv2.boundingRect(roi) if cv2.countNonZero(roi) else None
+
+
+def neutralise_ignored(imgA, imgB, roi):
+    """Copy imgA into imgB wherever the ROI mask is 0, so ignored pixels produce no diff at all.
+
+    Works on grayscale or BGR pairs. Returns imgB, copied first if it is read-only.
+    """
+    if not imgB.flags.writeable:
+        imgB = imgB.copy()
+    ignored = roi == 0
+    np.copyto(imgB, imgA, where=ignored[..., None] if imgB.ndim == 3 else ignored)
+    return imgB
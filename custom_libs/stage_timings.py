@@ -0,0 +1,52 @@
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+
+# Comparisons recorded in this process and not yet collected by the SimpleLogger listener
+MAX_PENDING_RECORDS = 1000
+_records = deque(maxlen=MAX_PENDING_RECORDS)
+
+# Running peak of each open stage whose tracemalloc peak was reset by a nested stage
+_open_peaks = []
+
+
+@contextmanager
+def timed(timings, stage, memory=None):
+    """Add the wall time of the enclosed block to ``timings[stage]`` (seconds), if timings is a dict.
+
+    When ``memory`` is a dict and tracemalloc is tracing, ``memory[stage]`` also
+    gets the block's peak traced allocation in bytes, above what was allocated on entry.
+    Stages may nest ("align" around "align.detect"); each keeps its own peak.
+    """
+    track = memory is not None and tracemalloc.is_tracing()
+    if track:
+        base, peak = tracemalloc.get_traced_memory()
+        if _open_peaks:
+            _open_peaks[-1] = max(_open_peaks[-1], peak)
+        if hasattr(tracemalloc, 'reset_peak'):  # Python 3.9+; older versions over-report
+            tracemalloc.reset_peak()
+        _open_peaks.append(0)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - start
+        if track:
+            peak = max(_open_peaks.pop(), tracemalloc.get_traced_memory()[1])
+            memory[stage] = max(memory.get(stage, 0), peak - base)
+            if _open_peaks:
+                _open_peaks[-1] = max(_open_peaks[-1], peak)
+
+
+def record_comparison(source: str, timings: dict, memory: dict = None, **extra):
+    """Queue one comparison's stage timings (seconds) and peak allocations (bytes) for the listener."""
+    _records.append({"source": source, "timings": dict(timings), "memory": dict(memory or {}), **extra})
+
+
+def drain_comparisons() -> list:
+    """Return and forget every comparison recorded since the last call."""
+    drained = list(_records)
+    _records.clear()
+    return drained
@@ -0,0 +1,139 @@
+"""Rolling per-test duration history and a longest-first pabot ordering built from it.
+
+Usage: python listeners/duration_history.py tests/ --processes 3 --output .pabot_order
+       pabot --testlevelsplit --processes 3 --ordering .pabot_order -d results tests/
+"""
+import argparse
+import heapq
+import json
+import os
+import statistics
+import sys
+from pathlib import Path
+
+try:
+    from custom_libs.file_lock import file_lock
+except ImportError:
+    # Loaded by path: the repository root is not importable yet
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+    from custom_libs.file_lock import file_lock
+
+# Runs kept per test; the estimate is their median, so one slow outlier does not reorder the run
+HISTORY_WINDOW = 10
+# Tests tagged "shared-setup:<name>" are scheduled as one block, in one pabot process
+GROUP_TAG_PREFIX = 'shared-setup:'
+DEFAULT_HISTORY_PATH = os.path.join(str(Path(__file__).resolve().parents[1]), 'output', 'test_durations.json')
+
+
+def history_path() -> str:
+    """$TEST_DURATION_HISTORY, else <repo>/output/test_durations.json."""
+    return os.environ.get('TEST_DURATION_HISTORY') or DEFAULT_HISTORY_PATH
+
+
+class DurationHistory:
+    """JSON store of the last ``window`` durations (seconds) of every test, keyed by its full name.
+
+    ``record`` only buffers; ``flush`` merges the buffer into the file under a lock,
+    so pabot workers finishing at the same time never lose each other's runs.
+    """
+
+    def __init__(self, path: str = None, window: int = HISTORY_WINDOW):
+        self.path = path or history_path()
+        self.window = window
+        self._pending = []
+
+    def load(self) -> dict:
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def record(self, test: str, seconds: float):
+        self._pending.append((test, round(seconds, 3)))
+
+    def flush(self):
+        if not self._pending:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with file_lock(f"{self.path}.lock"):
+            history = self.load()
+            for test, seconds in self._pending:
+                history[test] = (history.get(test, []) + [seconds])[-self.window:]
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(history, f, indent=1, sort_keys=True)
+            os.replace(tmp, self.path)
+        self._pending = []
+
+    def estimates(self) -> dict:
+        """Expected duration of every recorded test: the median of its window."""
+        return {test: statistics.median(runs) for test, runs in self.load().items() if runs}
+
+
+def discover_tests(*paths) -> list:
+    """(full name, tags) of every test under ``paths``, named the way pabot's ``--test`` expects."""
+    from robot.api import TestSuite
+    suite = TestSuite.from_file_system(*paths)
+    return [(getattr(test, 'full_name', None) or test.longname, list(test.tags)) for test in suite.all_tests]
+
+
+def schedule(tests, estimates: dict, default: float = None) -> list:
+    """Longest-processing-time-first order of the tests as (seconds, [test names]) blocks.
+
+    Tests sharing a ``shared-setup:<name>`` tag form one block, costed at their sum.
+    Tests without history cost ``default``, by default the median of the known ones.
+    """
+    known = [estimates[name] for name, _ in tests if name in estimates]
+    if default is None:
+        default = statistics.median(known) if known else 1.0
+    blocks = {}
+    for name, tags in tests:
+        group = next((tag[len(GROUP_TAG_PREFIX):] for tag in tags if tag.startswith(GROUP_TAG_PREFIX)), None)
+        blocks.setdefault(group or ('test', name), []).append(name)
+    costed = [(sum(estimates.get(name, default) for name in names), names) for names in blocks.values()]
+    # pabot hands the next block to whichever process frees up first, which makes this order LPT
+    return sorted(costed, key=lambda block: (-block[0], block[1]))
+
+
+def predicted_wall_time(blocks, processes: int) -> float:
+    """Wall time if each block goes to the first free process, in the given order."""
+    finish = [0.0] * max(1, processes)
+    for seconds, _ in blocks:
+        heapq.heapreplace(finish, finish[0] + seconds)
+    return max(finish)
+
+
+def format_ordering(blocks) -> str:
+    """pabot ``--ordering`` file: one ``--test`` line per test, groups wrapped in ``{ }``."""
+    lines = []
+    for _, names in blocks:
+        if len(names) > 1:
+            lines += ['{'] + [f"--test {name}" for name in names] + ['}']
+        else:
+            lines.append(f"--test {names[0]}")
+    return "\n".join(lines) + "\n"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('paths', nargs='+', help="suite files or folders, as given to pabot")
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1, help="pabot --processes")
+    parser.add_argument('--history', default=None, help="duration history (default: see history_path)")
+    parser.add_argument('--output', default='.pabot_order', help="ordering file to write")
+    args = parser.parse_args(argv)
+
+    estimates = DurationHistory(args.history).estimates()
+    blocks = schedule(discover_tests(*args.paths), estimates)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        f.write(format_ordering(blocks))
+    total = sum(seconds for seconds, _ in blocks)
+    ideal = max(total / max(1, args.processes), max((seconds for seconds, _ in blocks), default=0.0))
+    print(f"Wrote {len(blocks)} blocks to {args.output} ({len(estimates)} tests with history)")
+    print(f"Predicted wall time {predicted_wall_time(blocks, args.processes):.1f}s "
+          f"on {args.processes} processes; lower bound {ideal:.1f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
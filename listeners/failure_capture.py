@@ -0,0 +1,92 @@
+import os
+import queue
+import re
+import threading
+from datetime import timedelta
+
+# Selector Browser names in the failure message, e.g. "... waiting for locator('#submit') ..."
+FAILING_SELECTOR = re.compile(r"locator\('(.+?)'\)")
+# An element named in the message may be gone already; do not wait Browser's full timeout for it
+ELEMENT_TIMEOUT = timedelta(seconds=2)
+
+
+def _write_atomic(path: str, data):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    mode, encoding = ('wb', None) if isinstance(data, bytes) else ('w', 'utf-8')
+    with open(tmp, mode, encoding=encoding) as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def capture_failure(browser, directory: str, safe_name: str, message: str = ''):
+    """Grab the failure artifacts of the current page; returns ([(path, bytes or str)], [(what, error)]).
+
+    Only the page round-trips happen here: the full-page screenshot, the element
+    named in ``message`` (if any) and the page HTML come back in memory, without
+    being logged or saved by Browser. Writing them is left to a CaptureWriter.
+    Each part is attempted on its own, so one failing does not lose the others.
+    """
+    from Browser.utils.data_types import ScreenshotReturnType
+
+    artifacts, errors = [], []
+    try:
+        png = browser.take_screenshot(fullPage=True, log_screenshot=False, return_as=ScreenshotReturnType.bytes)
+        artifacts.append((os.path.join(directory, f"{safe_name}_full_page_failure.png"), png))
+    except Exception as e:
+        errors.append(("full page screenshot", e))
+
+    selector_match = FAILING_SELECTOR.search(message or '')
+    if selector_match:
+        try:
+            png = browser.take_screenshot(selector=selector_match.group(1), log_screenshot=False,
+                                          return_as=ScreenshotReturnType.bytes, timeout=ELEMENT_TIMEOUT)
+            artifacts.append((os.path.join(directory, f"{safe_name}_element_failure.png"), png))
+        except Exception as e:
+            errors.append((f"element screenshot of '{selector_match.group(1)}'", e))
+
+    try:
+        artifacts.append((os.path.join(directory, f"{safe_name}_failure.html"), browser.get_page_source()))
+    except Exception as e:
+        errors.append(("page source", e))
+    return artifacts, errors
+
+
+class CaptureWriter:
+    """Writes failure artifacts to disk on a background thread.
+
+    The queue is bounded: when ``max_pending`` artifacts are waiting, ``submit``
+    blocks, so a burst of failures cannot buffer unbounded full-page screenshots.
+    ``flush`` waits for the queue to drain and returns what was written and what failed.
+    """
+
+    def __init__(self, max_pending: int = 8):
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._written = []
+        self._errors = []
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _run(self):
+        while True:
+            path, data = self._queue.get()
+            try:
+                _write_atomic(path, data)
+                self._written.append(path)
+            except Exception as e:
+                self._errors.append((path, e))
+            finally:
+                self._queue.task_done()
+
+    def submit(self, path: str, data):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="failure-capture-writer", daemon=True)
+                self._thread.start()
+        self._queue.put((path, data))
+
+    def flush(self):
+        """Block until every submitted artifact is written; return (written paths, [(path, error)])."""
+        self._queue.join()
+        written, self._written = self._written, []
+        errors, self._errors = self._errors, []
+        return written, errors
@@ -1,69 +1,140 @@
 import os
 import re
+import tracemalloc
 
 from robot.libraries.BuiltIn import BuiltIn
 
+try:
+    from .duration_history import DurationHistory
+    from .failure_capture import CaptureWriter, capture_failure
+    from .timing_report import TimingAggregator, format_report, write_report
+except ImportError:
+    from duration_history import DurationHistory
+    from failure_capture import CaptureWriter, capture_failure
+    from timing_report import TimingAggregator, format_report, write_report
+
+
+def _full_name(item):
+    # Robot 7 renamed longname to full_name
+    return getattr(item, 'full_name', None) or getattr(item, 'longname', None) or item.name
+
 
 class SimpleLogger:
+    """Prints test progress, screenshots failures and reports where test time goes.
+
+    Listener arguments: ``report_dir`` for the timing JSON (default ${OUTPUT_DIR}),
+    ``top_n`` rows in the slowest tables, ``trace_memory`` to run tracemalloc
+    so image comparisons also report peak allocations, and ``capture_queue``, the
+    number of failure artifacts waiting to be written before capture blocks, and
+    ``history``, the per-test duration store (default: see ``duration_history.history_path``), e.g.
+    ``--listener listeners.simple_logger.SimpleLogger:results:10:true``.
+    """
     ROBOT_LISTENER_API_VERSION = 3
     SCREENSHOT_DIR = "screenshots"
 
-    def __init__(self):
+    def __init__(self, report_dir=None, top_n=10, trace_memory=False, capture_queue=8, history=None):
         # Ensure the screenshot directory exists
         os.makedirs(self.SCREENSHOT_DIR, exist_ok=True)
+        self.report_dir = report_dir
+        self.trace_memory = str(trace_memory).lower() in ('1', 'true', 'yes')
+        self._started_tracing = False
+        self.timings = TimingAggregator(int(top_n))
+        self.capture_writer = CaptureWriter(int(capture_queue))
+        self._captured = False  # the current test's failure artifacts were taken
+        self.history = DurationHistory(history or None)
+
+    def start_suite(self, data, result):
+        """Called when a test suite starts."""
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self.timings.start_suite(_full_name(result))
 
     def start_test(self, name, attributes):
         """Called when a test case starts."""
         print(f"--- STARTING TEST: {name} ---")
+        self.timings.start_test(name.name, _full_name(attributes))
+
+    def start_keyword(self, data, result):
+        self.timings.start_keyword()
+        # Failures inside IF/FOR/TRY never end as a top-level step: capture before the test teardown closes the page
+        if (result.type == 'TEARDOWN' and not self._captured and getattr(result.parent, 'type', None) == 'TEST'
+                and result.parent.failed):
+            self._capture_failure(result.parent.name, result.parent.message)
+
+    def end_keyword(self, data, result):
+        self.timings.end_keyword(_full_name(result))
+        # A failing top-level step fails the test: capture now, before the test teardown closes its page
+        if (result.failed and not self._captured and result.type in ('KEYWORD', 'SETUP')
+                and getattr(result.parent, 'type', None) == 'TEST'):
+            self._capture_failure(result.parent.name, result.message)
 
     def end_test(self, name, result):
         """Called when a test case ends. In V3, the second argument is the result object."""
         # Access the status using dot notation (result.status).
         status = result.status
         print(f"--- ENDED TEST: {name} with status {status} ---")
+        self.timings.end_test(status)
+        if status in ('PASS', 'FAIL'):
+            # Robot 7 reports elapsed_time as a timedelta, older versions elapsedtime in ms
+            elapsed = getattr(result, 'elapsed_time', None)
+            seconds = elapsed.total_seconds() if elapsed is not None else result.elapsedtime / 1000
+            self.history.record(_full_name(result), seconds)
 
-        # Logic to listen specifically for failure and take screenshots
         if status == 'FAIL':
-            try:
-                # 1. Get the instance of the Browser library
-                browser_library = BuiltIn().get_library_instance('Browser')
-
-                # 2. Call the instance's method to get the active Playwright page object
-                # page = browser_library.playwright.current_page
-
-                safe_name = re.sub(r'[^\w\-_\.]', '_', name)
-
-                full_page_path = os.path.join(self.SCREENSHOT_DIR, f"{safe_name}_full_page_failure.png")
-                # page.screenshot(path=full_page_path, full_page=True)
-                BuiltIn().run_keyword('Take Screenshot')
-                print(f"!!! Full webpage screenshot saved to: {full_page_path} !!!")
-
-                # # 2. Attempt to parse the failing selector and take an element screenshot
-                # selector_match = re.search(r"locator\('(.+?)'\)", result.message)
-                #
-                # if selector_match:
-                #     failing_selector = selector_match.group(1)
-                #     element_path = os.path.join(self.SCREENSHOT_DIR, f"{safe_name}_element_failure.png")
-                #
-                #     # Use the page.locator method to find the element
-                #     locator = page.locator(failing_selector).first
-                #
-                #     # Ensure the element is visible before trying to screenshot it
-                #     if locator.is_visible():
-                #         locator.screenshot(path=element_path)
-                #         print(f"!!! Element screenshot for '{failing_selector}' saved to: {element_path} !!!")
-                #     else:
-                #         print("Element identified in error message was not visible for element screenshot.")
-                # else:
-                #     print("Could not parse failing selector from error message for element screenshot.")
-
-            except Exception as e:
-                # Catch exceptions during the screenshot process itself
-                print(f"WARNING: Failed to take screenshot in listener: {e}")
-
+            # Normally captured at the failing step already; this covers failures end_keyword did not see
+            if not self._captured:
+                self._capture_failure(result.name, result.message)
             # Print original failure message
             print(f"!!! TEST FAILURE DETECTED: {name} failed with message: {result.message} !!!")
+        self._captured = False
+
+    def _capture_failure(self, test_name, message):
+        """Grab the page's failure artifacts and queue them for the background writer.
+
+        Only the browser round-trips run here, while the failed page is still open;
+        encoding to disk happens off the test's critical path. When the writer's
+        queue is full this blocks until it has room.
+        """
+        self._captured = True
+        try:
+            browser_library = BuiltIn().get_library_instance('Browser')
+            safe_name = re.sub(r'[^\w\-_\.]', '_', test_name)
+            artifacts, errors = capture_failure(browser_library, self.SCREENSHOT_DIR, safe_name, message)
+        except Exception as e:
+            # Catch exceptions during the screenshot process itself
+            print(f"WARNING: Failed to take screenshot in listener: {e}")
+            return
+        for what, error in errors:
+            print(f"WARNING: Failure capture skipped the {what}: {error}")
+        for path, data in artifacts:
+            self.capture_writer.submit(path, data)
+
+    def _flush_captures(self):
+        written, errors = self.capture_writer.flush()
+        for path in written:
+            print(f"!!! Failure capture saved to: {path} !!!")
+        for path, error in errors:
+            print(f"WARNING: Failed to write failure capture {path}: {error}")
 
     def end_suite(self, name, attributes):
-        """Called when a test suite ends."""
-        print(f"\n--- SUITE '{name}' FINISHED ---")
\ No newline at end of file
+        """Called when a test suite ends. Writes the suite's timing report (JSON) and prints its slowest tables."""
+        print(f"\n--- SUITE '{name}' FINISHED ---")
+        self._flush_captures()
+        try:
+            self.history.flush()
+        except Exception as e:
+            print(f"WARNING: Failed to update test duration history: {e}")
+        report = self.timings.end_suite()
+        try:
+            report_dir = self.report_dir or BuiltIn().get_variable_value('${OUTPUT_DIR}') or os.getcwd()
+            pool_id = BuiltIn().get_variable_value('${PABOTEXECUTIONPOOLID}')
+            worker = f"pabot{pool_id}" if pool_id not in (None, '') else 'main'
+            path = write_report(report, report_dir, worker)
+            print(format_report(report))
+            print(f"Timing report saved to: {path}")
+        except Exception as e:
+            print(f"WARNING: Failed to write timing report in listener: {e}")
+        if self._started_tracing and not getattr(name, 'parent', None):
+            tracemalloc.stop()
+            self._started_tracing = False
\ No newline at end of file
@@ -0,0 +1,149 @@
+import json
+import os
+import re
+import sys
+import time
+
+# Names custom_libs/stage_timings.py is imported under: Robot loads libraries by path
+# (top-level module), scripts and the benchmark may import the package.
+STAGE_TIMING_MODULES = ('stage_timings', 'custom_libs.stage_timings')
+
+
+def collect_comparisons():
+    """Drain the comparisons recorded by every loaded copy of custom_libs/stage_timings."""
+    records = []
+    for name in STAGE_TIMING_MODULES:
+        module = sys.modules.get(name)
+        if module is not None:
+            records.extend(module.drain_comparisons())
+    return records
+
+
+def _new_bucket():
+    return {"comparisons": 0, "stages": {}, "memory": {}, "keywords": {}}
+
+
+def _add_comparisons(bucket, records):
+    for record in records:
+        bucket["comparisons"] += 1
+        for stage, seconds in record["timings"].items():
+            key = f"{record['source']}:{stage}"
+            bucket["stages"][key] = bucket["stages"].get(key, 0.0) + seconds
+        for stage, peak in record["memory"].items():
+            key = f"{record['source']}:{stage}"
+            bucket["memory"][key] = max(bucket["memory"].get(key, 0), peak)
+
+
+def _merge(into, bucket):
+    into["comparisons"] += bucket["comparisons"]
+    for key, seconds in bucket["stages"].items():
+        into["stages"][key] = into["stages"].get(key, 0.0) + seconds
+    for key, peak in bucket["memory"].items():
+        into["memory"][key] = max(into["memory"].get(key, 0), peak)
+    for name, kw in bucket["keywords"].items():
+        total = into["keywords"].setdefault(name, {"calls": 0, "total_s": 0.0})
+        total["calls"] += kw["calls"]
+        total["total_s"] += kw["total_s"]
+
+
+class TimingAggregator:
+    """Per-test and per-suite timing figures for the SimpleLogger listener.
+
+    Tests carry their wall time, keyword durations and the stage timings / peak
+    allocations of every image comparison run while they were active. Suites sum
+    their tests (and child suites); comparisons run outside any test, e.g. in
+    suite setup, are kept under the suite's "outside_tests".
+    """
+
+    def __init__(self, top_n: int = 10):
+        self.top_n = top_n
+        self._suites = []  # open suites, innermost last
+        self._test = None
+        self._keyword_starts = []
+
+    def start_suite(self, name: str):
+        self._suites.append({"suite": name, "started": time.perf_counter(), "tests": [],
+                             "outside_tests": _new_bucket()})
+
+    def start_test(self, name: str, longname: str):
+        _add_comparisons(self._suites[-1]["outside_tests"], collect_comparisons())
+        self._test = {"name": name, "longname": longname, "started": time.perf_counter(), **_new_bucket()}
+
+    def start_keyword(self):
+        self._keyword_starts.append(time.perf_counter())
+
+    def end_keyword(self, name: str):
+        if not self._keyword_starts:
+            return
+        seconds = time.perf_counter() - self._keyword_starts.pop()
+        if self._test is not None:
+            kw = self._test["keywords"].setdefault(name, {"calls": 0, "total_s": 0.0})
+            kw["calls"] += 1
+            kw["total_s"] += seconds
+
+    def end_test(self, status: str):
+        test, self._test = self._test, None
+        if test is None:
+            return
+        _add_comparisons(test, collect_comparisons())
+        test["duration_s"] = time.perf_counter() - test.pop("started")
+        test["status"] = status
+        self._suites[-1]["tests"].append(test)
+
+    def end_suite(self) -> dict:
+        """Close the innermost suite and return its report; its tests also count towards the parent."""
+        suite = self._suites.pop()
+        _add_comparisons(suite["outside_tests"], collect_comparisons())
+        duration = time.perf_counter() - suite.pop("started")
+
+        totals = _new_bucket()
+        _merge(totals, suite["outside_tests"])
+        for test in suite["tests"]:
+            _merge(totals, test)
+        if self._suites:
+            parent = self._suites[-1]
+            parent["tests"].extend(suite["tests"])
+            _merge(parent["outside_tests"], suite["outside_tests"])
+
+        slowest_tests = sorted(suite["tests"], key=lambda t: t["duration_s"], reverse=True)[:self.top_n]
+        slowest_stages = sorted(totals["stages"].items(), key=lambda item: item[1], reverse=True)[:self.top_n]
+        return {
+            "suite": suite["suite"],
+            "duration_s": duration,
+            "test_count": len(suite["tests"]),
+            "test_time_s": sum(t["duration_s"] for t in suite["tests"]),
+            "totals": totals,
+            "outside_tests": suite["outside_tests"],
+            "tests": suite["tests"],
+            "slowest_tests": [{"test": t["longname"], "duration_s": t["duration_s"], "status": t["status"]}
+                              for t in slowest_tests],
+            "slowest_stages": [{"stage": key, "total_s": seconds} for key, seconds in slowest_stages],
+        }
+
+
+def format_report(report: dict) -> str:
+    """Render the top-N slowest tests and stages of a suite report as a plain-text table."""
+    lines = [f"Timing report for '{report['suite']}': {report['test_count']} tests, "
+             f"{report['duration_s']:.2f}s wall, {report['totals']['comparisons']} image comparisons",
+             "  Slowest tests:"]
+    lines += [f"    {t['duration_s']:9.3f}s  {t['status']:<4}  {t['test']}" for t in report["slowest_tests"]]
+    if report["slowest_stages"]:
+        lines.append("  Slowest comparison stages:")
+        memory = report["totals"]["memory"]
+        for stage in report["slowest_stages"]:
+            peak = memory.get(stage["stage"])
+            peak_text = f"  peak {peak / (1024 * 1024):.1f} MiB" if peak is not None else ""
+            lines.append(f"    {stage['total_s']:9.3f}s  {stage['stage']}{peak_text}")
+    return "\n".join(lines)
+
+
+def write_report(report: dict, report_dir: str, worker: str = 'main') -> str:
+    """Write the report as JSON to <report_dir>/timing_<worker>_<suite>.json and return the path."""
+    os.makedirs(report_dir, exist_ok=True)
+    suite = re.sub(r'[^\w\-_\.]', '_', report["suite"]).strip('._') or 'suite'
+    path = os.path.join(report_dir, f"timing_{worker}_{suite}.json")
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp, path)
+    return path
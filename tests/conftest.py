@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+# Let the tests import custom_libs and listeners when pytest runs from any folder
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+
+@pytest.fixture(autouse=True)
+def _isolated_outputs(tmp_path, monkeypatch):
+    """Keep result logs and caches out of the repository's output/ folder."""
+    monkeypatch.setenv("IMAGE_COMPARE_RESULTS_DIR", str(tmp_path / "results"))
+    monkeypatch.setenv("IMAGE_COMPARE_CACHE_DIR", str(tmp_path / "cache"))
+    # The process-wide caches are created on first use; make every test create its own
+    monkeypatch.setattr("custom_libs.decode_cache._default_cache", None)
+    monkeypatch.setattr("custom_libs.result_memo._default_memo", None)
@@ -1,4 +1,18 @@
-from lib.ImageComparision import compare_images
+import os
+import sys
+import tempfile
 
-res = compare_images('screenshots_before.png', 'screenshots_after.png', output_dir='output', method='ssim', align=True, min_area=1500)
-print(f"SSIM Score: {res.ssim_score}, Changed Percent: {res.changed_percent:.4f}, Regions Detected: {res.regions_count}, Output Paths: {res.output_paths}")
\ No newline at end of file
+# Runnable as `python tests/test.py` from anywhere: put the repository root on the import path
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from custom_libs.ImageComparision import compare_images  # noqa: E402
+
+# Artifacts, caches and the result log all go to a scratch folder, not the repository's output/
+scratch = tempfile.mkdtemp(prefix='image-compare-')
+os.environ.setdefault('IMAGE_COMPARE_CACHE_DIR', os.path.join(scratch, 'cache'))
+os.environ.setdefault('IMAGE_COMPARE_RESULTS_DIR', os.path.join(scratch, 'results'))
+output_dir = os.path.join(scratch, 'out')
+res = compare_images(os.path.join(REPO_ROOT, 'screenshots_before.png'), os.path.join(REPO_ROOT, 'screenshots_after.png'),
+                     output_dir=output_dir, method='ssim', align=True, min_area=1500, background_writes=False)
+print(f"SSIM Score: {res.ssim_score}, Changed Percent: {res.changed_percent:.4f}, Regions Detected: {res.regions_count}, Output Paths: {res.output_paths}")
@@ -0,0 +1,38 @@
+import os
+
+import cv2
+import numpy as np
+
+from custom_libs.ImageComparision import approve_baseline, compare_to_baseline
+from custom_libs.baseline_store import BaselineStore
+
+
+def _page(path):
+    image = np.full((200, 320, 3), 255, np.uint8)
+    cv2.rectangle(image, (20, 20), (140, 90), (40, 120, 200), -1)
+    cv2.putText(image, "Top categories", (20, 150), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (30, 30, 30), 2)
+    cv2.imwrite(str(path), image)
+    return str(path)
+
+
+def _files(directory):
+    return sorted(os.listdir(directory))
+
+
+def test_features_go_to_derived_dir_and_blob_is_untouched(tmp_path):
+    store_dir = str(tmp_path / "store")
+    page = _page(tmp_path / "page.png")
+    digest = approve_baseline(page, "Suite.Home", "chromium", "1280x720", store_dir=store_dir, max_features=500)
+
+    baseline = BaselineStore(store_dir).get("Suite.Home", "chromium", "1280x720")
+    assert baseline.digest == digest
+    blob_files = _files(baseline.directory)
+    assert not [name for name in blob_files if name.startswith("orb")]
+    assert baseline.derived_dir != baseline.directory
+    assert [name for name in _files(baseline.derived_dir) if name.endswith(".npz")]
+    assert not [name for name in _files(baseline.derived_dir) if ".tmp" in name]
+
+    result = compare_to_baseline(page, "Suite.Home", "chromium", "1280x720", store_dir=store_dir,
+                                 output_dir=str(tmp_path / "out"), artifacts='never', memo=False)
+    assert result.passed
+    assert _files(baseline.directory) == blob_files
@@ -0,0 +1,47 @@
+import cv2
+import numpy as np
+
+from custom_libs.ImageComparision import compare_images, compare_images_batch
+
+
+def _write_pairs(tmp_path):
+    baselines, actuals = tmp_path / "baseline", tmp_path / "actual"
+    baselines.mkdir()
+    actuals.mkdir()
+    for i in range(4):
+        page = np.full((90, 140, 3), 255, np.uint8)
+        cv2.putText(page, f"Card {i}", (10, 50), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (40, 40, 40), 2)
+        cv2.imwrite(str(baselines / f"card{i}.png"), page)
+        for j in range(i):  # pair i has i separate changes
+            cv2.rectangle(page, (15 + 30 * j, 65), (35 + 30 * j, 85), (0, 0, 255), -1)
+        cv2.imwrite(str(actuals / f"card{i}.png"), page)
+    cv2.imwrite(str(baselines / "only_baseline.png"), np.zeros((10, 10, 3), np.uint8))
+    return str(baselines), str(actuals)
+
+
+def test_pool_results_match_single_comparisons(tmp_path):
+    baseline_dir, actual_dir = _write_pairs(tmp_path)
+    batch = compare_images_batch(baseline_dir=baseline_dir, actual_dir=actual_dir, output_dir=str(tmp_path / "out"),
+                                 align=False, min_area=1, processes=2, artifacts='never')
+
+    assert batch.summary["pairs"] == batch.summary["compared"] == 4
+    assert batch.summary["unmatched"] == ["only_baseline.png"]
+    assert batch.summary["errors"] == {}
+    for i, result in enumerate(batch.results):
+        single = compare_images(f"{baseline_dir}/card{i}.png", f"{actual_dir}/card{i}.png",
+                                output_dir=str(tmp_path / "single"), align=False, min_area=1,
+                                artifacts='never', memo=False)
+        assert result.regions_count == single.regions_count == i
+        assert result.changed_percent == single.changed_percent
+
+
+def test_failing_pair_is_reported_without_stopping_the_batch(tmp_path):
+    baseline_dir, actual_dir = _write_pairs(tmp_path)
+    pairs = [(f"{baseline_dir}/card1.png", f"{actual_dir}/card1.png"),
+             (f"{baseline_dir}/missing.png", f"{actual_dir}/card2.png")]
+    batch = compare_images_batch(pairs, output_dir=str(tmp_path / "out"), align=False, min_area=1,
+                                 processes=1, artifacts='never')
+
+    assert batch.results[0].regions_count == 1 and batch.results[1] is None
+    (message,) = batch.summary["errors"].values()
+    assert message.startswith("FileNotFoundError")
@@ -0,0 +1,52 @@
+import json
+import urllib.parse
+
+import pytest
+
+from custom_libs import browserstack_connection_helper as helper
+
+
+@pytest.fixture
+def probe(tmp_path, monkeypatch):
+    """Counts `playwright --version` runs; the install key and cache folder are the test's own."""
+    calls = []
+    install = {"packages": {"playwright": "1.44.0"}, "cli": "/usr/bin/playwright", "cli_mtime": 1.0}
+    monkeypatch.setattr(helper, "CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(helper, "_playwright_install_key", lambda: dict(install))
+    monkeypatch.setattr(helper.subprocess, "getoutput", lambda command: calls.append(command) or "Version 1.44.0")
+    helper.clientPlaywrightVersion.cache_clear()
+    helper.buildCapabilities.cache_clear()
+    helper._cdp_url.cache_clear()
+    yield calls, install
+    helper.clientPlaywrightVersion.cache_clear()
+    helper.buildCapabilities.cache_clear()
+    helper._cdp_url.cache_clear()
+
+
+def test_version_is_probed_once_per_install(probe):
+    calls, install = probe
+    assert helper.clientPlaywrightVersion() == "1.44.0"
+    helper.clientPlaywrightVersion.cache_clear()  # as in a new process: only the file is left
+    assert helper.clientPlaywrightVersion() == "1.44.0"
+    assert len(calls) == 1
+
+    install["packages"] = {"playwright": "1.45.0"}
+    helper.clientPlaywrightVersion.cache_clear()
+    helper.clientPlaywrightVersion()
+    assert len(calls) == 2
+
+
+def test_capabilities_are_per_browser_and_leave_the_template_alone(probe):
+    template = json.dumps(helper.desired_cap, sort_keys=True)
+    chrome, firefox = helper.buildCapabilities('chrome'), helper.buildCapabilities('firefox')
+
+    assert chrome['browser'] == 'chrome' and firefox['browser'] == 'playwright-firefox'
+    assert chrome['client.playwrightVersion'] == "1.44.0"
+    with pytest.raises(TypeError):
+        chrome['browser'] = 'edge'
+    assert json.dumps(helper.desired_cap, sort_keys=True) == template
+
+    url = helper.createCdpUrl('chrome')
+    assert helper.createCdpUrl('chrome') is url
+    assert json.loads(urllib.parse.unquote(url.split('caps=', 1)[1]))['os'] == 'Windows'
+    assert helper.getPlatformDetails().startswith("Windows 11 chrome")
@@ -0,0 +1,62 @@
+import json
+import os
+import subprocess
+import sys
+
+from custom_libs.browserstack_tunnel import TunnelManager
+
+
+class FakeLocal:
+    """Stands in for browserstack.local.Local and records every call."""
+    calls = []
+
+    def __init__(self):
+        self.pid = None
+
+    def start(self, **options):
+        FakeLocal.calls.append(("start", options.get("onlyCommand", False)))
+        if not options.get("onlyCommand"):
+            self.pid = os.getpid()  # a live process, so the tunnel counts as running
+
+    def stop(self):
+        FakeLocal.calls.append(("stop", False))
+
+
+def _manager(tmp_path):
+    FakeLocal.calls = []
+    return TunnelManager("key", "pabot-run", local_factory=FakeLocal, state_dir=str(tmp_path))
+
+
+def _dead_pid():
+    child = subprocess.Popen([sys.executable, "-c", "pass"])
+    child.wait()
+    return child.pid
+
+
+def test_tunnel_starts_once_and_is_reference_counted(tmp_path):
+    manager = _manager(tmp_path)
+    assert manager.acquire() is True
+    assert manager.acquire() is False
+    assert manager.users() == {str(os.getpid()): 2}
+    assert FakeLocal.calls == [("start", False)]
+
+    assert manager.release() is False
+    assert FakeLocal.calls == [("start", False)]
+    assert manager.release() is True
+    assert FakeLocal.calls == [("start", False), ("stop", False)]
+    assert not os.path.exists(manager.state_path)
+
+
+def test_dead_users_are_pruned_and_last_release_stops(tmp_path):
+    manager = _manager(tmp_path)
+    dead = str(_dead_pid())
+    with open(manager.state_path, "w", encoding="utf-8") as f:
+        json.dump({"users": {dead: 3}, "tunnel_pid": os.getpid()}, f)
+
+    # The tunnel of the crashed user is still up: this process joins it without starting another
+    assert manager.acquire() is False
+    assert manager.users() == {str(os.getpid()): 1}
+
+    # No Local of its own: the stopping process resolves the binary with onlyCommand first
+    assert manager.release() is True
+    assert FakeLocal.calls == [("start", True), ("stop", False)]
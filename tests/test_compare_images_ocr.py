@@ -0,0 +1,50 @@
+import cv2
+import numpy as np
+
+from custom_libs import compare_images as ocr_pipeline
+
+
+class RecordingEngine:
+    def __init__(self):
+        self.calls = []
+
+    def extract_regions(self, img, boxes, baseline_path=None):
+        self.calls.append((img.shape, list(boxes), baseline_path))
+        return [[] for _ in boxes]
+
+
+def test_ocr_boxes_use_full_image_coordinates_after_a_crop(tmp_path, monkeypatch):
+    engine = RecordingEngine()
+    monkeypatch.setattr(ocr_pipeline, "get_ocr_engine", lambda: engine)
+    baseline = np.full((200, 300, 3), 255, np.uint8)
+    current = baseline.copy()
+    cv2.rectangle(current, (150, 120), (180, 150), (0, 0, 0), -1)
+    cv2.imwrite(str(tmp_path / "a.png"), baseline)
+    cv2.imwrite(str(tmp_path / "b.png"), current)
+
+    results = ocr_pipeline.compare_images(str(tmp_path / "a.png"), str(tmp_path / "b.png"),
+                                          output_dir=str(tmp_path / "out"), include="100,100,150,80",
+                                          memo=False, decode_cache=False)
+
+    assert results["roi"] == (100, 100, 150, 80)
+    (base_shape, base_boxes, baseline_path), (curr_shape, curr_boxes, _) = engine.calls
+    assert base_shape == curr_shape == baseline.shape
+    assert baseline_path == str(tmp_path / "a.png")
+    assert base_boxes == curr_boxes
+    x, y, w, h = base_boxes[0]
+    assert x <= 150 and y <= 120 and x + w >= 180 and y + h >= 150
+
+
+def test_precheck_memo_and_full_results_have_the_same_keys(tmp_path):
+    page = np.full((60, 90, 3), 255, np.uint8)
+    cv2.imwrite(str(tmp_path / "a.png"), page)
+    cv2.imwrite(str(tmp_path / "b.png"), page)
+    a, b, out = str(tmp_path / "a.png"), str(tmp_path / "b.png"), str(tmp_path / "out")
+
+    full = ocr_pipeline.compare_images(a, b, output_dir=out, precheck=False, decode_cache=False)
+    cached = ocr_pipeline.compare_images(a, b, output_dir=out, precheck=False, decode_cache=False)
+    skipped = ocr_pipeline.compare_images(a, b, output_dir=out, memo=False, decode_cache=False)
+
+    assert (full["cached"], cached["cached"], skipped["precheck"]) == (False, True, 'content_hash')
+    assert set(skipped) == set(cached) == set(full)
+    assert skipped["output_dir"] is None and skipped["roi"] is None
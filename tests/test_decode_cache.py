@@ -0,0 +1,46 @@
+import os
+
+import cv2
+import numpy as np
+
+from custom_libs.decode_cache import DecodeCache
+
+
+def _write(path, value, size=(40, 60)):
+    cv2.imwrite(str(path), np.full(size + (3,), value, np.uint8))
+    return str(path)
+
+
+def test_hit_is_a_read_only_map_of_the_same_pixels(tmp_path):
+    cache = DecodeCache(str(tmp_path / "decoded"))
+    path = _write(tmp_path / "page.png", 120)
+
+    first = cache.imread(path)
+    second = cache.imread(path)
+
+    assert isinstance(second, np.memmap) and not second.flags.writeable
+    np.testing.assert_array_equal(first, cv2.imread(path))
+    np.testing.assert_array_equal(second, first)
+
+
+def test_replaced_file_is_decoded_again(tmp_path):
+    cache = DecodeCache(str(tmp_path / "decoded"))
+    path = _write(tmp_path / "page.png", 120)
+    cache.imread(path)
+
+    _write(tmp_path / "page.png", 30, size=(50, 60))
+    assert cache.imread(path).shape == (50, 60, 3)
+    assert int(cache.imread(path)[0, 0, 0]) == 30
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = DecodeCache(str(tmp_path / "decoded"))
+    paths = [_write(tmp_path / f"page{i}.png", 10 * i) for i in range(3)]
+    for i, path in enumerate(paths):
+        cache.imread(path)
+        os.utime(cache.entry_path(path), (1000 + i, 1000 + i))
+
+    cache.max_bytes = 2 * (40 * 60 * 3 + 128)  # two entries: pixels plus the .npy header
+    cache.evict()
+    assert not cache.entry_path(paths[0]).exists()
+    assert cache.entry_path(paths[1]).exists() and cache.entry_path(paths[2]).exists()
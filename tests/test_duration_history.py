@@ -0,0 +1,31 @@
+from listeners.duration_history import DurationHistory, format_ordering, predicted_wall_time, schedule
+
+
+def test_ordering_file_puts_the_longest_tests_first():
+    tests = [("Suite.Quick", []), ("Suite.Slow", []), ("Suite.New", []),
+             ("Suite.Cart Add", ["shared-setup:cart"]), ("Suite.Cart Remove", ["shared-setup:cart"])]
+    estimates = {"Suite.Quick": 2.0, "Suite.Slow": 30.0, "Suite.Cart Add": 8.0, "Suite.Cart Remove": 9.0}
+
+    blocks = schedule(tests, estimates)
+
+    # Unknown tests cost the median of the known ones; a shared-setup group costs its sum
+    assert blocks == [(30.0, ["Suite.Slow"]), (17.0, ["Suite.Cart Add", "Suite.Cart Remove"]),
+                      (8.5, ["Suite.New"]), (2.0, ["Suite.Quick"])]
+    assert format_ordering(blocks).splitlines() == [
+        "--test Suite.Slow", "{", "--test Suite.Cart Add", "--test Suite.Cart Remove", "}",
+        "--test Suite.New", "--test Suite.Quick"]
+    assert predicted_wall_time(blocks, 2) == 30.0
+
+
+def test_history_keeps_a_rolling_window_and_estimates_the_median(tmp_path):
+    path = str(tmp_path / "durations.json")
+    history = DurationHistory(path, window=3)
+    for seconds in (50.0, 4.0, 5.0, 6.0):
+        history.record("Suite.Login", seconds)
+    history.flush()
+    other = DurationHistory(path, window=3)
+    other.record("Suite.Login", 100.0)
+    other.flush()
+
+    assert history.load() == {"Suite.Login": [5.0, 6.0, 100.0]}
+    assert history.estimates() == {"Suite.Login": 6.0}
@@ -0,0 +1,61 @@
+import shutil
+from pathlib import Path
+
+import cv2
+import numpy as np
+from robot import run
+
+SUITE = """
+*** Settings ***
+Library    {library}
+
+*** Test Cases ***
+Options Are Converted
+    ${{result}}=    Diff Images    {a}    {b}    output_dir={out}    precheck=False    align=False
+    ...    min_area=1    artifacts=never    memo=False    decode_cache=False
+    Should Be Equal    ${{result.precheck}}    full
+    Should Be Equal As Integers    ${{result.regions_count}}    0
+"""
+
+
+def test_diff_images_converts_robot_arguments(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    image = np.full((60, 80, 3), 255, np.uint8)
+    cv2.imwrite(str(tmp_path / "a.png"), image)
+    shutil.copy(tmp_path / "a.png", tmp_path / "b.png")  # identical: only precheck=False forces the full diff
+    suite = tmp_path / "suite.robot"
+    library = Path(__file__).resolve().parents[1] / "custom_libs" / "ImageCompareLibrary.py"
+    suite.write_text(SUITE.format(library=library, a=tmp_path / "a.png", b=tmp_path / "b.png", out=tmp_path / "out"),
+                     encoding="utf-8")
+
+    rc = run(str(suite), output=None, report=None, log=None, stdout=None, console='none')
+    assert rc == 0
+
+
+FLUSH_SUITE = """
+*** Settings ***
+Library    OperatingSystem
+Library    {library}
+
+*** Test Cases ***
+Artifacts Are On Disk After Flush
+    ${{result}}=    Diff Images    {a}    {b}    output_dir={out}    align=False    min_area=1    memo=False
+    Flush Artifacts
+    File Should Exist    ${{result.output_paths}}[overlay]
+"""
+
+
+def test_flush_artifacts_waits_for_background_writes(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    image = np.full((60, 80, 3), 255, np.uint8)
+    cv2.imwrite(str(tmp_path / "a.png"), image)
+    cv2.rectangle(image, (10, 10), (30, 30), (0, 0, 0), -1)
+    cv2.imwrite(str(tmp_path / "b.png"), image)
+    suite = tmp_path / "suite.robot"
+    library = Path(__file__).resolve().parents[1] / "custom_libs" / "ImageCompareLibrary.py"
+    suite.write_text(FLUSH_SUITE.format(library=library, a=tmp_path / "a.png", b=tmp_path / "b.png",
+                                        out=tmp_path / "out"), encoding="utf-8")
+
+    rc = run(str(suite), output=None, report=None, log=None, stdout=None, console='none')
+    assert rc == 0
+    assert (tmp_path / "out" / "report.txt").is_file()
@@ -0,0 +1,72 @@
+import cv2
+import numpy as np
+import pytest
+
+from custom_libs.ImageComparision import (compute_absdiff_mask, compute_masks_batch, compute_masks_tiled,
+                                          compute_ssim_mask)
+
+
+def _tall_page(seed, changed=False):
+    rng = np.random.default_rng(seed)
+    page = np.full((1400, 300, 3), 245, np.uint8)
+    for y in range(20, 1380, 60):
+        cv2.putText(page, f"Row {y} {rng.integers(1000)}", (10, y), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (20, 20, 20), 1)
+    if changed:
+        # Changes straddling the band edges, where a wrong halo would show
+        cv2.rectangle(page, (40, 500), (120, 530), (0, 0, 200), -1)
+        cv2.putText(page, "Sale", (150, 1030), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 0), 2)
+    return page
+
+
+@pytest.mark.parametrize("tile_height", [256, 512, 4096])
+def test_tiled_absdiff_matches_full_frame(tile_height):
+    a, b = _tall_page(1), _tall_page(1, changed=True)
+    grayA, grayB = cv2.cvtColor(a, cv2.COLOR_BGR2GRAY), cv2.cvtColor(b, cv2.COLOR_BGR2GRAY)
+    diff, mask = compute_absdiff_mask(grayA, grayB)
+
+    score, tiled_diff, tiled_mask = compute_masks_tiled(a, b, 'absdiff', tile_height)
+    assert score is None
+    np.testing.assert_array_equal(tiled_diff, diff)
+    np.testing.assert_array_equal(tiled_mask, mask)
+
+
+def test_tiled_ssim_matches_full_frame():
+    a, b = _tall_page(2), _tall_page(2, changed=True)
+    grayA, grayB = cv2.cvtColor(a, cv2.COLOR_BGR2GRAY), cv2.cvtColor(b, cv2.COLOR_BGR2GRAY)
+    score, diff, mask = compute_ssim_mask(grayA, grayB)
+
+    tiled_score, tiled_diff, tiled_mask = compute_masks_tiled(a, b, 'ssim', 256)
+    assert tiled_score == pytest.approx(score, abs=1e-9)
+    np.testing.assert_array_equal(tiled_diff, diff)
+    np.testing.assert_array_equal(tiled_mask, mask)
+
+
+def _element_pairs(count=6):
+    rng = np.random.default_rng(3)
+    pairs = []
+    for i in range(count):
+        a = np.full((48, 160, 3), 250, np.uint8)
+        cv2.putText(a, f"Item {rng.integers(100, 999)}", (5, 32), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (30, 30, 30), 1)
+        b = a.copy()
+        if i % 2:
+            cv2.rectangle(b, (100 + i, 8), (130 + i, 30), (0, 0, 0), -1)
+        pairs.append((a, b))
+    return pairs
+
+
+@pytest.mark.parametrize("method", ['absdiff', 'ssim'])
+def test_batch_kernels_match_per_pair_kernels(method):
+    pairs = _element_pairs()
+    batch = compute_masks_batch([a for a, _ in pairs], [b for _, b in pairs], method)
+
+    assert len(batch) == len(pairs)
+    for (a, b), (score, diff, mask) in zip(pairs, batch):
+        grayA, grayB = cv2.cvtColor(a, cv2.COLOR_BGR2GRAY), cv2.cvtColor(b, cv2.COLOR_BGR2GRAY)
+        if method == 'ssim':
+            expected_score, expected_diff, expected_mask = compute_ssim_mask(grayA, grayB)
+            assert score == pytest.approx(expected_score, abs=1e-9)
+        else:
+            expected_diff, expected_mask = compute_absdiff_mask(grayA, grayB)
+            assert score is None
+        np.testing.assert_array_equal(diff, expected_diff)
+        np.testing.assert_array_equal(mask, expected_mask)
@@ -0,0 +1,46 @@
+import cv2
+import numpy as np
+
+from custom_libs.ImageComparision import compare_images
+from custom_libs.precheck import precheck_pair
+
+
+def _price_tag(path, text):
+    image = np.full((120, 480, 3), 255, np.uint8)
+    cv2.putText(image, text, (20, 75), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (30, 30, 30), 1, cv2.LINE_AA)
+    cv2.imwrite(str(path), image)
+    return str(path)
+
+
+def test_identical_files_are_skipped(tmp_path):
+    a = _price_tag(tmp_path / "a.png", "Total 1,299")
+    b = _price_tag(tmp_path / "b.png", "Total 1,299")
+    assert precheck_pair(a, b) == 'content_hash'
+
+
+def test_small_text_change_is_not_skipped(tmp_path):
+    a = _price_tag(tmp_path / "a.png", "Total 1,299")
+    b = _price_tag(tmp_path / "b.png", "Total 1.299")
+    assert precheck_pair(a, b) is None
+
+    result = compare_images(a, b, output_dir=str(tmp_path / "out"), align=False, min_area=1,
+                            artifacts='never', memo=False, decode_cache=False)
+    assert result.precheck == 'full'
+    assert result.regions_count >= 1
+    assert not result.passed
+
+
+def test_reencoded_file_with_the_same_pixels_is_skipped(tmp_path):
+    a = _price_tag(tmp_path / "a.png", "Total 1,299")
+    image = cv2.imread(a)
+    cv2.imwrite(str(tmp_path / "b.png"), image, [cv2.IMWRITE_PNG_COMPRESSION, 0])
+    assert open(a, "rb").read() != open(tmp_path / "b.png", "rb").read()
+    assert precheck_pair(a, str(tmp_path / "b.png")) == 'decoded_pixels'
+
+    image[60, 100] = (0, 0, 0)
+    cv2.imwrite(str(tmp_path / "c.png"), image, [cv2.IMWRITE_PNG_COMPRESSION, 0])
+    assert precheck_pair(a, str(tmp_path / "c.png")) is None
+
+    result = compare_images(a, str(tmp_path / "b.png"), output_dir=str(tmp_path / "out"), memo=False)
+    assert result.precheck == 'decoded_pixels'
+    assert result.passed
@@ -0,0 +1,39 @@
+import cv2
+import numpy as np
+
+from custom_libs.regions import MAX_TINT_BOXES, mask_components, regions_from_components, tint_components
+
+
+def _mask():
+    mask = np.zeros((3000, 400), np.uint8)
+    mask[2500:2510, 50:80] = 255   # 300 pixels
+    mask[2600:2602, 300:303] = 255  # 6 pixels
+    return mask
+
+
+def test_components_are_in_mask_coordinates():
+    stats = mask_components(_mask())
+    assert sorted(map(tuple, stats.tolist())) == [(50, 2500, 30, 10, 300), (300, 2600, 3, 2, 6)]
+    assert mask_components(np.zeros((10, 10), np.uint8)).shape == (0, 5)
+
+
+def test_regions_filter_by_changed_pixels_and_match_find_contours():
+    mask = _mask()
+    regions = regions_from_components(mask_components(mask), min_area=100)
+    assert regions == [{"x": 50, "y": 2500, "width": 30, "height": 10, "changed_pixels": 300}]
+
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    assert sorted(cv2.boundingRect(c) for c in contours) == sorted(
+        (r["x"], r["y"], r["width"], r["height"]) for r in regions_from_components(mask_components(mask)))
+
+
+def test_tint_only_changes_masked_pixels_with_many_components():
+    mask = np.zeros((200, 200), np.uint8)
+    mask[::2, ::2] = 255  # one component per pixel, past MAX_TINT_BOXES
+    stats = mask_components(mask, connectivity=4)
+    assert len(stats) > MAX_TINT_BOXES
+
+    image = np.full((200, 200, 3), 200, np.uint8)
+    tinted = tint_components(image.copy(), mask, stats)
+    changed = (tinted != image).any(axis=2)
+    np.testing.assert_array_equal(changed, mask == 255)
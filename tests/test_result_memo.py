@@ -0,0 +1,39 @@
+import cv2
+import numpy as np
+
+from custom_libs.ImageComparision import compare_images
+from custom_libs.artifacts import flush_artifacts
+from custom_libs.result_memo import ResultMemo
+
+
+def _pair(tmp_path, name, shift):
+    a = np.full((80, 120, 3), 255, np.uint8)
+    b = a.copy()
+    cv2.rectangle(b, (10 + shift, 10), (40 + shift, 40), (0, 0, 0), -1)
+    cv2.imwrite(str(tmp_path / f"{name}_a.png"), a)
+    cv2.imwrite(str(tmp_path / f"{name}_b.png"), b)
+    return str(tmp_path / f"{name}_a.png"), str(tmp_path / f"{name}_b.png")
+
+
+def test_hit_needs_unchanged_artifacts(tmp_path, monkeypatch):
+    monkeypatch.setenv("IMAGE_COMPARE_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr("custom_libs.result_memo._default_memo", None)
+    out = str(tmp_path / "out")
+    first, second = _pair(tmp_path, "first", 0), _pair(tmp_path, "second", 40)
+
+    compare_images(*first, output_dir=out, align=False, min_area=1, decode_cache=False)
+    flush_artifacts()
+    assert compare_images(*first, output_dir=out, align=False, min_area=1, decode_cache=False).cached
+
+    # Another comparison overwrites the artifacts in the same folder
+    compare_images(*second, output_dir=out, align=False, min_area=1, decode_cache=False)
+    flush_artifacts()
+    assert not compare_images(*first, output_dir=out, align=False, min_area=1, decode_cache=False).cached
+
+
+def test_eviction_trims_below_the_limit(tmp_path):
+    memo = ResultMemo(str(tmp_path), max_entries=10)
+    for n in range(25):
+        memo.put(f"k{n}", {"n": n})
+    assert len(list(tmp_path.glob("*.json"))) <= 10
+    assert memo.get("k24") == {"n": 24}
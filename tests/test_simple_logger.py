@@ -0,0 +1,50 @@
+from robot import run
+
+from listeners.simple_logger import SimpleLogger
+
+SUITE = """
+*** Test Cases ***
+Fails Inside If
+    IF    True
+        Fail    boom
+    END
+    [Teardown]    Log    closing the page
+
+Fails In A Step
+    Fail    direct
+    [Teardown]    Log    closing the page
+
+Passes
+    Log    ok
+    [Teardown]    Log    closing the page
+"""
+
+
+class RecordingLogger(SimpleLogger):
+    """Records captures instead of talking to the Browser library."""
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.captures = []
+        self._in_teardown = False
+
+    def start_keyword(self, data, result):
+        super().start_keyword(data, result)
+        self._in_teardown = result.type == 'TEARDOWN'
+
+    def _capture_failure(self, test_name, message):
+        self._captured = True
+        self.captures.append((test_name, message, self._in_teardown))
+
+
+def test_failures_are_captured_before_the_teardown_runs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("TEST_DURATION_HISTORY", str(tmp_path / "durations.json"))
+    suite = tmp_path / "suite.robot"
+    suite.write_text(SUITE, encoding="utf-8")
+    listener = RecordingLogger(str(tmp_path / "timings"))
+
+    run(str(suite), listener=listener, output=None, report=None, log=None, stdout=None, console='none')
+
+    # The IF failure is caught as the teardown starts, before its keyword runs; the direct one at the step
+    assert listener.captures == [("Fails Inside If", "boom", False), ("Fails In A Step", "direct", False)]